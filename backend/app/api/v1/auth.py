@@ -1,37 +1,88 @@
-﻿from fastapi import APIRouter, Depends, HTTPException, status
+﻿import math
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
-from backend.app.db.session import get_db
-from backend.app.crud.users import get_user_by_email, create_user
+from backend.app.db.session import get_db, get_async_db
+from backend.app.crud.users import (
+    LOGIN_FIELDS, get_user_by_email_async, create_user_async, set_password_hash_async, known_failed_login, remember_failed_login,
+    remember_token_version,
+)
+from backend.app.models.users import User
 from backend.app.schemas.users import UserCreate, Token
-from backend.app.core.security import verify_password, create_access_token
+from backend.app.core.security import create_access_token, user_token_claims, login_fingerprint
+from backend.app.core.rate_limit import build_limiter
+from backend.app.core.config import (
+    LOGIN_RATE_BACKEND, LOGIN_EMAIL_MAX_FAILURES, LOGIN_EMAIL_WINDOW_SECONDS, LOGIN_IP_MAX_FAILURES, LOGIN_IP_WINDOW_SECONDS,
+)
+from backend.app.core.password_pool import password_pool
 from backend.app.api.v1.deps import get_current_user  # <-- import dependency
 
 router = APIRouter(tags=["auth"])
 
 
 @router.post("/register", response_model=dict)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
-    existing = get_user_by_email(db, user_in.email)
+async def register(user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await get_user_by_email_async(db, user_in.email, fields=("id",))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
-    user = create_user(db, user_in)
+    hashed_password = await password_pool.hash(user_in.password)
+    user = await create_user_async(db, user_in, hashed_password=hashed_password)
     return {"msg": "user created", "id": user.id}
 
 
+# ----------------- Login throttling -----------------
+login_email_limiter = build_limiter(LOGIN_RATE_BACKEND, "loginrl:email", LOGIN_EMAIL_MAX_FAILURES, LOGIN_EMAIL_WINDOW_SECONDS)
+login_ip_limiter = build_limiter(LOGIN_RATE_BACKEND, "loginrl:ip", LOGIN_IP_MAX_FAILURES, LOGIN_IP_WINDOW_SECONDS)
+
+def _login_failed(email: str, ip: str):
+    login_email_limiter.record(email)
+    login_ip_limiter.record(ip)
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Incorrect username or password"
+    )
+
+
 @router.post("/token", response_model=Token)
-def login_for_access_token(
+async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = get_user_by_email(db, form_data.username)
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    """
+    Issue an access token. Throttled and repeated failures are answered before
+    any database query or password hash.
+    """
+    email = form_data.username
+    ip = request.client.host if request.client else "unknown"
+    wait = max(login_email_limiter.retry_after(email), login_ip_limiter.retry_after(ip))
+    if wait:
         raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password"
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts",
+            headers={"Retry-After": str(math.ceil(wait))},
         )
-    token_data = {"sub": user.email, "role": user.role}
+    fingerprint = login_fingerprint(email, form_data.password)
+    if known_failed_login(email, fingerprint):
+        raise _login_failed(email, ip)
+
+    user = await get_user_by_email_async(db, email, fields=LOGIN_FIELDS)
+    if not user:
+        remember_failed_login(email)
+        raise _login_failed(email, ip)
+    valid, new_hash = await password_pool.verify_and_update(form_data.password, user.hashed_password)
+    if not valid:
+        remember_failed_login(email, fingerprint)
+        raise _login_failed(email, ip)
+
+    login_email_limiter.reset(email)
+    if new_hash:
+        await set_password_hash_async(db, user.id, new_hash)
+    token_data = user_token_claims(user)
     access_token = create_access_token(token_data)
+    # The token's first request then checks revocation without a query.
+    remember_token_version(user.id, token_data["ver"])
     return {"access_token": access_token, "token_type": "bearer"}
 
 
@@ -76,14 +127,14 @@ def update_current_user(
     if new_name is None:
         raise HTTPException(status_code=400, detail="Full name field is required")
     
-    # Update the database object
-    user.full_name = new_name
+    # Update the database object (the dependency hands back a read-only snapshot)
+    db_user = db.get(User, user.id)
+    db_user.full_name = new_name
     db.commit()
-    db.refresh(user)
     
     return {
-        "id": user.id,
-        "email": user.email,
-        "role": user.role,
-        "full_name": user.full_name
+        "id": db_user.id,
+        "email": db_user.email,
+        "role": db_user.role,
+        "full_name": db_user.full_name
     }
\ No newline at end of file
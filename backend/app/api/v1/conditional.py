@@ -0,0 +1,71 @@
+﻿# backend/app/api/v1/conditional.py
+"""
+Conditional requests for tasks and items.
+
+ETags are weak and built from the rows' version counters (and, for lists, the
+page metadata), so a route can compare If-None-Match before serializing
+anything and answer 304. If-Match on updates uses the same tags; a write that
+races past the check is still caught by the version counter (StaleDataError,
+answered with 412 in main.py).
+"""
+
+import hashlib
+import json
+from typing import Iterable, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+
+def resource_etag(kind: str, obj) -> str:
+    return f'W/"{kind}-{obj.id}-v{obj.version}"'
+
+def collection_etag(kind: str, objects: Iterable, meta: Optional[dict] = None) -> str:
+    """Tag for a list response: changes when any row, the row set or the metadata does."""
+    digest = hashlib.blake2b(digest_size=16)
+    for obj in objects:
+        digest.update(f"{obj.id}.{obj.version};".encode())
+    if meta:
+        digest.update(json.dumps(meta, sort_keys=True, default=str).encode())
+    return f'W/"{kind}s-{digest.hexdigest()}"'
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """Weak comparison of `etag` against an If-None-Match / If-Match header value."""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """A 304 when If-None-Match already names `etag`; otherwise tag the response and return None."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
+
+def json_bytes(etag: str, body: bytes, encoding: Optional[str] = None) -> Response:
+    """
+    An already serialized JSON body, tagged with `etag` (pair with
+    not_modified). `encoding` names the Content-Encoding of a precompressed body.
+    """
+    headers = {"ETag": etag}
+    if encoding:
+        headers.update({"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def require_match(request: Request, etag: str) -> None:
+    """
+    412 unless If-Match names the current `etag`. Requests without If-Match are
+    unconditional. Comparison is weak: the tags are only ever weak.
+    """
+    header = request.headers.get("if-match")
+    if header is not None and not etag_matches(header, etag):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="resource has changed",
+            headers={"ETag": etag},
+        )
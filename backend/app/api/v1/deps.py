@@ -1,39 +1,161 @@
 ﻿# backend/app/api/v1/deps.py
-from fastapi import Depends, HTTPException, status
+from dataclasses import dataclass
+from typing import AsyncGenerator, Generator, Optional
+from fastapi import Depends, HTTPException, WebSocket, WebSocketException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from backend.app.db.session import get_db
+from starlette.requests import HTTPConnection
+from backend.app.db.session import AsyncSessionLocal, get_db, get_async_db
+from backend.app.db.routing import track_writer, read_session, async_read_session
 from backend.app.core.config import SECRET_KEY, ALGORITHM
-from backend.app.crud.users import get_user_by_email
+from backend.app.crud.users import CACHED_USER_FIELDS, get_user_by_email, get_user_by_email_async, get_cached_user, cache_user, get_token_version_async
 
 # Make this match your auth login/token route in auth router.
 # If your login endpoint is POST /api/v1/auth/login, keep "/api/v1/auth/login" here.
 # If it's different (eg "/api/v1/auth/token"), change it to that path.
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/token")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str | None = payload.get("sub")
         if not email:
-            raise credentials_exception
+            raise _credentials_exception()
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+    return payload
+
+def _ensure_token_current(payload: dict, token_version: int) -> None:
+    # Tokens issued before a password/role/active change carry an older "ver".
+    # Tokens from before "ver" existed expire on their own.
+    if "ver" in payload and payload["ver"] < token_version:
+        raise _credentials_exception()
 
-    # get_user_by_email(db, email) MUST exist and return the ORM User (or None)
-    user = get_user_by_email(db, email)
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """
+    Resolve the bearer token to a read-only CachedUser. The user row is only
+    read from the database on a cache miss.
+    """
+    payload = _decode_token(token)
+    user = get_cached_user(payload["sub"])
     if user is None:
-        raise credentials_exception
+        db_user = get_user_by_email(db, payload["sub"], fields=CACHED_USER_FIELDS)
+        if db_user is None:
+            raise _credentials_exception()
+        user = cache_user(db_user)
+    _ensure_token_current(payload, user.token_version)
     return user
 
-def require_admin(user = Depends(get_current_user)):
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
+    """
+    get_current_user for async def routes: same checks, loaded through AsyncSession.
+    """
+    payload = _decode_token(token)
+    user = get_cached_user(payload["sub"])
+    if user is None:
+        db_user = await get_user_by_email_async(db, payload["sub"], fields=CACHED_USER_FIELDS)
+        if db_user is None:
+            raise _credentials_exception()
+        user = cache_user(db_user)
+    _ensure_token_current(payload, user.token_version)
+    return user
+
+# ----------------- Stateless principal -----------------
+@dataclass(frozen=True)
+class Principal:
+    """The caller as described by their access token's claims."""
+    id: int
+    email: str
+    role: str
+    is_active: bool = True
+
+async def get_principal(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """
+    Authenticate from the token's claims: no user row is loaded. Revocation is
+    checked against users.token_version, normally served from crud.users.token_versions.
+    Tokens issued before the uid/ver claims existed fall back to a user lookup.
+    """
+    return await _principal_from_token(token, db)
+
+async def _principal_from_token(token: str, db: AsyncSession) -> Principal:
+    payload = _decode_token(token)
+    if "uid" not in payload:
+        user = await get_current_user_async(token, db)
+        return Principal(id=user.id, email=user.email, role=user.role, is_active=bool(user.is_active))
+
+    if not payload.get("active", True):
+        raise _credentials_exception()
+    floor = await get_token_version_async(db, payload["uid"])
+    if floor is None:  # the user was deleted
+        raise _credentials_exception()
+    _ensure_token_current(payload, floor)
+    return Principal(id=payload["uid"], email=payload["sub"], role=payload.get("role", "user"), is_active=True)
+
+def _stream_token(connection: HTTPConnection) -> Optional[str]:
+    scheme, _, token = connection.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        return token
+    return connection.query_params.get("access_token")
+
+async def get_stream_principal(connection: HTTPConnection) -> Principal:
+    """
+    get_principal for long-lived streams (SSE and WebSocket). The token may also
+    come as ?access_token=, since EventSource and browser WebSockets cannot set
+    headers. No session is held for the life of the stream: one is only opened,
+    briefly, for tokens that need a user lookup.
+    """
+    token = _stream_token(connection)
+    try:
+        if not token:
+            raise _credentials_exception()
+        async with AsyncSessionLocal() as db:
+            return await _principal_from_token(token, db)
+    except HTTPException:
+        if isinstance(connection, WebSocket):
+            raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION)
+        raise
+
+def _ensure_admin(user):
     # use named HTTP status constant for clarity
     if getattr(user, "role", None) != "admin":
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
     return user
+
+def require_admin(user = Depends(get_current_user)):
+    return _ensure_admin(user)
+
+async def require_admin_async(user = Depends(get_current_user_async)):
+    return _ensure_admin(user)
+
+async def require_admin_principal(principal: Principal = Depends(get_principal)) -> Principal:
+    return _ensure_admin(principal)
+
+# ----------------- Read/write routing -----------------
+# Reads go to the replica unless the caller wrote recently (db.routing).
+def get_write_db(current_user = Depends(get_current_user), db: Session = Depends(get_db)) -> Session:
+    track_writer(db, current_user.id)
+    return db
+
+def get_read_db(current_user = Depends(get_current_user)) -> Generator[Session, None, None]:
+    db = read_session(current_user.id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_write_db(principal: Principal = Depends(get_principal), db: AsyncSession = Depends(get_async_db)) -> AsyncSession:
+    track_writer(db.sync_session, principal.id)
+    return db
+
+async def get_async_read_db(principal: Principal = Depends(get_principal)) -> AsyncGenerator[AsyncSession, None]:
+    async with async_read_session(principal.id) as db:
+        yield db
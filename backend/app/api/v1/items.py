@@ -1,44 +1,97 @@
 ﻿# backend/app/api/v1/items.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from backend.app.db.session import get_db
-from backend.app.schemas.item import ItemCreate, ItemRead, ItemUpdate
-from backend.app.crud.item import create_item, get_items, get_item, update_item, delete_item
-from backend.app.api.v1.deps import get_current_user, require_admin
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from pydantic import TypeAdapter
+from backend.app.schemas.item import ItemCreate, ItemRead, ItemRow, ItemUpdate
+from backend.app.crud.item import CATALOGUE, LIST_FIELDS, item_responses, create_item_async, get_items_async, get_item_async, update_item_async, delete_item_async
+from backend.app.api.v1.deps import Principal, get_principal, require_admin_principal, get_async_write_db
+from backend.app.api.v1.conditional import collection_etag, json_bytes, not_modified, require_match, resource_etag
+from backend.app.core.config import FAST_LIST_RESPONSES, LIST_DESCRIPTION_CHARS, LIST_DEFAULT_VIEW, COMPRESSION_ENABLED, COMPRESSION_MIN_BYTES
+from backend.app.core.compression import negotiate
+from backend.app.crud.projection import as_dicts, parse_fields
+from backend.app.db.routing import async_read_session
 
 router = APIRouter(tags=["items"])
 
+_item_list = TypeAdapter(List[ItemRead])
+_item_rows = TypeAdapter(List[ItemRow])
+_item_one = TypeAdapter(ItemRead)
+
+
+async def _cached_json(request: Request, response: Response, key: str, fill) -> Response:
+    """
+    The cached entry for `key` as a response: 304 when If-None-Match matches,
+    otherwise precompressed (and cached that way) when the client accepts an
+    encoding and the body is big enough to be worth it.
+    """
+    etag, body = await item_responses.get_or_fill(key, fill)
+    cached = not_modified(request, response, etag)
+    if cached:
+        return cached
+    encoding = negotiate(request.headers.get("accept-encoding")) if COMPRESSION_ENABLED and len(body) >= COMPRESSION_MIN_BYTES else None
+    if encoding:
+        etag, body = await item_responses.get_or_fill_encoded(key, fill, encoding)
+    return json_bytes(etag, body, encoding)
+
 
 @router.post("/", response_model=ItemRead)
-def create_new_item(item_in: ItemCreate, db: Session = Depends(get_db), user = Depends(get_current_user)):
-    return create_item(db, owner_id=user.id, item_in=item_in)
+async def create_new_item(item_in: ItemCreate, db: AsyncSession = Depends(get_async_write_db), user: Principal = Depends(get_principal)):
+    return await create_item_async(db, owner_id=user.id, item_in=item_in)
 
 @router.get("/", response_model=List[ItemRead])
-def list_items(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return get_items(db, skip=skip, limit=limit)
+async def list_items(request: Request, response: Response, skip: int = 0, limit: int = 100, fields: Optional[str] = Query(None, description="Comma-separated subset of ItemRead fields to return, e.g. id,title"), view: Optional[str] = Query(None, pattern="^(full|compact)$")):
+    # Same bytes for every caller: served from the response cache, filled from
+    # the replica unless the catalogue changed within the read-your-writes window.
+    try:
+        picked = parse_fields(fields, LIST_FIELDS)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    compact = (view or LIST_DEFAULT_VIEW) == "compact"
+    projected = picked or (LIST_FIELDS if FAST_LIST_RESPONSES or compact else None)
+    truncate = {"description": LIST_DESCRIPTION_CHARS} if compact and "description" in projected else None
+    variant = {"fields": picked, "view": "compact" if compact else None}
+
+    async def fill():
+        async with async_read_session(CATALOGUE) as db:
+            items = await get_items_async(db, skip=skip, limit=limit, fields=projected, description_chars=LIST_DESCRIPTION_CHARS if truncate else None)
+        if projected:
+            body = _item_rows.dump_json(as_dicts(items, projected, truncate))
+        else:
+            body = _item_list.dump_json(_item_list.validate_python(items, from_attributes=True))
+        return collection_etag("item", items, variant if picked or compact else None), body
+
+    return await _cached_json(request, response, f"list:{skip}:{limit}:{','.join(picked or ())}:{'compact' if compact else 'full'}", fill)
 
 @router.get("/{item_id}", response_model=ItemRead)
-def read_item(item_id: int, db: Session = Depends(get_db)):
-    db_item = get_item(db, item_id)
-    if not db_item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    return db_item
+async def read_item(item_id: int, request: Request, response: Response):
+    async def fill():
+        async with async_read_session(CATALOGUE) as db:
+            db_item = await get_item_async(db, item_id)
+        if not db_item:
+            raise HTTPException(status_code=404, detail="Item not found")  # not cached
+        return resource_etag("item", db_item), _item_one.dump_json(_item_one.validate_python(db_item, from_attributes=True))
+
+    return await _cached_json(request, response, f"item:{item_id}", fill)
 
 @router.put("/{item_id}", response_model=ItemRead)
-def edit_item(item_id: int, item_in: ItemUpdate, db: Session = Depends(get_db), user = Depends(get_current_user)):
-    db_item = get_item(db, item_id)
+async def edit_item(item_id: int, item_in: ItemUpdate, request: Request, response: Response, db: AsyncSession = Depends(get_async_write_db), user: Principal = Depends(get_principal)):
+    db_item = await get_item_async(db, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
     # only owner or admin can update
     if db_item.owner_id != user.id and user.role != "admin":
         raise HTTPException(status_code=403, detail="Not permitted")
-    return update_item(db, db_item, item_in)
+    # optimistic concurrency: If-Match must name the current version
+    require_match(request, resource_etag("item", db_item))
+    db_item = await update_item_async(db, db_item, item_in)
+    response.headers["ETag"] = resource_etag("item", db_item)
+    return db_item
 
 @router.delete("/{item_id}", response_model=dict)
-def remove_item(item_id: int, db: Session = Depends(get_db), admin = Depends(require_admin)):
-    db_item = get_item(db, item_id)
+async def remove_item(item_id: int, db: AsyncSession = Depends(get_async_write_db), admin: Principal = Depends(require_admin_principal)):
+    db_item = await get_item_async(db, item_id)
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found")
-    delete_item(db, db_item)
+    await delete_item_async(db, db_item)
     return {"msg": "deleted"}
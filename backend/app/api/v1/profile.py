@@ -1,16 +1,14 @@
 ﻿from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from backend.app.db.session import get_db
-from backend.app.api.v1.deps import get_current_user
+from backend.app.api.v1.deps import get_current_user, get_write_db
 from backend.app.schemas.users import UserRead, UserUpdate
+from backend.app.models.users import User
 
 router = APIRouter()
 
 @router.get("/", response_model=UserRead)
-def get_profile(
-    db: Session = Depends(get_db),
-    current_user = Depends(get_current_user)
-):
+def get_profile(current_user = Depends(get_current_user)):
+    # Served from the authenticated user (the user cache); no session is opened.
     if hasattr(current_user, "id"):
         return current_user
     raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication")
@@ -19,16 +17,17 @@ def get_profile(
 @router.put("/", response_model=UserRead)
 def update_profile(
     user_in: UserUpdate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user = Depends(get_current_user)
 ):
     if not hasattr(current_user, "id"):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication")
 
+    # current_user is a read-only snapshot; edit the row itself.
+    db_user = db.get(User, current_user.id)
     for k, v in user_in.model_dump(exclude_unset=True).items():
-        setattr(current_user, k, v)
+        setattr(db_user, k, v)
 
-    db.add(current_user)
+    db.add(db_user)
     db.commit()
-    db.refresh(current_user)
-    return current_user
+    return db_user
@@ -1,40 +1,232 @@
-﻿from fastapi import APIRouter, Depends, HTTPException, status, Query
+﻿from fastapi import APIRouter, Depends, HTTPException, Request, Response, WebSocket, status, Query
+from fastapi.responses import StreamingResponse
+import anyio
+import csv
+import io
+import json
 from typing import Optional
-from sqlalchemy.orm import Session
-from backend.app.db.session import get_db
-from backend.app.api.v1.deps import get_current_user
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.db.routing import async_read_session
+from backend.app.api.v1.deps import Principal, get_principal, get_stream_principal, get_async_read_db, get_async_write_db
+from backend.app.api.v1.conditional import collection_etag, json_bytes, not_modified, require_match, resource_etag
 from backend.app.schemas import task as task_schemas
 from backend.app.crud import task as crud_task
+from backend.app.crud import task_import
+from backend.app.crud.task_stats import get_task_stats_async
+from backend.app.crud.projection import as_dicts, parse_fields
+from backend.app.core.config import TASK_IMPORT_BATCH_SIZE, TASK_COUNT_STRATEGY, FAST_LIST_RESPONSES, LIST_DESCRIPTION_CHARS, LIST_DEFAULT_VIEW, TASK_EVENTS_HEARTBEAT_SECONDS
 
 router = APIRouter()
 
+_task_page = TypeAdapter(task_schemas.TaskPage)
+
 @router.post("/", response_model=task_schemas.TaskOut, status_code=status.HTTP_201_CREATED)
-def create_task(task_in: task_schemas.TaskCreate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    return crud_task.create_task(db=db, owner_id=current_user.id, task_in=task_in)
+async def create_task(task_in: task_schemas.TaskCreate, db: AsyncSession = Depends(get_async_write_db), current_user: Principal = Depends(get_principal)):
+    return await crud_task.create_task_async(db=db, owner_id=current_user.id, task_in=task_in)
 
 @router.get("/", response_model=task_schemas.PaginatedTasks)
-def read_tasks(q: Optional[str] = Query(None), page: int = Query(1, ge=1), limit: int = Query(20, ge=1, le=100), status: Optional[str] = None, sort: Optional[str] = None, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    items, total = crud_task.list_tasks(db=db, owner_id=current_user.id, q=q, page=page, limit=limit, status=status, sort=sort)
-    return {"data": items, "meta": {"page": page, "limit": limit, "total": total}}
+async def read_tasks(request: Request, response: Response, q: Optional[str] = Query(None), page: int = Query(1, ge=1), limit: int = Query(20, ge=1, le=100), status: Optional[str] = None, sort: Optional[str] = None, mode: str = Query("offset", pattern="^(offset|cursor)$"), cursor: Optional[str] = Query(None), include_total: Optional[bool] = Query(None), count: Optional[str] = Query(None, pattern="^(exact|cached|estimated)$"), fields: Optional[str] = Query(None, description="Comma-separated subset of TaskOut fields to return, e.g. id,title,status,created_at"), view: Optional[str] = Query(None, pattern="^(full|compact)$"), db: AsyncSession = Depends(get_async_read_db), current_user: Principal = Depends(get_principal)):
+    """
+    List the current user's tasks.
+
+    mode=offset (default) pages with `page`; mode=cursor follows meta.next_cursor.
+    include_total defaults per mode: offset pages count unless include_total=false,
+    cursor pages skip the count unless include_total=true.
+    count picks how meta.total is produced (default TASK_COUNT_STRATEGY);
+    meta.total_strategy reports which one did: exact, cached or estimated.
+    Pages carry a weak ETag; If-None-Match with it gets a bodiless 304.
+    With FAST_LIST_RESPONSES the page is read as column rows and serialized
+    straight to bytes; the body is the same as through response_model.
+    fields loads and returns only the named columns (echoed in meta.fields).
+    view=compact reads only the start of each description (see
+    LIST_DESCRIPTION_CHARS) and adds description_truncated; the full text is
+    on GET /tasks/{id}.
+    """
+    try:
+        picked = parse_fields(fields, crud_task.LIST_FIELDS)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    compact = (view or LIST_DEFAULT_VIEW) == "compact"
+    projected = picked or (crud_task.LIST_FIELDS if FAST_LIST_RESPONSES or compact else None)
+    truncate = {"description": LIST_DESCRIPTION_CHARS} if compact and "description" in projected else None
+    description_chars = LIST_DESCRIPTION_CHARS if truncate else None
+    cursor_mode = mode == "cursor" or cursor
+    meta = {"limit": limit} if cursor_mode else {"page": page, "limit": limit}
+    if picked:
+        meta["fields"] = list(picked)
+    if compact:
+        meta["view"] = "compact"
+    with_total = bool(include_total) if cursor_mode else include_total is not False
+    if with_total:
+        meta["total"], meta["total_strategy"] = await crud_task.count_tasks_async(db, current_user.id, q=q, status=status, strategy=count or TASK_COUNT_STRATEGY)
+    if cursor_mode:
+        try:
+            items, meta["next_cursor"], _ = await crud_task.list_tasks_keyset_async(db=db, owner_id=current_user.id, q=q, limit=limit, status=status, sort=sort, cursor=cursor, fields=projected, description_chars=description_chars)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="invalid cursor")
+    else:
+        items, _ = await crud_task.list_tasks_async(db=db, owner_id=current_user.id, q=q, page=page, limit=limit, status=status, sort=sort, with_total=False, fields=projected, description_chars=description_chars)
+    etag = collection_etag("task", items, meta)
+    if projected:
+        return not_modified(request, response, etag) or json_bytes(etag, _task_page.dump_json({"data": as_dicts(items, projected, truncate), "meta": meta}))
+    return not_modified(request, response, etag) or {"data": items, "meta": meta}
+
+# ----------------- Stats -----------------
+@router.get("/stats", response_model=task_schemas.TaskStats)
+async def read_task_stats(days: int = Query(30, ge=1, le=366), db: AsyncSession = Depends(get_async_read_db), current_user: Principal = Depends(get_principal)):
+    """
+    Counts by status, tasks created per UTC day over the last `days` days and
+    the oldest open task, read from the summary tables: the cost does not grow
+    with the number of tasks.
+    """
+    return await get_task_stats_async(db, current_user.id, days=days)
+
+# ----------------- Export -----------------
+def _json_default(value):
+    return value.isoformat()
+
+async def _export_batches(owner_id: int, q: Optional[str], status: Optional[str], sort: Optional[str]):
+    # The response body is produced after the route returns, so the stream owns its session.
+    async with async_read_session(owner_id) as db:
+        async for rows in crud_task.stream_tasks_async(db, owner_id, q=q, status=status, sort=sort):
+            yield rows
+
+async def _ndjson_chunks(batches):
+    async for rows in batches:
+        yield "".join(json.dumps(dict(row._mapping), default=_json_default) + "\n" for row in rows)
+
+async def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(crud_task.EXPORT_COLUMNS)
+    async for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+_EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", _ndjson_chunks),
+    "csv": ("text/csv", _csv_chunks),
+}
+
+@router.get("/export")
+async def export_tasks(format: str = Query("ndjson", pattern="^(ndjson|csv)$"), q: Optional[str] = Query(None), status: Optional[str] = None, sort: Optional[str] = None, current_user: Principal = Depends(get_principal)):
+    """
+    Stream every matching task as NDJSON (one object per line) or CSV, newest
+    first unless sort=created_asc. Filters match GET /tasks.
+    """
+    media_type, chunks = _EXPORT_FORMATS[format]
+    return StreamingResponse(
+        chunks(_export_batches(current_user.id, q, status, sort)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format}"'},
+    )
+
+# ----------------- Change feed -----------------
+async def _sse_events(owner_id: int):
+    async with crud_task.task_events.subscribe(owner_id) as subscription:
+        # Subscribed before the first chunk, so nothing committed after the
+        # client sees the stream open is missed.
+        yield "retry: 3000\n\n"
+        while True:
+            event = await subscription.get(timeout=TASK_EVENTS_HEARTBEAT_SECONDS)
+            # The comment keeps idle connections open through proxies.
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n" if event else ": keepalive\n\n"
+
+@router.get("/stream")
+async def stream_task_events(current_user: Principal = Depends(get_stream_principal)):
+    """
+    Server-Sent Events for the current user's task changes: task.created,
+    task.updated and task.deleted with the task's id and version, sent once
+    committed. A "resync" event means events were skipped (a large batch, an
+    import, or a client that fell behind): reload the list. The WebSocket on
+    the same path sends the same events as JSON messages.
+    """
+    return StreamingResponse(
+        _sse_events(current_user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def _cancel_on_disconnect(websocket: WebSocket, scope: anyio.CancelScope):
+    # Clients send nothing; reading is how a close is noticed while idle.
+    while (await websocket.receive())["type"] != "websocket.disconnect":
+        pass
+    scope.cancel()
+
+@router.websocket("/stream")
+async def stream_task_events_ws(websocket: WebSocket, current_user: Principal = Depends(get_stream_principal)):
+    async with crud_task.task_events.subscribe(current_user.id) as subscription:
+        await websocket.accept()
+        async with anyio.create_task_group() as group:
+            group.start_soon(_cancel_on_disconnect, websocket, group.cancel_scope)
+            while True:
+                await websocket.send_json(await subscription.get())
+
+# ----------------- Import -----------------
+@router.post("/import")
+async def import_tasks(request: Request, format: str = Query("ndjson", pattern="^(ndjson|csv)$"), batch_size: int = Query(TASK_IMPORT_BATCH_SIZE, ge=1, le=task_schemas.TASK_BULK_MAX_ITEMS), db: AsyncSession = Depends(get_async_write_db), current_user: Principal = Depends(get_principal)):
+    """
+    Import tasks from a raw NDJSON or CSV request body (CSV needs a header row
+    with a title column). The body is parsed as it arrives and committed every
+    batch_size rows; invalid rows are skipped and reported by line number.
+    """
+    try:
+        return await task_import.import_tasks_async(db, current_user.id, request.stream(), fmt=format, batch_size=batch_size)
+    except task_import.ImportFormatError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+# Bulk routes are declared before /{task_id} so "bulk" is never read as an id.
+@router.post("/bulk", response_model=task_schemas.TaskBulkCreated, status_code=status.HTTP_201_CREATED)
+async def create_tasks_bulk(batch: task_schemas.TaskBulkCreate, db: AsyncSession = Depends(get_async_write_db), current_user: Principal = Depends(get_principal)):
+    """Create up to TASK_BULK_MAX_ITEMS tasks in one transaction; `data` follows input order."""
+    tasks = await crud_task.create_tasks_bulk_async(db=db, owner_id=current_user.id, tasks_in=batch.items)
+    return {"data": tasks, "meta": {"created": len(tasks)}}
+
+@router.patch("/bulk", response_model=task_schemas.TaskBulkResults)
+async def update_tasks_bulk(batch: task_schemas.TaskBulkUpdate, db: AsyncSession = Depends(get_async_write_db), current_user: Principal = Depends(get_principal)):
+    """Partially update many tasks in one transaction, with a per-row result."""
+    updated = await crud_task.update_tasks_bulk_async(db=db, owner_id=current_user.id, updates=batch.items)
+    data = [
+        {"id": item.id, "result": "updated", "task": updated[item.id]} if item.id in updated
+        else {"id": item.id, "result": "not_found"}
+        for item in batch.items
+    ]
+    return {"data": data, "meta": {"updated": len(updated), "not_found": len(data) - len(updated)}}
+
+@router.delete("/bulk", response_model=task_schemas.TaskBulkResults)
+async def delete_tasks_bulk(batch: task_schemas.TaskBulkDelete, db: AsyncSession = Depends(get_async_write_db), current_user: Principal = Depends(get_principal)):
+    """Delete many tasks in one statement, with a per-row result."""
+    deleted = await crud_task.delete_tasks_bulk_async(db=db, owner_id=current_user.id, ids=batch.ids)
+    data = [{"id": task_id, "result": "deleted" if task_id in deleted else "not_found"} for task_id in batch.ids]
+    return {"data": data, "meta": {"deleted": len(deleted), "not_found": sum(row["result"] == "not_found" for row in data)}}
 
 @router.get("/{task_id}", response_model=task_schemas.TaskOut)
-def read_task(task_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    task = crud_task.get_task(db, task_id)
+async def read_task(task_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_read_db), current_user: Principal = Depends(get_principal)):
+    task = await crud_task.get_task_async(db, task_id)
     if not task or task.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="task not found")
-    return task
+    return not_modified(request, response, resource_etag("task", task)) or task
 
 @router.put("/{task_id}", response_model=task_schemas.TaskOut)
-def update_task(task_id: int, task_in: task_schemas.TaskUpdate, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    task = crud_task.get_task(db, task_id)
+async def update_task(task_id: int, task_in: task_schemas.TaskUpdate, request: Request, response: Response, db: AsyncSession = Depends(get_async_write_db), current_user: Principal = Depends(get_principal)):
+    """Replace a task. With If-Match, the update only applies to the version named (412 otherwise)."""
+    task = await crud_task.get_task_async(db, task_id)
     if not task or task.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="task not found")
-    return crud_task.update_task(db=db, task=task, task_in=task_in)
+    require_match(request, resource_etag("task", task))
+    task = await crud_task.update_task_async(db=db, task=task, task_in=task_in)
+    response.headers["ETag"] = resource_etag("task", task)
+    return task
 
 @router.delete("/{task_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_task(task_id: int, db: Session = Depends(get_db), current_user=Depends(get_current_user)):
-    task = crud_task.get_task(db, task_id)
+async def delete_task(task_id: int, db: AsyncSession = Depends(get_async_write_db), current_user: Principal = Depends(get_principal)):
+    task = await crud_task.get_task_async(db, task_id)
     if not task or task.owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="task not found")
-    crud_task.delete_task(db=db, task=task)
+    await crud_task.delete_task_async(db=db, task=task)
     return None
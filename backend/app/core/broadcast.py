@@ -0,0 +1,274 @@
+﻿# backend/app/core/broadcast.py
+"""In-process publish/subscribe for change feeds, with a pluggable fan-out.
+
+A Broadcaster hands each message to the subscribers of its topic (an int,
+e.g. an owner id) in this process. Publishing goes through a fan-out
+backend first: "memory" delivers straight back to this process, "postgres"
+sends a NOTIFY that every worker LISTENing on the channel (this one
+included) delivers to its own subscribers.
+
+Each subscriber reads from a bounded queue. One that falls a full queue
+behind loses its backlog and gets a single RESYNC event instead, so a slow
+consumer never holds up publishers or grows memory without limit. Every
+subscriber gets RESYNC too when the fan-out may have lost messages, e.g.
+after the postgres backend reconnects.
+"""
+
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from backend.app.core.config import ASYNC_SQLALCHEMY_DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# Sent in place of events a subscriber missed: reload instead of patching.
+RESYNC = {"type": "resync"}
+
+# Backoff between attempts to reconnect a lost LISTEN/NOTIFY connection.
+RECONNECT_MIN_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 30.0
+
+
+class Subscription:
+    """One consumer's bounded queue of events."""
+
+    def __init__(self, maxsize: int):
+        self._queue: "asyncio.Queue[dict]" = asyncio.Queue(maxsize)
+        self.overflows = 0
+
+    def put(self, event: dict) -> None:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESYNC)
+            self.overflows += 1
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """The next event, or None when `timeout` seconds pass without one."""
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class LocalFanout:
+    """Delivers in this process only: each worker's subscribers see that worker's commits."""
+    name = "memory"
+
+    async def start(self, deliver: Callable[[str], None], resync: Callable[[], None]) -> None:
+        self._deliver = deliver
+
+    def publish(self, message: str) -> None:
+        self._deliver(message)
+
+    async def stop(self) -> None:
+        pass
+
+
+class PostgresFanout:
+    """
+    LISTEN/NOTIFY on one channel through two asyncpg connections: one listens,
+    one sends. NOTIFY payloads are limited to 8000 bytes, so messages must stay small.
+
+    When either connection drops or a NOTIFY fails, both are reopened with
+    exponential backoff. Anything sent meanwhile is lost, so once reconnected
+    this worker's subscribers are told to resync, and if a NOTIFY of ours was
+    lost an empty notification tells the other workers to resync theirs.
+    """
+    name = "postgres"
+
+    def __init__(self, dsn: str, channel: str, connect: Optional[Callable[[str], Awaitable]] = None):
+        self.dsn = dsn
+        self.channel = channel
+        self.reconnects = 0
+        self._connect = connect
+        self._listener = None
+        self._sender = None
+        self._missed = False    # a NOTIFY of ours was lost since the last reconnect
+        self._supervisor: Optional[asyncio.Task] = None
+        self._pending: Set[asyncio.Task] = set()
+
+    async def start(self, deliver: Callable[[str], None], resync: Callable[[], None]) -> None:
+        if self._connect is None:
+            try:
+                import asyncpg
+            except ImportError as exc:
+                raise RuntimeError("The postgres fan-out backend needs the 'asyncpg' package installed.") from exc
+            self._connect = asyncpg.connect
+        self._deliver = deliver
+        self._resync = resync
+        self._lost = asyncio.Event()
+        self._send_lock = asyncio.Lock()
+        await self._open()
+        self._supervisor = asyncio.ensure_future(self._supervise())
+
+    async def _open(self) -> None:
+        try:
+            self._listener = await self._connect(self.dsn)
+            self._listener.add_termination_listener(self._on_termination)
+            await self._listener.add_listener(self.channel, self._on_notification)
+            self._sender = await self._connect(self.dsn)
+            self._sender.add_termination_listener(self._on_termination)
+        except BaseException:
+            await self._close()
+            raise
+
+    async def _close(self) -> None:
+        # Detach first: the termination callbacks of closing connections are ignored.
+        connections, self._listener, self._sender = (self._listener, self._sender), None, None
+        for connection in connections:
+            if connection is not None:
+                try:
+                    await connection.close(timeout=5)
+                except Exception:
+                    connection.terminate()
+
+    def _on_termination(self, connection) -> None:
+        if connection is self._listener or connection is self._sender:
+            self._lost.set()
+
+    def _on_notification(self, connection, pid: int, channel: str, payload: str) -> None:
+        if payload:
+            self._deliver(payload)
+        elif self._sender is None or pid != self._sender.get_server_pid():
+            self._resync()  # another worker lost a NOTIFY
+
+    async def _supervise(self) -> None:
+        while True:
+            await self._lost.wait()
+            logger.warning("LISTEN/NOTIFY connection on %s lost; reconnecting", self.channel)
+            await self._close()
+            delay = RECONNECT_MIN_SECONDS
+            while True:
+                self._lost.clear()
+                try:
+                    await self._open()
+                    break
+                except Exception:
+                    logger.exception("Reconnecting to %s failed; retrying in %.1fs", self.channel, delay)
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+            self.reconnects += 1
+            self._resync()
+            if self._missed:
+                self._missed = False
+                await self._notify("")
+
+    def publish(self, message: str) -> None:
+        task = asyncio.ensure_future(self._notify(message))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _notify(self, message: str) -> None:
+        try:
+            # One connection runs one statement at a time.
+            async with self._send_lock:
+                if self._sender is None:
+                    raise ConnectionError("not connected")
+                await self._sender.execute("SELECT pg_notify($1, $2)", self.channel, message)
+        except Exception:
+            logger.exception("NOTIFY on %s failed", self.channel)
+            self._missed = True
+            self._lost.set()
+
+    async def stop(self) -> None:
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+            self._supervisor = None
+        for task in list(self._pending):
+            task.cancel()
+        await self._close()
+
+
+def build_fanout(backend: str, channel: str):
+    """Fan-out for the configured backend name ("memory" or "postgres")."""
+    if backend == "memory":
+        return LocalFanout()
+    if backend == "postgres":
+        scheme, _, rest = ASYNC_SQLALCHEMY_DATABASE_URL.partition("://")
+        if not scheme.startswith("postgresql"):
+            raise RuntimeError("The postgres fan-out backend needs a PostgreSQL DATABASE_URL.")
+        return PostgresFanout(f"postgresql://{rest}", channel)
+    raise RuntimeError(f"Unknown fan-out backend: {backend!r}")
+
+
+class Broadcaster:
+    """
+    Topic-keyed fan-out to Subscriptions. Bound to the event loop it is
+    started on; `publish` may be called from any thread.
+    """
+
+    def __init__(self, fanout, queue_size: int = 256):
+        self.fanout = fanout
+        self.queue_size = queue_size
+        self.published = 0
+        self.overflows = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._subscribers: Dict[int, Set[Subscription]] = defaultdict(set)
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        self._loop = loop
+        await self.fanout.start(self._deliver, self._resync)
+
+    async def stop(self) -> None:
+        if self._loop is not None:
+            self._loop = None
+            await self.fanout.stop()
+
+    def publish(self, topic: int, events: List[dict]) -> None:
+        """Send events to topic's subscribers in every process. No-op until started."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        message = json.dumps({"topic": topic, "events": events}, separators=(",", ":"))
+        try:
+            loop.call_soon_threadsafe(self.fanout.publish, message)
+        except RuntimeError:  # the loop closed meanwhile
+            return
+        self.published += 1
+
+    def _deliver(self, message: str) -> None:
+        body = json.loads(message)
+        for subscription in list(self._subscribers.get(body["topic"], ())):
+            for event in body["events"]:
+                subscription.put(event)
+
+    def _resync(self) -> None:
+        """Tell every subscriber to reload: the fan-out may have lost messages."""
+        for subscribers in list(self._subscribers.values()):
+            for subscription in list(subscribers):
+                subscription.put(RESYNC)
+
+    @asynccontextmanager
+    async def subscribe(self, topic: int) -> AsyncIterator[Subscription]:
+        """Receive topic's events from here until the block exits."""
+        await self.start()
+        subscription = Subscription(self.queue_size)
+        self._subscribers[topic].add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._subscribers[topic]
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[topic]
+            self.overflows += subscription.overflows
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.fanout.name,
+            "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            "published": self.published,
+            "overflows": self.overflows + sum(s.overflows for subscribers in self._subscribers.values() for s in subscribers),
+        }
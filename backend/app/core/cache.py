@@ -0,0 +1,197 @@
+﻿# backend/app/core/cache.py
+"""Small key/value caches with an in-process and a Redis-protocol backend.
+
+Both backends share one interface (get / set / add / delete / clear / stats) so a
+cache can be switched with configuration alone. Values must be JSON
+serializable for the Redis backend.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from backend.app.core.config import REDIS_URL
+from backend.app.core.metrics import CACHE_LOOKUPS
+
+
+def _weight(value: Any) -> int:
+    return len(value) if isinstance(value, (bytes, str)) else 0
+
+
+class TTLCache:
+    """
+    In-process LRU cache with a per-entry time to live. Thread-safe.
+    With maxbytes, bytes/str values also count against a total size budget.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic, name: str = "default", maxbytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hit_metric = CACHE_LOOKUPS.labels(name, "hit")
+        self._miss_metric = CACHE_LOOKUPS.labels(name, "miss")
+
+    # The helpers below expect the caller to hold the lock.
+    def _discard(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._bytes -= _weight(entry[1])
+
+    def _evict_oldest(self) -> None:
+        self._bytes -= _weight(self._data.popitem(last=False)[1][1])
+        self.evictions += 1
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= self._clock():
+                if entry is not None:
+                    self._discard(key)
+                self.misses += 1
+                self._miss_metric.inc()
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            self._hit_metric.inc()
+            return entry[1]
+
+    def _store(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        self._discard(key)
+        self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._bytes += _weight(value)
+        while len(self._data) > self.maxsize:
+            self._evict_oldest()
+        # never evicts the entry just set, even if it alone is over budget
+        while self.maxbytes is not None and self._bytes > self.maxbytes and len(self._data) > 1:
+            self._evict_oldest()
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """set() only if key holds no live entry; True when stored."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] > self._clock():
+                return False
+            self._store(key, value, ttl)
+            return True
+
+    def delete(self, *keys: str) -> None:
+        with self._lock:
+            for key in keys:
+                self._discard(key)
+
+    def clear(self) -> None:
+        """Drop every entry and reset the statistics."""
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "memory",
+            "size": len(self._data),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+class RedisCache:
+    """
+    Cache stored in Redis (or anything speaking its protocol, e.g. fakeredis).
+    Expiry uses Redis TTLs; LRU eviction is the server's maxmemory-policy.
+    Hit/miss counters are per process. With raw=True values are bytes stored
+    as they are instead of JSON.
+    """
+
+    def __init__(self, client, prefix: str, ttl: float = 60.0, raw: bool = False):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+        self.raw = raw
+        self.hits = 0
+        self.misses = 0
+        self._hit_metric = CACHE_LOOKUPS.labels(prefix, "hit")
+        self._miss_metric = CACHE_LOOKUPS.labels(prefix, "miss")
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self._key(key))
+        if raw is None:
+            self.misses += 1
+            self._miss_metric.inc()
+            return None
+        self.hits += 1
+        self._hit_metric.inc()
+        return raw if self.raw else json.loads(raw)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        seconds = self.ttl if ttl is None else ttl
+        self.client.set(self._key(key), value if self.raw else json.dumps(value), px=max(1, int(seconds * 1000)))
+
+    def add(self, key: str, value: Any, ttl: Optional[float] = None) -> bool:
+        """set() only if key is absent (SET NX); True when stored."""
+        seconds = self.ttl if ttl is None else ttl
+        return bool(self.client.set(self._key(key), value if self.raw else json.dumps(value), px=max(1, int(seconds * 1000)), nx=True))
+
+    def delete(self, *keys: str) -> None:
+        if keys:
+            self.client.delete(*(self._key(key) for key in keys))
+
+    def clear(self) -> None:
+        """Drop every key under the prefix and reset this process's statistics."""
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": "redis",
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+        }
+
+
+def redis_client():
+    """Client for REDIS_URL. The redis package is only needed when a Redis backend is configured."""
+    if not REDIS_URL:
+        raise RuntimeError("REDIS_URL is required for the redis cache backend.")
+    try:
+        import redis
+    except ImportError as exc:
+        raise RuntimeError("The redis cache backend needs the 'redis' package installed.") from exc
+    return redis.Redis.from_url(REDIS_URL)
+
+
+def build_cache(backend: str, prefix: str, maxsize: int, ttl: float, raw: bool = False, maxbytes: Optional[int] = None):
+    """
+    Cache for the configured backend name ("memory" or "redis"). raw=True
+    stores bytes values without JSON; maxbytes bounds the memory backend only
+    (Redis relies on its own maxmemory).
+    """
+    if backend == "memory":
+        return TTLCache(maxsize=maxsize, ttl=ttl, name=prefix, maxbytes=maxbytes)
+    if backend == "redis":
+        return RedisCache(redis_client(), prefix=prefix, ttl=ttl, raw=raw)
+    raise RuntimeError(f"Unknown cache backend: {backend!r}")
@@ -0,0 +1,139 @@
+﻿# backend/app/core/compression.py
+"""
+Response compression: gzip, plus brotli ("br") when the optional `brotli`
+package is installed.
+
+CompressionMiddleware negotiates Accept-Encoding, sends bodies under
+COMPRESSION_MIN_BYTES as they are, and compresses streaming bodies chunk by
+chunk, flushing each chunk so the client keeps receiving data while it is
+produced. Responses that already carry Content-Encoding (precompressed cache
+entries, see ResponseCache.get_or_fill_encoded) pass through untouched.
+"""
+
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from backend.app.core.config import COMPRESSION_MIN_BYTES, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+# Server preference, best first.
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+# Server-sent events must reach the client as each event is written; a
+# compressor (and buffering proxies that see Content-Encoding) would hold them.
+UNCOMPRESSED_TYPES = ("text/event-stream",)
+# Precompressed bodies are compressed once and sent many times, so they get
+# slower, denser settings than responses compressed per request.
+_PRECOMPRESS_LEVELS = {"gzip": 9, "br": 9}
+
+
+class _GzipStream:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush()
+
+class _BrotliStream:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+def _open(encoding: str, precompress: bool = False):
+    if encoding == "br":
+        return _BrotliStream(_PRECOMPRESS_LEVELS["br"] if precompress else COMPRESSION_BROTLI_QUALITY)
+    return _GzipStream(_PRECOMPRESS_LEVELS["gzip"] if precompress else COMPRESSION_GZIP_LEVEL)
+
+def compress(data: bytes, encoding: str, precompress: bool = False) -> bytes:
+    return _open(encoding, precompress).finish(data)
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """The preferred encoding among ENCODINGS that Accept-Encoding allows (q > 0), or None."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    best = max(ENCODINGS, key=lambda name: weights.get(name, weights.get("*", 0.0)))
+    return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
+
+def compressible(headers: Headers, status: int) -> bool:
+    return (
+        status not in (204, 304)
+        and "content-encoding" not in headers
+        and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+        and not headers.get("content-type", "").startswith(UNCOMPRESSED_TYPES)
+    )
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing JSON, NDJSON and text responses, streamed or not."""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None    # response start, held back until the first body chunk
+        stream = None   # compressor, once the response is being compressed
+
+        async def send_compressed(message):
+            nonlocal start, stream
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+            body, more = message.get("body", b""), message.get("more_body", False)
+            if start is not None:
+                first, start = start, None
+                headers = MutableHeaders(scope=first)
+                # A single small chunk is not worth compressing; a streamed body
+                # is compressed whatever the size of its first chunk.
+                if not compressible(headers, first["status"]) or (not more and len(body) < self.minimum_size):
+                    await send(first)
+                    return await send(message)
+                stream = _open(encoding)
+                body = stream.chunk(body) if more else stream.finish(body)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if more:
+                    del headers["Content-Length"]
+                else:
+                    headers["Content-Length"] = str(len(body))
+                await send(first)
+                return await send({"type": "http.response.body", "body": body, "more_body": more})
+            if stream is not None:
+                body = stream.chunk(body) if more else stream.finish(body)
+                message = {"type": "http.response.body", "body": body, "more_body": more}
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
@@ -14,3 +14,119 @@ SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
 
 if not SQLALCHEMY_DATABASE_URL:
     raise RuntimeError("DATABASE_URL is missing. Check your .env file location.")
+
+# Connection pool (both engines). DB_POOL_RECYCLE=-1 never recycles. With
+# DB_POOL_PRE_PING off, a dead connection surfaces as an error on first use
+# instead of costing a round trip on every checkout.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# Fast fail: wait at most DB_POOL_FAST_FAIL_TIMEOUT for a connection, then answer 503.
+DB_POOL_FAST_FAIL = os.getenv("DB_POOL_FAST_FAIL", "").lower() in ("1", "true", "yes")
+DB_POOL_FAST_FAIL_TIMEOUT = float(os.getenv("DB_POOL_FAST_FAIL_TIMEOUT", "0.25"))
+
+# Async driver URL for the AsyncSession stack (db.session.async_engine).
+# Derived from DATABASE_URL unless ASYNC_DATABASE_URL is set explicitly.
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+_scheme, _, _rest = SQLALCHEMY_DATABASE_URL.partition("://")
+ASYNC_SQLALCHEMY_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    f"{_ASYNC_DRIVERS.get(_scheme, _scheme)}://{_rest}",
+)
+
+# Read replica for GET routes (db.routing). Unset: every read goes to the primary.
+# Reads by a user stay on the primary for READ_YOUR_WRITES_SECONDS after their
+# own commit, so replication lag never hides a write from its author.
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+ASYNC_REPLICA_DATABASE_URL = os.getenv("ASYNC_REPLICA_DATABASE_URL")
+if REPLICA_DATABASE_URL and not ASYNC_REPLICA_DATABASE_URL:
+    _scheme, _, _rest = REPLICA_DATABASE_URL.partition("://")
+    ASYNC_REPLICA_DATABASE_URL = f"{_ASYNC_DRIVERS.get(_scheme, _scheme)}://{_rest}"
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Shared Redis (caches, rate limits). Only required when a redis backend is selected.
+REDIS_URL = os.getenv("REDIS_URL")
+
+# Authenticated-user cache used by get_current_user ("memory" or "redis").
+USER_CACHE_BACKEND = os.getenv("USER_CACHE_BACKEND", "memory")
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+
+# Password hashing. Hashes below BCRYPT_ROUNDS are upgraded on the next login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt runs in a separate process pool; requests beyond workers + queue depth get a 503.
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_POOL_QUEUE_DEPTH = int(os.getenv("PASSWORD_POOL_QUEUE_DEPTH", "32"))
+
+# /auth/token throttling: failed attempts per email and per client IP over a
+# sliding window ("memory" or "redis"), plus a short-lived cache of failed
+# email/password pairs and unknown emails.
+LOGIN_RATE_BACKEND = os.getenv("LOGIN_RATE_BACKEND", USER_CACHE_BACKEND)
+LOGIN_EMAIL_MAX_FAILURES = int(os.getenv("LOGIN_EMAIL_MAX_FAILURES", "5"))
+LOGIN_EMAIL_WINDOW_SECONDS = float(os.getenv("LOGIN_EMAIL_WINDOW_SECONDS", "300"))
+LOGIN_IP_MAX_FAILURES = int(os.getenv("LOGIN_IP_MAX_FAILURES", "50"))
+LOGIN_IP_WINDOW_SECONDS = float(os.getenv("LOGIN_IP_WINDOW_SECONDS", "300"))
+LOGIN_NEGATIVE_CACHE_SECONDS = float(os.getenv("LOGIN_NEGATIVE_CACHE_SECONDS", "60"))
+
+# Where recent writers are remembered ("memory" or "redis"; use redis with several workers).
+READ_YOUR_WRITES_BACKEND = os.getenv("READ_YOUR_WRITES_BACKEND", USER_CACHE_BACKEND)
+
+# Serialized responses of the public item routes ("memory" or "redis"). The
+# byte budget applies to the memory backend; size Redis with maxmemory. A cold
+# key is filled by one request while the others wait up to ITEM_CACHE_LOCK_SECONDS.
+ITEM_CACHE_BACKEND = os.getenv("ITEM_CACHE_BACKEND", USER_CACHE_BACKEND)
+ITEM_CACHE_TTL_SECONDS = float(os.getenv("ITEM_CACHE_TTL_SECONDS", "60"))
+ITEM_CACHE_MAX_ENTRIES = int(os.getenv("ITEM_CACHE_MAX_ENTRIES", "1024"))
+ITEM_CACHE_MAX_BYTES = int(os.getenv("ITEM_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+ITEM_CACHE_LOCK_SECONDS = float(os.getenv("ITEM_CACHE_LOCK_SECONDS", "5"))
+
+# meta.total on GET /tasks: "exact" (COUNT every page), "cached" (per owner and
+# filter, dropped when the owner's tasks change) or "estimated" (planner row
+# estimate on Postgres; estimates under TASK_COUNT_EXACT_BELOW are counted exactly).
+TASK_COUNT_STRATEGY = os.getenv("TASK_COUNT_STRATEGY", "exact")
+TASK_COUNT_CACHE_BACKEND = os.getenv("TASK_COUNT_CACHE_BACKEND", USER_CACHE_BACKEND)
+TASK_COUNT_CACHE_SECONDS = float(os.getenv("TASK_COUNT_CACHE_SECONDS", "300"))
+TASK_COUNT_CACHE_MAX_ENTRIES = int(os.getenv("TASK_COUNT_CACHE_MAX_ENTRIES", "10000"))
+TASK_COUNT_EXACT_BELOW = int(os.getenv("TASK_COUNT_EXACT_BELOW", "1000"))
+
+# List routes (GET /tasks, GET /items) select plain columns and serialize them
+# straight to JSON bytes instead of loading ORM objects and response models.
+FAST_LIST_RESPONSES = os.getenv("FAST_LIST_RESPONSES", "true").lower() in ("1", "true", "yes")
+# view=compact on the list routes reads and returns at most LIST_DESCRIPTION_CHARS
+# of each description, flagged with description_truncated; the single-resource
+# routes always return the full text. LIST_DEFAULT_VIEW applies when view is omitted.
+LIST_DESCRIPTION_CHARS = int(os.getenv("LIST_DESCRIPTION_CHARS", "200"))
+LIST_DEFAULT_VIEW = os.getenv("LIST_DEFAULT_VIEW", "full")
+
+# Response compression (core.compression): gzip, plus brotli when the optional
+# `brotli` package is installed. Bodies under COMPRESSION_MIN_BYTES go out as
+# they are; the levels trade CPU per response against bytes on the wire.
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+# Task change feed (GET and WebSocket /tasks/stream). "memory" delivers each
+# worker's commits to that worker's subscribers only; "postgres" fans out over
+# LISTEN/NOTIFY so every worker sees every commit. A subscriber that falls
+# TASK_EVENTS_QUEUE_SIZE events behind, or a commit touching more than
+# TASK_EVENTS_MAX_BATCH tasks, gets one "resync" event instead. Idle SSE
+# streams send a comment every TASK_EVENTS_HEARTBEAT_SECONDS.
+TASK_EVENTS_BACKEND = os.getenv("TASK_EVENTS_BACKEND", "memory")
+TASK_EVENTS_QUEUE_SIZE = int(os.getenv("TASK_EVENTS_QUEUE_SIZE", "256"))
+TASK_EVENTS_MAX_BATCH = int(os.getenv("TASK_EVENTS_MAX_BATCH", "100"))
+TASK_EVENTS_HEARTBEAT_SECONDS = float(os.getenv("TASK_EVENTS_HEARTBEAT_SECONDS", "15"))
+
+# Rows inserted (and committed) per batch by POST /tasks/import.
+TASK_IMPORT_BATCH_SIZE = int(os.getenv("TASK_IMPORT_BATCH_SIZE", "1000"))
+
+# Per-request SQL statistics (db.query_stats). A SELECT repeated this many times
+# in one request is reported as an N+1; strict mode raises instead (tests).
+SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "10"))
+SQL_STRICT_N_PLUS_ONE = os.getenv("SQL_STRICT_N_PLUS_ONE", "").lower() in ("1", "true", "yes")
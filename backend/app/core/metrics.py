@@ -0,0 +1,108 @@
+﻿# backend/app/core/metrics.py
+"""Prometheus metrics.
+
+Metrics live in prometheus_client's default registry. When several uvicorn
+workers serve the app, set PROMETHEUS_MULTIPROC_DIR to an empty directory
+shared by the workers (before they start): each process then writes its
+samples to mmap'd files there and /metrics aggregates all of them.
+"""
+
+import os
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+# Label values for the request metrics; anything else is "other" so paths can never blow up cardinality.
+ROUTERS = ("auth", "items", "tasks", "profile", "health")
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by router.",
+    ["router", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "Requests being served.", ["router"], multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Connections checked out of the pool.", ["engine"], multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "db_pool_overflow_connections", "Connections open beyond pool_size.", ["engine"], multiprocess_mode="livesum",
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds", "Time to get a connection from the pool (waiting + pre-ping/connect).",
+    ["engine"], buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts", "Checkouts that gave up waiting for a connection.", ["engine"])
+DB_READ_SESSIONS = Counter("db_read_sessions", "Read-only request sessions by target (primary/replica).", ["target"])
+PASSWORD_HASH_SECONDS = Histogram(
+    "password_hash_seconds", "bcrypt hash/verify time in the password pool.",
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0),
+)
+PASSWORD_QUEUE_WAIT_SECONDS = Histogram(
+    "password_queue_wait_seconds", "Time password work waits for a pool worker.",
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+PASSWORD_POOL_REJECTED = Counter("password_pool_rejected", "Password requests refused with 503.")
+CACHE_LOOKUPS = Counter("cache_lookups", "Cache lookups by cache and result (hit/miss).", ["cache", "result"])
+
+
+def router_label(path: str) -> str:
+    parts = path.split("/")
+    if len(parts) > 3 and parts[1] == "api" and parts[2] == "v1" and parts[3] in ROUTERS:
+        return parts[3]
+    return "other"
+
+
+def observe_pool(label: str, pool) -> None:
+    """Record a pool's checked-out/overflow counts (pools without them, e.g. NullPool, are skipped)."""
+    if hasattr(pool, "checkedout"):
+        DB_POOL_CHECKED_OUT.labels(label).set(pool.checkedout())
+        DB_POOL_OVERFLOW.labels(label).set(max(0, pool.overflow()))
+
+
+def render() -> tuple:
+    """(body, content type) for the /metrics endpoint."""
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead() -> None:
+    """Drop this worker's live gauges from the shared directory on shutdown."""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency and in-flight requests per router."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        router = router_label(scope["path"])
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(router)
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_flight.dec()
+            REQUEST_LATENCY.labels(router, scope["method"], str(status)).observe(time.perf_counter() - started)
@@ -0,0 +1,136 @@
+﻿# backend/app/core/password_pool.py
+"""bcrypt hashing and verification on a bounded process pool.
+
+bcrypt is deliberately slow and holds the GIL, so running it in the request
+thread (or Starlette's threadpool) stalls every other endpoint during a login
+storm. Password work is sent to a small ProcessPoolExecutor instead. At most
+`workers + queue_depth` calls may be in flight; further calls fail fast with
+PasswordPoolBusy, which the app turns into a 503.
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from backend.app.core.config import PASSWORD_POOL_WORKERS, PASSWORD_POOL_QUEUE_DEPTH
+from backend.app.core.metrics import PASSWORD_HASH_SECONDS, PASSWORD_POOL_REJECTED, PASSWORD_QUEUE_WAIT_SECONDS
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the password pool already has its maximum number of calls in flight."""
+
+
+# ----------------- Worker functions (run in the pool processes) -----------------
+def _hash(password: str):
+    from backend.app.core.security import pwd_context
+    started = time.time()
+    clock = time.perf_counter()
+    hashed = pwd_context.hash(password)
+    return hashed, started, time.perf_counter() - clock
+
+
+def _verify_and_update(password: str, hashed: str):
+    from backend.app.core.security import pwd_context
+    started = time.time()
+    clock = time.perf_counter()
+    # verify_and_update() consults needs_update() and returns a new hash when
+    # the stored one was made with an outdated scheme or cost factor.
+    result = pwd_context.verify_and_update(password, hashed)
+    return result, started, time.perf_counter() - clock
+
+
+class _Timing:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count, self.total, self.max = 0, 0.0, 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def stats(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total / self.count * 1000, 2) if self.count else None,
+            "max_ms": round(self.max * 1000, 2),
+        }
+
+
+class PasswordPool:
+    """Process pool for password work with an in-flight limit and timing metrics."""
+
+    def __init__(self, workers: int = PASSWORD_POOL_WORKERS, queue_depth: int = PASSWORD_POOL_QUEUE_DEPTH):
+        self.workers = max(1, workers)
+        self.limit = self.workers + max(0, queue_depth)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = 0
+        self.queue_wait = _Timing()
+        self.hash_time = _Timing()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Started lazily; "spawn" so workers do not inherit the server's threads and sockets.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.in_flight >= self.limit:
+                self.rejected += 1
+                PASSWORD_POOL_REJECTED.inc()
+                raise PasswordPoolBusy()
+            self.in_flight += 1
+            executor = self._get_executor()
+        submitted = time.time()
+        try:
+            result, started, elapsed = await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+        waited = max(0.0, started - submitted)
+        self.queue_wait.add(waited)
+        self.hash_time.add(elapsed)
+        PASSWORD_QUEUE_WAIT_SECONDS.observe(waited)
+        PASSWORD_HASH_SECONDS.observe(elapsed)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(valid, new_hash); new_hash is set when the stored hash should be replaced."""
+        return await self._run(_verify_and_update, password, hashed)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "queue_wait": self.queue_wait.stats(),
+            "hash_time": self.hash_time.stats(),
+        }
+
+
+password_pool = PasswordPool()
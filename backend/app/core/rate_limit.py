@@ -0,0 +1,118 @@
+﻿# backend/app/core/rate_limit.py
+"""Sliding-window rate limiters with an in-process and a Redis backend.
+
+A limiter counts events per key over the last `window` seconds. Callers ask
+`retry_after(key)` before doing any work (0 means allowed, otherwise the
+seconds until the oldest event leaves the window) and `record(key)` for each
+event that should count against the key.
+"""
+
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable
+
+from backend.app.core.cache import redis_client
+
+
+class SlidingWindowLimiter:
+    """In-process limiter. Tracks at most `maxkeys` keys (least recently used are dropped). Thread-safe."""
+
+    def __init__(self, limit: int, window: float, maxkeys: int = 100_000, clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.window = window
+        self.maxkeys = maxkeys
+        self._clock = clock
+        self._events: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _prune(self, key: str, now: float):
+        events = self._events.get(key)
+        if events is None:
+            return None
+        while events and events[0] <= now - self.window:
+            events.popleft()
+        if not events:
+            del self._events[key]
+            return None
+        return events
+
+    def retry_after(self, key: str) -> float:
+        now = self._clock()
+        with self._lock:
+            events = self._prune(key, now)
+            if events is None or len(events) < self.limit:
+                return 0.0
+            return max(0.0, events[-self.limit] + self.window - now)
+
+    def record(self, key: str) -> None:
+        now = self._clock()
+        with self._lock:
+            events = self._prune(key, now)
+            if events is None:
+                events = self._events[key] = deque()
+            events.append(now)
+            self._events.move_to_end(key)
+            while len(self._events) > self.maxkeys:
+                self._events.popitem(last=False)
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._events.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._events.clear()
+
+
+class RedisSlidingWindowLimiter:
+    """Limiter shared by every worker: one sorted set of event timestamps per key."""
+
+    def __init__(self, client, prefix: str, limit: int, window: float, clock: Callable[[], float] = time.time):
+        self.client = client
+        self.prefix = prefix
+        self.limit = limit
+        self.window = window
+        self._clock = clock
+        self._seq = itertools.count()
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    def retry_after(self, key: str) -> float:
+        now = self._clock()
+        rkey = self._key(key)
+        pipe = self.client.pipeline()
+        pipe.zremrangebyscore(rkey, 0, now - self.window)
+        pipe.zrevrange(rkey, self.limit - 1, self.limit - 1, withscores=True)
+        _, nth = pipe.execute()
+        if not nth:
+            return 0.0
+        return max(0.0, nth[0][1] + self.window - now)
+
+    def record(self, key: str) -> None:
+        now = self._clock()
+        rkey = self._key(key)
+        pipe = self.client.pipeline()
+        pipe.zadd(rkey, {f"{now}:{os.getpid()}:{next(self._seq)}": now})
+        pipe.expire(rkey, int(self.window) + 1)
+        pipe.execute()
+
+    def reset(self, key: str) -> None:
+        self.client.delete(self._key(key))
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+def build_limiter(backend: str, prefix: str, limit: int, window: float):
+    """Limiter for the configured backend name ("memory" or "redis")."""
+    if backend == "memory":
+        return SlidingWindowLimiter(limit=limit, window=window)
+    if backend == "redis":
+        return RedisSlidingWindowLimiter(redis_client(), prefix=prefix, limit=limit, window=window)
+    raise RuntimeError(f"Unknown rate limit backend: {backend!r}")
@@ -0,0 +1,126 @@
+﻿# backend/app/core/response_cache.py
+"""Cache of serialized responses (ETag + JSON bytes) with stampede protection.
+
+Entries live in a core.cache backend under the current generation; `invalidate`
+starts a new generation, which orphans every entry at once (they age out with
+the TTL). A miss is filled by a single caller: concurrent requests for the same
+key in this process await that fill, and with the Redis backend a short lock
+key keeps other processes from filling it too.
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from backend.app.core.compression import compress
+
+Entry = Tuple[str, bytes]  # (etag, body)
+
+
+def _pack(entry: Entry) -> bytes:
+    etag, body = entry
+    return etag.encode() + b"\n" + body
+
+def _unpack(raw: bytes) -> Entry:
+    etag, _, body = raw.partition(b"\n")
+    return etag.decode(), body
+
+def _text(value) -> str:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+class ResponseCache:
+    def __init__(self, backend, lock_seconds: float = 5.0, poll_seconds: float = 0.02):
+        self.backend = backend
+        self.lock_seconds = lock_seconds
+        self.poll_seconds = poll_seconds
+        self.fills = 0
+        self._inflight: Dict[str, "asyncio.Future[Entry]"] = {}
+
+    def _generation(self) -> str:
+        generation = self.backend.get("gen")
+        if generation is None:
+            generation = uuid.uuid4().hex
+            self.backend.set("gen", generation)
+        return _text(generation)
+
+    def invalidate(self) -> None:
+        self.backend.set("gen", uuid.uuid4().hex)
+
+    def clear(self) -> None:
+        self.backend.clear()
+        self.fills = 0
+
+    def _get(self, key: str) -> Optional[Entry]:
+        raw = self.backend.get(key)
+        return _unpack(raw) if raw is not None else None
+
+    async def get_or_fill(self, key: str, fill: Callable[[], Awaitable[Entry]]) -> Entry:
+        """
+        The cached (etag, body) for `key`, calling `fill` on a miss. The
+        generation is read first, so a fill racing an invalidation is stored
+        under the old generation and never served.
+        """
+        key = f"{self._generation()}:{key}"
+        entry = self._get(key)
+        if entry is not None:
+            return entry
+        pending = self._inflight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        pending = asyncio.get_running_loop().create_future()
+        self._inflight[key] = pending
+        try:
+            entry = await self._fill_once(key, fill)
+        except BaseException as exc:
+            pending.set_exception(exc)
+            pending.exception()  # waiters re-raise it; do not log it as unretrieved
+            raise
+        else:
+            pending.set_result(entry)
+            return entry
+        finally:
+            del self._inflight[key]
+
+    async def get_or_fill_encoded(self, key: str, fill: Callable[[], Awaitable[Entry]], encoding: str) -> Entry:
+        """
+        get_or_fill with the body compressed with `encoding`. The compressed
+        copy is cached next to the plain one, so a hot entry is compressed
+        once per generation, not once per response. It is made from a fresh
+        get_or_fill of the plain entry, which reads the generation again.
+        """
+        async def fill_encoded():
+            etag, body = await self.get_or_fill(key, fill)
+            return etag, compress(body, encoding, precompress=True)
+
+        return await self.get_or_fill(f"{key}:{encoding}", fill_encoded)
+
+    async def _fill_once(self, key: str, fill: Callable[[], Awaitable[Entry]]) -> Entry:
+        client = getattr(self.backend, "client", None)
+        if client is None:
+            return await self._fill(key, fill)
+        # Shared backend: one process fills, the others poll for its result.
+        lock = f"{self.backend.prefix}:lock:{key}"
+        if client.set(lock, b"1", nx=True, px=max(1, int(self.lock_seconds * 1000))):
+            try:
+                return await self._fill(key, fill)
+            finally:
+                client.delete(lock)
+        deadline = time.monotonic() + self.lock_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_seconds)
+            entry = self._get(key)
+            if entry is not None:
+                return entry
+        return await self._fill(key, fill)  # the lock holder died or is too slow
+
+    async def _fill(self, key: str, fill: Callable[[], Awaitable[Entry]]) -> Entry:
+        entry = await fill()
+        self.fills += 1
+        self.backend.set(key, _pack(entry))
+        return entry
+
+    def stats(self) -> dict:
+        return dict(self.backend.stats(), fills=self.fills)
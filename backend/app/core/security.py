@@ -1,11 +1,14 @@
 ﻿# backend/app/core/security.py
+import hashlib
+import hmac
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt
-from backend.app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES
+from backend.app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, BCRYPT_ROUNDS
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min_rounds makes needs_update() flag hashes made with a lower cost factor.
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS, bcrypt__min_rounds=BCRYPT_ROUNDS)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
@@ -19,3 +22,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
+
+def user_token_claims(user) -> dict:
+    """
+    Claims for a user's access token. Everything the hot-path Principal
+    dependency needs is in the token, so it never has to load the user row.
+    """
+    return {
+        "sub": user.email,
+        "uid": user.id,
+        "role": user.role,
+        "active": bool(user.is_active),
+        "ver": user.token_version or 0,
+    }
+
+def login_fingerprint(email: str, password: str) -> str:
+    """Keyed digest of a login attempt, so failed attempts can be cached without storing passwords."""
+    return hmac.new(SECRET_KEY.encode(), f"{email}\0{password}".encode(), hashlib.sha256).hexdigest()
@@ -1,16 +1,38 @@
 ﻿# backend/app/crud/item.py
+from typing import Optional, Sequence
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from backend.app.models.item import Item
 from backend.app.schemas.item import ItemCreate, ItemUpdate
+from backend.app.core.cache import build_cache
+from backend.app.core.config import ITEM_CACHE_BACKEND, ITEM_CACHE_TTL_SECONDS, ITEM_CACHE_MAX_ENTRIES, ITEM_CACHE_MAX_BYTES, ITEM_CACHE_LOCK_SECONDS
+from backend.app.core.response_cache import ResponseCache
+from backend.app.crud.projection import prefix, project
+from backend.app.db.routing import pin_to_primary
 
 def create_item(db: Session, owner_id: int, item_in: ItemCreate):
     db_item = Item(title=item_in.title, description=item_in.description, owner_id=owner_id)
     db.add(db_item)
     db.commit()
-    db.refresh(db_item)
     return db_item
 
-def get_items(db: Session, skip: int = 0, limit: int = 100):
+# Fields a list caller may project: ItemRead's, in its order (the JSON key order).
+LIST_FIELDS = ("title", "description", "id", "owner_id")
+
+def _projected(stmt, fields: Sequence[str], description_chars: Optional[int]):
+    # id and version come along for the ETag
+    overrides = {"description": prefix(Item.description, description_chars)} if description_chars else None
+    return project(stmt, Item, fields, always=("id", "version"), overrides=overrides)
+
+def get_items(db: Session, skip: int = 0, limit: int = 100, fields: Optional[Sequence[str]] = None, description_chars: Optional[int] = None):
+    """
+    A page of items. With `fields` (names from LIST_FIELDS) only those columns
+    are loaded, plus id and version after them, as Row tuples; with
+    description_chars, description is read as a bounded prefix.
+    """
+    if fields:
+        return list(db.execute(_projected(select(Item).offset(skip).limit(limit), fields, description_chars)))
     return db.query(Item).offset(skip).limit(limit).all()
 
 def get_item(db: Session, item_id: int):
@@ -21,9 +43,68 @@ def update_item(db: Session, item: Item, item_in: ItemUpdate):
     item.description = item_in.description
     db.add(item)
     db.commit()
-    db.refresh(item)
     return item
 
 def delete_item(db: Session, item: Item):
     db.delete(item)
     db.commit()
+
+# ----------------- Async variants (AsyncSession) -----------------
+async def create_item_async(db: AsyncSession, owner_id: int, item_in: ItemCreate):
+    db_item = Item(title=item_in.title, description=item_in.description, owner_id=owner_id)
+    db.add(db_item)
+    await db.commit()
+    return db_item
+
+async def get_items_async(db: AsyncSession, skip: int = 0, limit: int = 100, fields: Optional[Sequence[str]] = None, description_chars: Optional[int] = None):
+    stmt = select(Item).offset(skip).limit(limit)
+    if fields:
+        return list(await db.execute(_projected(stmt, fields, description_chars)))
+    result = await db.execute(stmt)
+    return list(result.scalars())
+
+async def get_item_async(db: AsyncSession, item_id: int):
+    return await db.get(Item, item_id)
+
+async def update_item_async(db: AsyncSession, item: Item, item_in: ItemUpdate):
+    item.title = item_in.title
+    item.description = item_in.description
+    db.add(item)
+    await db.commit()
+    return item
+
+async def delete_item_async(db: AsyncSession, item: Item):
+    await db.delete(item)
+    await db.commit()
+
+# ----------------- Response cache -----------------
+# Serialized GET /items responses, identical for every caller. Any committed
+# change to an item (create, update, delete, sync or async) starts a new cache
+# generation and sends catalogue reads to the primary for the read-your-writes
+# window, so a refill cannot capture a replica that has not caught up yet.
+CATALOGUE = "items"
+
+item_responses = ResponseCache(
+    build_cache(
+        ITEM_CACHE_BACKEND, prefix="itemresp", maxsize=ITEM_CACHE_MAX_ENTRIES, ttl=ITEM_CACHE_TTL_SECONDS,
+        raw=True, maxbytes=ITEM_CACHE_MAX_BYTES,
+    ),
+    lock_seconds=ITEM_CACHE_LOCK_SECONDS,
+)
+
+_ITEMS_CHANGED_KEY = "items_changed"
+
+@event.listens_for(Session, "after_flush")
+def _collect_item_changes(session, flush_context):
+    if any(isinstance(obj, Item) for obj in list(session.new) + list(session.dirty) + list(session.deleted)):
+        session.info[_ITEMS_CHANGED_KEY] = True
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_item_responses(session):
+    if session.info.pop(_ITEMS_CHANGED_KEY, False):
+        item_responses.invalidate()
+        pin_to_primary(CATALOGUE)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_item_changes(session):
+    session.info.pop(_ITEMS_CHANGED_KEY, None)
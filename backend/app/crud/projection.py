@@ -0,0 +1,70 @@
+﻿"""Column projections for the crud modules.
+
+A projection loads a chosen subset of a model's columns. Rows come back as
+SQLAlchemy Row tuples (slotted and immutable) instead of identity-mapped
+ORM objects, so large columns that a view does not show are never read.
+Long text columns can also be read as a bounded prefix (`prefix`), with
+as_dicts trimming it and flagging the rows that were cut.
+"""
+
+from typing import Iterable, Mapping, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, func
+
+
+def parse_fields(value: Optional[str], allowed: Sequence[str]) -> Optional[Tuple[str, ...]]:
+    """
+    A `fields=` query value ("id,title") as names from `allowed`, in `allowed`
+    order so equivalent requests share ETags and cache keys. None when the
+    value is absent or blank; ValueError for unknown names.
+    """
+    if not value or not value.strip():
+        return None
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    unknown = sorted(names - set(allowed))
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}; choose from {', '.join(allowed)}")
+    return tuple(name for name in allowed if name in names)
+
+
+def prefix(column, chars: int):
+    """
+    The first `chars` + 1 characters of a text column, under the column's
+    name: the extra character tells as_dicts whether the value was cut.
+    """
+    return func.substr(column, 1, chars + 1).label(column.key)
+
+
+def project(stmt: Select, model, fields: Sequence[str], always: Iterable[str] = (), overrides: Optional[Mapping[str, object]] = None) -> Select:
+    """
+    `stmt` (a select of `model`) returning only `fields`, followed by any
+    `always` columns the caller needs internally (ids for ETags, sort keys
+    for cursors). Filters, joins, ordering and limits are kept. `overrides`
+    maps field names to the SQL expression to select instead (see prefix).
+    """
+    overrides = overrides or {}
+    names = dict.fromkeys((*fields, *always))
+    return stmt.with_only_columns(*(overrides.get(name, getattr(model, name)) for name in names))
+
+
+def as_dicts(rows, fields: Sequence[str], truncate: Optional[Mapping[str, int]] = None) -> list:
+    """
+    Projected rows as dicts of just `fields` (they lead each row). Each
+    field in `truncate` (name -> characters, as selected with prefix) is
+    cut to length and followed by a "<name>_truncated" flag.
+    """
+    if not truncate:
+        return [dict(zip(fields, row)) for row in rows]
+    out = []
+    for row in rows:
+        values = {}
+        for name, value in zip(fields, row):
+            if name in truncate:
+                chars = truncate[name]
+                cut = value is not None and len(value) > chars
+                values[name] = value[:chars] if cut else value
+                values[f"{name}_truncated"] = cut
+            else:
+                values[name] = value
+        out.append(values)
+    return out
@@ -1,13 +1,26 @@
-﻿from typing import Optional, Tuple, List
+﻿import base64
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional, Sequence, Tuple, List, Set
+from uuid import uuid4
+from sqlalchemy import Select, column, delete, event, func, insert, literal_column, select, table, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import ClauseElement, Executable
 from backend.app.models.task import Task
 from backend.app.schemas import task as task_schemas
+from backend.app.core.cache import build_cache
+from backend.app.core.broadcast import RESYNC, Broadcaster, build_fanout
+from backend.app.crud.projection import prefix, project
+from backend.app.core.config import TASK_COUNT_CACHE_BACKEND, TASK_COUNT_CACHE_SECONDS, TASK_COUNT_CACHE_MAX_ENTRIES, TASK_COUNT_EXACT_BELOW
+from backend.app.core.config import TASK_EVENTS_BACKEND, TASK_EVENTS_QUEUE_SIZE, TASK_EVENTS_MAX_BATCH
 
 def create_task(db: Session, owner_id: int, task_in: task_schemas.TaskCreate) -> Task:
     db_task = Task(**task_in.model_dump(), owner_id=owner_id)
     db.add(db_task)
     db.commit()
-    db.refresh(db_task)
     return db_task
 
 def get_task(db: Session, task_id: int) -> Optional[Task]:
@@ -18,28 +31,465 @@ def update_task(db: Session, task: Task, task_in: task_schemas.TaskUpdate) -> Ta
         setattr(task, field, value)
     db.add(task)
     db.commit()
-    db.refresh(task)
     return task
 
 def delete_task(db: Session, task: Task) -> None:
     db.delete(task)
     db.commit()
 
-def list_tasks(db: Session, owner_id: int, q: Optional[str], page: int = 1, limit: int = 20, status: Optional[str] = None, sort: Optional[str] = None) -> Tuple[List[Task], int]:
-    query = db.query(Task).filter(Task.owner_id == owner_id)
-    if q:
+# ----------------- Full-text search -----------------
+class TaskSearch:
+    """
+    Full-text matching over task title + description for one SQL dialect.
+    `match` only filters; `ranked` also orders best matches first.
+    """
+    def owner_filter(self, owner_id: int):
+        return Task.owner_id == owner_id
+
+    def match(self, stmt: Select, q: str) -> Select:
+        raise NotImplementedError
+
+    def ranked(self, stmt: Select, q: str) -> Select:
+        raise NotImplementedError
+
+class PostgresTaskSearch(TaskSearch):
+    """Generated `search_vector` tsvector column with a GIN index."""
+    vector = literal_column("tasks.search_vector")
+
+    def _tsquery(self, q: str):
+        return func.websearch_to_tsquery("english", q)
+
+    def match(self, stmt: Select, q: str) -> Select:
+        return stmt.filter(self.vector.op("@@")(self._tsquery(q)))
+
+    def ranked(self, stmt: Select, q: str) -> Select:
+        return self.match(stmt, q).order_by(func.ts_rank_cd(self.vector, self._tsquery(q)).desc())
+
+class SqliteTaskSearch(TaskSearch):
+    """FTS5 shadow table `tasks_fts` (porter stemming, bm25 rank)."""
+    fts = table("tasks_fts", column("rowid"), column("rank"))
+
+    def owner_filter(self, owner_id: int):
+        # Without statistics SQLite assumes owner_id is selective and walks the
+        # owner's rows probing FTS for each one. Mark it as a weak filter so the
+        # MATCH drives the join instead.
+        return func.likely(Task.owner_id == owner_id)
+
+    def _match_expr(self, q: str):
+        # Quote every term so user input can never be parsed as FTS5 syntax;
+        # the terms are ANDed, as with websearch_to_tsquery.
+        terms = " ".join('"' + term.replace('"', '""') + '"' for term in q.split())
+        return literal_column("tasks_fts").op("MATCH")(terms)
+
+    def match(self, stmt: Select, q: str) -> Select:
+        return stmt.join(self.fts, self.fts.c.rowid == Task.id).filter(self._match_expr(q))
+
+    def ranked(self, stmt: Select, q: str) -> Select:
+        # FTS5's rank column is bm25(): lower is a better match.
+        return self.match(stmt, q).order_by(self.fts.c.rank.asc())
+
+class LikeTaskSearch(TaskSearch):
+    """Fallback for dialects without a search backend: unranked ILIKE."""
+    def match(self, stmt: Select, q: str) -> Select:
         like_q = f"%{q}%"
-        query = query.filter((Task.title.ilike(like_q)) | (Task.description.ilike(like_q)))
+        return stmt.filter((Task.title.ilike(like_q)) | (Task.description.ilike(like_q)))
+
+    def ranked(self, stmt: Select, q: str) -> Select:
+        return self.match(stmt, q)
+
+_SEARCH_BACKENDS = {"postgresql": PostgresTaskSearch(), "sqlite": SqliteTaskSearch()}
+
+def search_backend(db) -> TaskSearch:
+    """Search backend for the session's dialect; works for Session and AsyncSession."""
+    return _SEARCH_BACKENDS.get(db.get_bind().dialect.name, LikeTaskSearch())
+
+def _clean_query(q: Optional[str]) -> Optional[str]:
+    return q.strip() if q and q.strip() else None
+
+# ----------------- List statements (shared by the sync and async paths) -----------------
+def _filtered_stmt(db, owner_id: int, q: Optional[str], status: Optional[str], ranked: bool = False) -> Select:
+    stmt = select(Task)
+    if q:
+        search = search_backend(db)
+        stmt = stmt.filter(search.owner_filter(owner_id))
+        stmt = search.ranked(stmt, q) if ranked else search.match(stmt, q)
+    else:
+        stmt = stmt.filter(Task.owner_id == owner_id)
     if status:
-        query = query.filter(Task.status == status)
-    total = query.count()
-    if sort:
-        if sort == "created_desc":
-            query = query.order_by(Task.created_at.desc())
-        else:
-            query = query.order_by(Task.created_at.asc())
+        stmt = stmt.filter(Task.status == status)
+    return stmt
+
+# Fields a list caller may project: TaskOut's, in its order (the JSON key order).
+LIST_FIELDS = ("title", "description", "status", "id", "owner_id", "created_at", "updated_at")
+# Loaded with every projection: ETags need id and version, cursors need created_at.
+_ALWAYS_LOADED = ("id", "version", "created_at")
+
+def _row_stmt(stmt: Select, fields: Sequence[str], description_chars: Optional[int] = None) -> Select:
+    overrides = {"description": prefix(Task.description, description_chars)} if description_chars else None
+    return project(stmt, Task, fields, always=_ALWAYS_LOADED, overrides=overrides)
+
+def _count_stmt(stmt: Select) -> Select:
+    return stmt.with_only_columns(func.count()).order_by(None)
+
+def _list_stmts(db, owner_id: int, q: Optional[str], page: int, limit: int, status: Optional[str], sort: Optional[str]) -> Tuple[Select, Select]:
+    """(page statement, count statement) for an offset page."""
+    q = _clean_query(q)
+    count = _count_stmt(_filtered_stmt(db, owner_id, q, status))
+    # A search without an explicit sort is ordered by relevance, newest first
+    # among equal ranks.
+    stmt = _filtered_stmt(db, owner_id, q, status, ranked=bool(q and not sort))
+    if sort and sort != "created_desc":
+        stmt = stmt.order_by(Task.created_at.asc(), Task.id.asc())
+    else:
+        stmt = stmt.order_by(Task.created_at.desc(), Task.id.desc())
+    return stmt.offset((page - 1) * limit).limit(limit), count
+
+def list_tasks(db: Session, owner_id: int, q: Optional[str], page: int = 1, limit: int = 20, status: Optional[str] = None, sort: Optional[str] = None, with_total: bool = True, fields: Optional[Sequence[str]] = None, description_chars: Optional[int] = None) -> Tuple[List[Task], Optional[int]]:
+    """
+    One offset page of an owner's tasks and, with with_total, the match count.
+    With `fields` (names from LIST_FIELDS) only those columns are loaded, plus
+    id, version and created_at after them, as Row tuples instead of Tasks.
+    description_chars reads description as a prefix of that many characters
+    plus one (crud.projection.prefix), for list views that truncate it.
+    """
+    stmt, count = _list_stmts(db, owner_id, q, page, limit, status, sort)
+    total = db.execute(count).scalar_one() if with_total else None
+    if fields:
+        return list(db.execute(_row_stmt(stmt, fields, description_chars))), total
+    return list(db.execute(stmt).scalars()), total
+
+def search_tasks(db: Session, owner_id: int, q: str, page: int = 1, limit: int = 20, status: Optional[str] = None, with_total: bool = True) -> Tuple[List[Task], Optional[int]]:
+    """
+    Ranked full-text search over an owner's tasks: best matches first, newest
+    first among equal ranks. Returns (items, total) like list_tasks.
+    """
+    return list_tasks(db, owner_id, q, page=page, limit=limit, status=status, with_total=with_total)
+
+# ----------------- Keyset (cursor) pagination -----------------
+def encode_cursor(task: Task) -> str:
+    """
+    Build an opaque cursor from the (created_at, id) seek key of the last row on a page.
+    """
+    raw = json.dumps([task.created_at.isoformat(), task.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Inverse of encode_cursor. Raises ValueError for anything that is not a cursor we issued.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (TypeError, ValueError) as exc:
+        raise ValueError("invalid cursor") from exc
+
+def _keyset_stmts(db, owner_id: int, q: Optional[str], limit: int, status: Optional[str], sort: Optional[str], cursor: Optional[str]) -> Tuple[Select, Select]:
+    stmt = _filtered_stmt(db, owner_id, _clean_query(q), status)
+    count = _count_stmt(stmt)
+
+    descending = sort is None or sort == "created_desc"
+    seek_key = tuple_(Task.created_at, Task.id)
+    if cursor:
+        created_at, task_id = decode_cursor(cursor)
+        after = tuple_(created_at, task_id)
+        stmt = stmt.filter(seek_key < after if descending else seek_key > after)
+    if descending:
+        stmt = stmt.order_by(Task.created_at.desc(), Task.id.desc())
     else:
-        query = query.order_by(Task.created_at.desc())
-    offset = (page - 1) * limit
-    items = query.offset(offset).limit(limit).all()
-    return items, total
+        stmt = stmt.order_by(Task.created_at.asc(), Task.id.asc())
+    # Fetch one extra row to learn whether another page exists without counting.
+    return stmt.limit(limit + 1), count
+
+def _keyset_page(rows: List[Task], limit: int) -> Tuple[List[Task], Optional[str]]:
+    items = rows[:limit]
+    return items, encode_cursor(items[-1]) if len(rows) > limit else None
+
+def list_tasks_keyset(db: Session, owner_id: int, q: Optional[str], limit: int = 20, status: Optional[str] = None, sort: Optional[str] = None, cursor: Optional[str] = None, with_total: bool = False, fields: Optional[Sequence[str]] = None, description_chars: Optional[int] = None) -> Tuple[List[Task], Optional[str], Optional[int]]:
+    """
+    Seek-based variant of list_tasks. Pages are ordered by (created_at, id) and
+    the next page starts strictly after the last row of the previous one, so
+    the cost of a page does not depend on how deep it is.
+
+    Returns (items, next_cursor, total); next_cursor is None on the last page
+    and total is only computed when with_total is set. `fields` projects as
+    in list_tasks.
+    """
+    stmt, count = _keyset_stmts(db, owner_id, q, limit, status, sort, cursor)
+    total = db.execute(count).scalar_one() if with_total else None
+    result = db.execute(_row_stmt(stmt, fields, description_chars)) if fields else db.execute(stmt).scalars()
+    items, next_cursor = _keyset_page(list(result), limit)
+    return items, next_cursor, total
+
+# ----------------- Totals -----------------
+COUNT_STRATEGIES = ("exact", "cached", "estimated")
+
+# Cached totals are keyed by owner, a per-owner generation and the filters.
+# Committing a change to any of the owner's tasks replaces the generation,
+# which orphans all of that owner's cached totals at once; they age out with the TTL.
+task_counts = build_cache(
+    TASK_COUNT_CACHE_BACKEND, prefix="taskcount", maxsize=TASK_COUNT_CACHE_MAX_ENTRIES, ttl=TASK_COUNT_CACHE_SECONDS,
+)
+
+def _count_generation(owner_id: int) -> str:
+    key = f"gen:{owner_id}"
+    generation = task_counts.get(key)
+    if generation is None:
+        generation = uuid4().hex
+        task_counts.set(key, generation)
+    return generation
+
+def _count_key(owner_id: int, q: Optional[str], status: Optional[str]) -> str:
+    # Read the generation before counting: a write committed meanwhile leaves this entry orphaned.
+    return f"{owner_id}:{_count_generation(owner_id)}:{status or ''}:{q or ''}"
+
+def invalidate_task_counts(*owner_ids: int) -> None:
+    for owner_id in owner_ids:
+        task_counts.set(f"gen:{owner_id}", uuid4().hex)
+
+class _Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) for a select, keeping its bound parameters."""
+    inherit_cache = False
+
+    def __init__(self, stmt: Select):
+        self.stmt = stmt
+
+@compiles(_Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.stmt, **kw)
+
+def _plan_rows(plan) -> int:
+    # psycopg2 decodes the json column, asyncpg returns the text.
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def _can_estimate(db) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+def _check_strategy(strategy: str) -> None:
+    if strategy not in COUNT_STRATEGIES:
+        raise ValueError(f"unknown count strategy: {strategy!r}")
+
+def count_tasks(db: Session, owner_id: int, q: Optional[str] = None, status: Optional[str] = None, strategy: str = "exact") -> Tuple[int, str]:
+    """
+    Number of tasks list_tasks would page through, and the strategy that produced
+    it: "exact", "cached" (a cache hit) or "estimated" (Postgres planner estimate).
+    A cache miss or an estimate below TASK_COUNT_EXACT_BELOW is counted exactly.
+    """
+    _check_strategy(strategy)
+    q = _clean_query(q)
+    stmt = _filtered_stmt(db, owner_id, q, status)
+    key = _count_key(owner_id, q, status) if strategy == "cached" else None
+    if key is not None:
+        cached = task_counts.get(key)
+        if cached is not None:
+            return cached, "cached"
+    if strategy == "estimated" and _can_estimate(db):
+        estimate = _plan_rows(db.execute(_Explain(stmt)).scalar_one())
+        if estimate >= TASK_COUNT_EXACT_BELOW:
+            return estimate, "estimated"
+    total = db.execute(_count_stmt(stmt)).scalar_one()
+    if key is not None:
+        task_counts.set(key, total)
+    return total, "exact"
+
+async def count_tasks_async(db: AsyncSession, owner_id: int, q: Optional[str] = None, status: Optional[str] = None, strategy: str = "exact") -> Tuple[int, str]:
+    """Async count_tasks."""
+    _check_strategy(strategy)
+    q = _clean_query(q)
+    stmt = _filtered_stmt(db, owner_id, q, status)
+    key = _count_key(owner_id, q, status) if strategy == "cached" else None
+    if key is not None:
+        cached = task_counts.get(key)
+        if cached is not None:
+            return cached, "cached"
+    if strategy == "estimated" and _can_estimate(db):
+        estimate = _plan_rows((await db.execute(_Explain(stmt))).scalar_one())
+        if estimate >= TASK_COUNT_EXACT_BELOW:
+            return estimate, "estimated"
+    total = (await db.execute(_count_stmt(stmt))).scalar_one()
+    if key is not None:
+        task_counts.set(key, total)
+    return total, "exact"
+
+# ORM changes to tasks are picked up at flush; Core statements on the tasks
+# table (bulk writes, imports) call mark_task_counts_stale. Either way the
+# cached totals are dropped after commit, not before.
+_STALE_COUNTS_KEY = "stale_task_count_owners"
+
+def mark_task_counts_stale(db, owner_id: int) -> None:
+    """Drop owner_id's cached totals when this session (Session or AsyncSession) commits."""
+    session = getattr(db, "sync_session", db)
+    session.info.setdefault(_STALE_COUNTS_KEY, set()).add(owner_id)
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_task_owners(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Task):
+            session.info.setdefault(_STALE_COUNTS_KEY, set()).add(obj.owner_id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_task_counts(session):
+    owners = session.info.pop(_STALE_COUNTS_KEY, None)
+    if owners:
+        invalidate_task_counts(*owners)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_task_owners(session):
+    session.info.pop(_STALE_COUNTS_KEY, None)
+
+# ----------------- Change feed -----------------
+# Committed task changes are published per owner as {"type": "task.created" |
+# "task.updated" | "task.deleted", "id", "version"} events (GET /tasks/stream).
+# Like the totals above, ORM changes are collected at flush and Core
+# statements record theirs explicitly; events go out after commit only.
+task_events = Broadcaster(build_fanout(TASK_EVENTS_BACKEND, channel="task_events"), queue_size=TASK_EVENTS_QUEUE_SIZE)
+_EVENTS_KEY = "pending_task_events"
+
+def _pending_events(db) -> Dict[int, list]:
+    session = getattr(db, "sync_session", db)
+    return session.info.setdefault(_EVENTS_KEY, defaultdict(list))
+
+def record_task_events(db, owner_id: int, kind: str, rows) -> None:
+    """Publish a "task.<kind>" event for each (id, version) in rows when this session commits."""
+    _pending_events(db)[owner_id].extend({"type": f"task.{kind}", "id": task_id, "version": version} for task_id, version in rows)
+
+def record_task_resync(db, owner_id: int) -> None:
+    """Tell owner_id's subscribers to reload when this session commits, for changes not worth itemizing."""
+    _pending_events(db)[owner_id].append(RESYNC)
+
+@event.listens_for(Session, "after_flush")
+def _collect_task_events(session, flush_context):
+    for kind, objs in (("created", session.new), ("updated", session.dirty), ("deleted", session.deleted)):
+        for obj in objs:
+            if isinstance(obj, Task) and (kind != "updated" or session.is_modified(obj)):
+                record_task_events(session, obj.owner_id, kind, [(obj.id, obj.version)])
+
+@event.listens_for(Session, "after_commit")
+def _publish_task_events(session):
+    pending = session.info.pop(_EVENTS_KEY, None)
+    for owner_id, events in (pending or {}).items():
+        # Large batches would not fit a NOTIFY payload; a reload is cheaper anyway.
+        task_events.publish(owner_id, [RESYNC] if RESYNC in events or len(events) > TASK_EVENTS_MAX_BATCH else events)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_task_events(session):
+    session.info.pop(_EVENTS_KEY, None)
+
+# ----------------- Export -----------------
+EXPORT_COLUMNS = ("id", "title", "description", "status", "created_at", "updated_at")
+
+def _export_stmt(db, owner_id: int, q: Optional[str], status: Optional[str], sort: Optional[str]) -> Select:
+    stmt = _filtered_stmt(db, owner_id, _clean_query(q), status)
+    stmt = stmt.with_only_columns(*(getattr(Task, name) for name in EXPORT_COLUMNS))
+    if sort and sort != "created_desc":
+        return stmt.order_by(Task.created_at.asc(), Task.id.asc())
+    return stmt.order_by(Task.created_at.desc(), Task.id.desc())
+
+# ----------------- Async variants (AsyncSession) -----------------
+async def create_task_async(db: AsyncSession, owner_id: int, task_in: task_schemas.TaskCreate) -> Task:
+    db_task = Task(**task_in.model_dump(), owner_id=owner_id)
+    db.add(db_task)
+    await db.commit()
+    return db_task
+
+async def get_task_async(db: AsyncSession, task_id: int) -> Optional[Task]:
+    return await db.get(Task, task_id)
+
+async def update_task_async(db: AsyncSession, task: Task, task_in: task_schemas.TaskUpdate) -> Task:
+    for field, value in task_in.model_dump(exclude_unset=True).items():
+        setattr(task, field, value)
+    db.add(task)
+    await db.commit()
+    return task
+
+async def delete_task_async(db: AsyncSession, task: Task) -> None:
+    await db.delete(task)
+    await db.commit()
+
+async def list_tasks_async(db: AsyncSession, owner_id: int, q: Optional[str], page: int = 1, limit: int = 20, status: Optional[str] = None, sort: Optional[str] = None, with_total: bool = True, fields: Optional[Sequence[str]] = None, description_chars: Optional[int] = None) -> Tuple[List[Task], Optional[int]]:
+    stmt, count = _list_stmts(db, owner_id, q, page, limit, status, sort)
+    total = (await db.execute(count)).scalar_one() if with_total else None
+    if fields:
+        return list(await db.execute(_row_stmt(stmt, fields, description_chars))), total
+    return list((await db.execute(stmt)).scalars()), total
+
+async def search_tasks_async(db: AsyncSession, owner_id: int, q: str, page: int = 1, limit: int = 20, status: Optional[str] = None, with_total: bool = True) -> Tuple[List[Task], Optional[int]]:
+    return await list_tasks_async(db, owner_id, q, page=page, limit=limit, status=status, with_total=with_total)
+
+async def list_tasks_keyset_async(db: AsyncSession, owner_id: int, q: Optional[str], limit: int = 20, status: Optional[str] = None, sort: Optional[str] = None, cursor: Optional[str] = None, with_total: bool = False, fields: Optional[Sequence[str]] = None, description_chars: Optional[int] = None) -> Tuple[List[Task], Optional[str], Optional[int]]:
+    stmt, count = _keyset_stmts(db, owner_id, q, limit, status, sort, cursor)
+    total = (await db.execute(count)).scalar_one() if with_total else None
+    result = await db.execute(_row_stmt(stmt, fields, description_chars)) if fields else (await db.execute(stmt)).scalars()
+    items, next_cursor = _keyset_page(list(result), limit)
+    return items, next_cursor, total
+
+# ----------------- Bulk writes (one transaction per batch) -----------------
+async def create_tasks_bulk_async(db: AsyncSession, owner_id: int, tasks_in: List[task_schemas.TaskCreate]) -> List[Task]:
+    """
+    Insert a batch with multi-row INSERT ... RETURNING and a single commit.
+    Tasks come back in input order.
+    """
+    rows = [dict(task_in.model_dump(), owner_id=owner_id) for task_in in tasks_in]
+    # SQLite does not promise RETURNING order, and asking SQLAlchemy to enforce
+    # it there degrades to one INSERT per row. Rowids are assigned in VALUES
+    # order, so sorting by id restores input order instead.
+    ordered = db.get_bind().dialect.name != "sqlite"
+    tasks = list(await db.scalars(insert(Task).returning(Task, sort_by_parameter_order=ordered), rows))
+    if not ordered:
+        tasks.sort(key=lambda task: task.id)
+    mark_task_counts_stale(db, owner_id)
+    record_task_events(db, owner_id, "created", [(task.id, task.version) for task in tasks])
+    await db.commit()
+    return tasks
+
+async def update_tasks_bulk_async(db: AsyncSession, owner_id: int, updates: List[task_schemas.TaskBulkUpdateItem]) -> Dict[int, Task]:
+    """
+    Apply partial updates to the owner's tasks in one transaction. Rows changing
+    the same set of fields share one executemany UPDATE by primary key.
+    Returns the updated tasks by id; ids missing from the result were not found.
+    """
+    ids = [item.id for item in updates]
+    # Current versions: the ORM bulk UPDATE checks and bumps them (Task's version counter).
+    owned = dict((await db.execute(select(Task.id, Task.version).filter(Task.owner_id == owner_id, Task.id.in_(ids)))).all())
+    groups = defaultdict(list)
+    for item in updates:
+        values = item.model_dump(exclude_unset=True)
+        if item.id in owned:
+            groups[frozenset(values)].append(dict(values, version=owned[item.id]))
+    for rows in groups.values():
+        await db.execute(update(Task), rows)
+    if groups:
+        mark_task_counts_stale(db, owner_id)
+        # The ORM bulk UPDATE bumps each row's version by one.
+        record_task_events(db, owner_id, "updated", [(row["id"], row["version"] + 1) for rows in groups.values() for row in rows])
+    await db.commit()
+    if not owned:
+        return {}
+    stmt = select(Task).filter(Task.id.in_(list(owned))).execution_options(populate_existing=True)
+    return {task.id: task for task in await db.scalars(stmt)}
+
+async def delete_tasks_bulk_async(db: AsyncSession, owner_id: int, ids: List[int]) -> Set[int]:
+    """
+    Delete the owner's tasks among `ids` with one DELETE ... RETURNING. Returns the deleted ids.
+    """
+    stmt = delete(Task).filter(Task.owner_id == owner_id, Task.id.in_(ids)).returning(Task.id, Task.version)
+    rows = (await db.execute(stmt)).all()
+    deleted = {task_id for task_id, _ in rows}
+    if deleted:
+        mark_task_counts_stale(db, owner_id)
+        record_task_events(db, owner_id, "deleted", rows)
+    await db.commit()
+    return deleted
+
+async def stream_tasks_async(db: AsyncSession, owner_id: int, q: Optional[str] = None, status: Optional[str] = None, sort: Optional[str] = None, batch_size: int = 1000) -> AsyncIterator[list]:
+    """
+    Yield the owner's tasks (EXPORT_COLUMNS rows) in batches of batch_size
+    through a server-side cursor, so memory does not grow with the result.
+    Accepts the same filters as list_tasks.
+    """
+    stmt = _export_stmt(db, owner_id, q, status, sort).execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for rows in result.partitions():
+        yield rows
@@ -0,0 +1,161 @@
+﻿"""Streaming task import (NDJSON / CSV).
+
+The upload is decoded and split into lines incrementally, each row is
+validated with TaskCreate, and valid rows are inserted and committed in
+batches. Memory is bounded by the batch size, MAX_LINE_CHARS and
+MAX_REPORTED_ERRORS, never by the size of the upload.
+"""
+
+import codecs
+import csv
+import json
+from typing import AsyncIterator, Optional
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend.app.models.task import Task
+from backend.app.crud.task import mark_task_counts_stale, record_task_resync
+from backend.app.schemas.task import TaskCreate
+
+MAX_LINE_CHARS = 1_000_000
+MAX_REPORTED_ERRORS = 100
+IMPORT_FIELDS = ("title", "description", "status")
+# A Core insert writes an explicit None as NULL; the ORM would apply the default.
+_NULL_DEFAULTS = {"status": TaskCreate.model_fields["status"].default}
+
+class ImportFormatError(ValueError):
+    """The upload cannot be imported at all (e.g. a CSV without a title column)."""
+
+# ----------------- Parsing -----------------
+async def iter_lines(chunks: AsyncIterator[bytes], max_line: int = MAX_LINE_CHARS) -> AsyncIterator[Optional[str]]:
+    """
+    Decode UTF-8 chunks into lines without a trailing newline. A line longer
+    than max_line is dropped and yields None in its place.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending, overflow = "", False
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *complete, pending = pending.split("\n")
+        for line in complete:
+            yield None if overflow else line.rstrip("\r")
+            overflow = False
+        if len(pending) > max_line:
+            pending, overflow = "", True
+    pending += decoder.decode(b"", final=True)
+    if overflow:
+        yield None
+    elif pending:
+        yield pending.rstrip("\r")
+
+async def ndjson_rows(lines: AsyncIterator[Optional[str]]):
+    """(line number, row dict or error message) for each non-blank line."""
+    number = 0
+    async for line in lines:
+        number += 1
+        if line is None:
+            yield number, "line too long"
+            continue
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield number, f"invalid JSON: {exc.msg}"
+            continue
+        yield number, row if isinstance(row, dict) else "expected a JSON object"
+
+async def csv_rows(lines: AsyncIterator[Optional[str]]):
+    """
+    (line number, row dict or error message) for each CSV record after the
+    header. Quoted fields may span lines; a record is complete once its quotes
+    balance. Empty cells are treated as missing.
+    """
+    header, record, start, number = None, [], 0, 0
+    async for line in lines:
+        number += 1
+        if line is None:
+            record = []
+            yield number, "line too long"
+            continue
+        if not record:
+            start = number
+        record.append(line)
+        if sum(part.count('"') for part in record) % 2:
+            continue
+        text, record = "\n".join(record), []
+        if not text.strip():
+            continue
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as exc:
+            yield start, f"invalid CSV: {exc}"
+            continue
+        if header is None:
+            header = [name.strip() for name in values]
+            if "title" not in header:
+                raise ImportFormatError("CSV header must include a title column")
+            continue
+        yield start, {name: value for name, value in zip(header, values) if name in IMPORT_FIELDS and value != ""}
+    if record:
+        yield start, "unterminated quoted field"
+
+_PARSERS = {"ndjson": ndjson_rows, "csv": csv_rows}
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}" for error in exc.errors())
+
+# ----------------- Import -----------------
+async def import_tasks_async(db: AsyncSession, owner_id: int, chunks: AsyncIterator[bytes], fmt: str = "ndjson", batch_size: int = 1000) -> dict:
+    """
+    Import tasks for owner_id from an uploaded byte stream.
+
+    Valid rows are inserted with one executemany INSERT and committed every
+    batch_size rows, so an interrupted upload keeps the batches already
+    written. Returns {"inserted", "failed", "errors", "errors_truncated"};
+    errors lists the first MAX_REPORTED_ERRORS failures by line number. A
+    batch the database rejects is rolled back and its lines reported as failed.
+    """
+    inserted, failed, errors, batch, batch_lines = 0, 0, [], [], []
+
+    def fail(line: int, error: str):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"line": line, "error": error})
+
+    async def flush():
+        nonlocal inserted
+        if batch:
+            try:
+                # Core insert on the table: a plain executemany, without the ORM's per-row bookkeeping.
+                await db.execute(insert(Task.__table__), batch)
+                mark_task_counts_stale(db, owner_id)
+                record_task_resync(db, owner_id)
+                await db.commit()
+                inserted += len(batch)
+            except SQLAlchemyError as exc:
+                await db.rollback()
+                for line in batch_lines:
+                    fail(line, f"not saved: the database rejected this batch ({type(exc).__name__})")
+            batch.clear()
+            batch_lines.clear()
+
+    async for line, row in _PARSERS[fmt](iter_lines(chunks)):
+        if isinstance(row, dict):
+            try:
+                task_in = TaskCreate(**{name: row[name] for name in IMPORT_FIELDS if name in row})
+                row = dict(task_in.model_dump(), owner_id=owner_id)
+                row.update((name, default) for name, default in _NULL_DEFAULTS.items() if row[name] is None)
+            except ValidationError as exc:
+                row = _validation_message(exc)
+        if isinstance(row, str):
+            fail(line, row)
+            continue
+        batch.append(row)
+        batch_lines.append(line)
+        if len(batch) >= batch_size:
+            await flush()
+    await flush()
+    return {"inserted": inserted, "failed": failed, "errors": errors, "errors_truncated": failed > len(errors)}
@@ -0,0 +1,135 @@
+﻿"""Per-owner task statistics served from the summary tables (models.task_stats).
+
+Reading stats costs the same whatever the number of tasks: two primary-key
+range reads on the summaries and one index seek for the oldest open task.
+check_task_stats recomputes the summaries from tasks and reports differences;
+rebuild_task_stats replaces them with the recomputed values.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.app.models.task import Task
+from backend.app.models.task_stats import TaskDailyCount, TaskStatusCount
+
+
+def _today() -> date:
+    return datetime.now(timezone.utc).date()
+
+def _oldest_open_stmt(owner_id: int):
+    # Served by ix_tasks_owner_status_created_id.
+    return (
+        select(Task)
+        .filter(Task.owner_id == owner_id, Task.status == "open")
+        .order_by(Task.created_at.asc(), Task.id.asc())
+        .limit(1)
+    )
+
+async def get_task_stats_async(db: AsyncSession, owner_id: int, days: int = 30, today: Optional[date] = None) -> dict:
+    """
+    Counts by status, tasks created per UTC day over the last `days` days
+    (zero-filled, oldest first) and the oldest open task.
+    """
+    today = today or _today()
+    since = today - timedelta(days=days - 1)
+    by_status = {
+        status: count
+        for status, count in await db.execute(
+            select(TaskStatusCount.status, TaskStatusCount.count)
+            .filter(TaskStatusCount.owner_id == owner_id, TaskStatusCount.count > 0)
+            .order_by(TaskStatusCount.status)
+        )
+    }
+    created = dict(
+        (await db.execute(
+            select(TaskDailyCount.day, TaskDailyCount.created)
+            .filter(TaskDailyCount.owner_id == owner_id, TaskDailyCount.day >= since, TaskDailyCount.created > 0)
+        )).all()
+    )
+    per_day = [{"day": since + timedelta(days=i), "created": created.get(since + timedelta(days=i), 0)} for i in range(days)]
+    oldest_open = (await db.execute(_oldest_open_stmt(owner_id))).scalars().first()
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "created_per_day": per_day,
+        "oldest_open": oldest_open,
+    }
+
+# ----------------- Consistency check -----------------
+def _day_expr(dialect: str):
+    # Days are UTC, as in the triggers.
+    if dialect == "postgresql":
+        return func.date(func.timezone("UTC", Task.created_at))
+    return func.date(Task.created_at)
+
+def _as_date(value) -> date:
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+def _owner_filter(column, owner_id: Optional[int]):
+    return [column == owner_id] if owner_id is not None else []
+
+def _expected(conn: Connection, owner_id: Optional[int]) -> Dict[str, dict]:
+    status_rows = conn.execute(
+        select(Task.owner_id, Task.status, func.count())
+        .filter(*_owner_filter(Task.owner_id, owner_id))
+        .group_by(Task.owner_id, Task.status)
+    )
+    day = _day_expr(conn.dialect.name)
+    daily_rows = conn.execute(
+        select(Task.owner_id, day, func.count())
+        .filter(*_owner_filter(Task.owner_id, owner_id))
+        .group_by(Task.owner_id, day)
+    )
+    return {
+        "status": {(owner, status): count for owner, status, count in status_rows},
+        "daily": {(owner, _as_date(day)): count for owner, day, count in daily_rows},
+    }
+
+def _stored(conn: Connection, owner_id: Optional[int]) -> Dict[str, dict]:
+    status_rows = conn.execute(
+        select(TaskStatusCount.owner_id, TaskStatusCount.status, TaskStatusCount.count)
+        .filter(TaskStatusCount.count != 0, *_owner_filter(TaskStatusCount.owner_id, owner_id))
+    )
+    daily_rows = conn.execute(
+        select(TaskDailyCount.owner_id, TaskDailyCount.day, TaskDailyCount.created)
+        .filter(TaskDailyCount.created != 0, *_owner_filter(TaskDailyCount.owner_id, owner_id))
+    )
+    return {
+        "status": {(owner, status): count for owner, status, count in status_rows},
+        "daily": {(owner, _as_date(day)): count for owner, day, count in daily_rows},
+    }
+
+def check_task_stats(conn: Connection, owner_id: Optional[int] = None) -> List[dict]:
+    """
+    Differences between the summaries and a recount of tasks, for one owner or
+    all of them. Each entry is {"summary", "owner_id", "key", "expected", "stored"}.
+    """
+    expected, stored = _expected(conn, owner_id), _stored(conn, owner_id)
+    diffs = []
+    for summary in ("status", "daily"):
+        for owner, key in sorted(set(expected[summary]) | set(stored[summary]), key=str):
+            want, have = expected[summary].get((owner, key), 0), stored[summary].get((owner, key), 0)
+            if want != have:
+                diffs.append({"summary": summary, "owner_id": owner, "key": str(key), "expected": want, "stored": have})
+    return diffs
+
+def rebuild_task_stats(conn: Connection, owner_id: Optional[int] = None) -> None:
+    """Replace the summaries (for one owner or all) with a recount. Runs in the caller's transaction."""
+    if conn.dialect.name == "postgresql":
+        # Hold off writers so no change lands between the recount and the swap.
+        conn.execute(text("LOCK TABLE tasks IN SHARE MODE"))
+    expected = _expected(conn, owner_id)
+    conn.execute(delete(TaskStatusCount).filter(*_owner_filter(TaskStatusCount.owner_id, owner_id)))
+    conn.execute(delete(TaskDailyCount).filter(*_owner_filter(TaskDailyCount.owner_id, owner_id)))
+    if expected["status"]:
+        conn.execute(insert(TaskStatusCount), [
+            {"owner_id": owner, "status": status, "count": count} for (owner, status), count in expected["status"].items()
+        ])
+    if expected["daily"]:
+        conn.execute(insert(TaskDailyCount), [
+            {"owner_id": owner, "day": day, "created": count} for (owner, day), count in expected["daily"].items()
+        ])
@@ -1,7 +1,14 @@
-﻿from sqlalchemy.orm import Session
+﻿from dataclasses import asdict, dataclass, fields as dataclass_fields
+from typing import Optional, Sequence
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 from backend.app.models.users import User
 from backend.app.schemas.users import UserCreate
 from backend.app.core.security import get_password_hash
+from backend.app.core.cache import build_cache
+from backend.app.crud.projection import project
+from backend.app.core.config import USER_CACHE_BACKEND, USER_CACHE_TTL_SECONDS, USER_CACHE_MAX_ENTRIES, ACCESS_TOKEN_EXPIRE_MINUTES, LOGIN_NEGATIVE_CACHE_SECONDS
 
 # ----------------- Create User -----------------
 def create_user(db: Session, user: UserCreate):
@@ -18,13 +25,190 @@ def create_user(db: Session, user: UserCreate):
     )
     db.add(db_user)
     db.commit()
-    db.refresh(db_user)
     return db_user
 
 # ----------------- Get User By Email -----------------
-def get_user_by_email(db: Session, email: str):
+# Columns a password check and token issue need (see core.security.user_token_claims).
+LOGIN_FIELDS = ("id", "email", "role", "is_active", "token_version", "hashed_password")
+
+def _by_email_stmt(email: str, fields: Optional[Sequence[str]]):
+    stmt = select(User).filter(User.email == email)
+    return project(stmt, User, fields) if fields else stmt
+
+def get_user_by_email(db: Session, email: str, fields: Optional[Sequence[str]] = None):
     """
     Fetch a user from the database by email.
-    Returns None if not found
+    Returns None if not found. With `fields`, only those columns are loaded
+    and a read-only Row is returned instead of the ORM User.
     """
+    if fields:
+        return db.execute(_by_email_stmt(email, fields)).first()
     return db.query(User).filter(User.email == email).first()
+
+# ----------------- Async variants (AsyncSession) -----------------
+async def create_user_async(db: AsyncSession, user: UserCreate, hashed_password: Optional[str] = None):
+    """
+    Async create_user. Pass hashed_password when the hash was computed off the
+    event loop (core.password_pool); otherwise it is hashed inline.
+    """
+    db_user = User(
+        email=user.email,
+        hashed_password=hashed_password or get_password_hash(user.password),
+        full_name=user.full_name,
+        role="user",
+        is_active=True
+    )
+    db.add(db_user)
+    await db.commit()
+    return db_user
+
+async def get_user_by_email_async(db: AsyncSession, email: str, fields: Optional[Sequence[str]] = None):
+    """
+    Async get_user_by_email. Returns None if not found
+    """
+    result = await db.execute(_by_email_stmt(email, fields))
+    return result.first() if fields else result.scalars().first()
+
+async def set_password_hash_async(db: AsyncSession, user_id: int, hashed_password: str) -> None:
+    """
+    Replace a stored hash with an equivalent one (cost-factor upgrade on login).
+    A Core UPDATE skips the ORM flush hooks, so the user's token_version, and
+    with it every issued token, is left alone.
+    """
+    await db.execute(update(User).where(User.id == user_id).values(hashed_password=hashed_password))
+    await db.commit()
+
+
+# ----------------- Authenticated-user cache -----------------
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    Read-only snapshot of a User row, as returned by get_current_user.
+    Handlers that modify the user load the ORM row themselves.
+    """
+    id: int
+    email: str
+    full_name: str
+    role: str
+    is_active: bool
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user: User) -> "CachedUser":
+        return cls(
+            id=user.id, email=user.email, full_name=user.full_name, role=user.role,
+            is_active=user.is_active, token_version=user.token_version or 0,
+        )
+
+# Columns CachedUser.from_user reads: enough to resolve a token without the full row.
+CACHED_USER_FIELDS = tuple(field.name for field in dataclass_fields(CachedUser))
+
+# Keyed by the token subject (email).
+user_cache = build_cache(USER_CACHE_BACKEND, prefix="user", maxsize=USER_CACHE_MAX_ENTRIES, ttl=USER_CACHE_TTL_SECONDS)
+
+def get_cached_user(email: str) -> Optional[CachedUser]:
+    data = user_cache.get(email)
+    return CachedUser(**data) if data is not None else None
+
+def cache_user(user: User) -> CachedUser:
+    principal = CachedUser.from_user(user)
+    user_cache.set(principal.email, asdict(principal))
+    return principal
+
+def invalidate_user_cache(*emails: str) -> None:
+    user_cache.delete(*emails)
+    failed_logins.delete(*emails)
+
+# ----------------- Failed-login cache -----------------
+# Per email: whether the email is unknown, and fingerprints (core.security.login_fingerprint)
+# of recently rejected passwords. Lets /auth/token refuse repeats without a
+# query or a bcrypt verify. Any committed change to the user drops the entry.
+_MAX_FAILED_FINGERPRINTS = 16
+failed_logins = build_cache(
+    USER_CACHE_BACKEND, prefix="loginneg", maxsize=USER_CACHE_MAX_ENTRIES, ttl=LOGIN_NEGATIVE_CACHE_SECONDS,
+)
+
+def known_failed_login(email: str, fingerprint: str) -> bool:
+    entry = failed_logins.get(email)
+    return entry is not None and (entry["unknown"] or fingerprint in entry["bad"])
+
+def remember_failed_login(email: str, fingerprint: Optional[str] = None) -> None:
+    """Record an unknown email (no fingerprint) or a wrong password for a known one."""
+    entry = failed_logins.get(email) or {"unknown": False, "bad": []}
+    if fingerprint is None:
+        entry["unknown"] = True
+    else:
+        entry["bad"] = (entry["bad"] + [fingerprint])[-_MAX_FAILED_FINGERPRINTS:]
+    failed_logins.set(email, entry)
+
+# ----------------- Token revocation -----------------
+# Stateless tokens carry the user's token_version ("ver"); tokens with a lower
+# "ver" than the row are rejected. This cache fronts users.token_version, keyed
+# by user id: a commit that bumps it publishes the new value here, and a miss
+# (eviction, restart, another worker) reads the column again. Values read from
+# the row only live USER_CACHE_TTL_SECONDS, so with the memory backend another
+# worker's revocation applies within that time; with redis it applies at once.
+token_versions = build_cache(
+    USER_CACHE_BACKEND, prefix="tokver", maxsize=USER_CACHE_MAX_ENTRIES, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+def min_token_version(user_id: int) -> Optional[int]:
+    return token_versions.get(str(user_id))
+
+def remember_token_version(user_id: int, version: int) -> None:
+    # add, not set: a value published by a commit meanwhile is newer than this read.
+    token_versions.add(str(user_id), version, ttl=USER_CACHE_TTL_SECONDS)
+
+async def get_token_version_async(db: AsyncSession, user_id: int) -> Optional[int]:
+    """users.token_version through the cache; None when the user no longer exists."""
+    version = min_token_version(user_id)
+    if version is None:
+        version = (await db.execute(select(User.token_version).filter(User.id == user_id))).scalar_one_or_none()
+        if version is not None:
+            remember_token_version(user_id, version)
+    return version
+
+# Changing any of these invalidates previously issued tokens.
+_TOKEN_FIELDS = ("hashed_password", "role", "is_active")
+
+@event.listens_for(Session, "before_flush")
+def _bump_token_versions(session, flush_context, instances):
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            state = inspect(obj)
+            if any(state.attrs[field].history.has_changes() for field in _TOKEN_FIELDS):
+                obj.token_version = (obj.token_version or 0) + 1
+
+# Any committed change to a User row (new users, profile edits, role changes, ...)
+# drops the cached copies under both its old and new email. Invalidating after
+# commit, not at flush, keeps a concurrent request from re-caching the pre-commit row.
+_STALE_USERS_KEY = "stale_user_emails"
+_BUMPED_TOKENS_KEY = "bumped_token_versions"
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, User):
+            stale = session.info.setdefault(_STALE_USERS_KEY, set())
+            stale.add(obj.email)
+            if obj in session.new:
+                continue
+            stale.update(email for email in inspect(obj).attrs.email.history.deleted if email)
+            if obj in session.deleted:
+                # nothing can match a version past the last one issued
+                session.info.setdefault(_BUMPED_TOKENS_KEY, {})[obj.id] = (obj.token_version or 0) + 1
+            elif inspect(obj).attrs.token_version.history.has_changes():
+                session.info.setdefault(_BUMPED_TOKENS_KEY, {})[obj.id] = obj.token_version
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session):
+    stale = session.info.pop(_STALE_USERS_KEY, None)
+    if stale:
+        invalidate_user_cache(*stale)
+    for user_id, version in session.info.pop(_BUMPED_TOKENS_KEY, {}).items():
+        token_versions.set(str(user_id), version)
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session):
+    session.info.pop(_STALE_USERS_KEY, None)
+    session.info.pop(_BUMPED_TOKENS_KEY, None)
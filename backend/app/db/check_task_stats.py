@@ -0,0 +1,35 @@
+﻿"""Consistency check for the task summary tables (models.task_stats).
+
+    python -m backend.app.db.check_task_stats [--owner ID] [--repair]
+
+Recounts tasks, prints every difference from the stored summaries and, with
+--repair, rebuilds them. Exits 1 when differences were found and not repaired.
+"""
+
+import argparse
+import sys
+
+from backend.app.db.session import engine
+from backend.app.crud.task_stats import check_task_stats, rebuild_task_stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--owner", type=int, help="check a single owner")
+    parser.add_argument("--repair", action="store_true", help="rebuild the summaries that differ")
+    args = parser.parse_args(argv)
+
+    with engine.begin() as conn:
+        diffs = check_task_stats(conn, args.owner)
+        for diff in diffs:
+            print(f"{diff['summary']:6s} owner={diff['owner_id']} {diff['key']}: stored {diff['stored']}, expected {diff['expected']}")
+        if diffs and args.repair:
+            rebuild_task_stats(conn, args.owner)
+            print(f"rebuilt task summaries ({len(diffs)} differences)")
+            return 0
+    print("task summaries consistent" if not diffs else f"{len(diffs)} differences; rerun with --repair to rebuild")
+    return 1 if diffs else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
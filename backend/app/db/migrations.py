@@ -0,0 +1,100 @@
+﻿# backend/app/db/migrations.py
+"""Versioned, idempotent schema upgrades.
+
+`Base.metadata.create_all` only creates missing tables, so anything added to an
+existing table (indexes, extensions, columns) is applied here. Each step runs
+once per database and is recorded in `schema_migrations`; steps are written with
+checkfirst/IF NOT EXISTS so re-running them is harmless.
+"""
+
+from sqlalchemy import Column, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from backend.app.models.task import Task, POSTGRES_SEARCH_DDL, SQLITE_SEARCH_DDL, SQLITE_CREATED_AT_DDL, SQLITE_CREATED_AT_NORMALIZE
+from backend.app.models.task_stats import TaskDailyCount, TaskStatusCount, POSTGRES_STATS_DDL, SQLITE_STATS_DDL
+
+migrations_metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    migrations_metadata,
+    Column("version", String(64), primary_key=True),
+)
+
+
+def _task_list_indexes(conn: Connection) -> None:
+    """Composite list/sort indexes and (Postgres only) trigram search indexes."""
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for index in Task.__table__.indexes:
+        index.create(conn, checkfirst=True)
+
+
+def _task_full_text_search(conn: Connection) -> None:
+    """tsvector column + GIN index on Postgres, FTS5 shadow table on SQLite."""
+    if conn.dialect.name == "postgresql":
+        for statement in POSTGRES_SEARCH_DDL:
+            conn.execute(text(statement))
+    elif conn.dialect.name == "sqlite":
+        for statement in SQLITE_SEARCH_DDL:
+            conn.execute(text(statement))
+        # index rows that existed before the triggers did
+        conn.execute(text("INSERT INTO tasks_fts(tasks_fts) VALUES ('rebuild')"))
+
+
+def _user_token_version(conn: Connection) -> None:
+    """users.token_version for access-token revocation."""
+    columns = {column["name"] for column in inspect(conn).get_columns("users")}
+    if "token_version" not in columns:
+        conn.execute(text("ALTER TABLE users ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+
+
+def _task_stats(conn: Connection) -> None:
+    """Summary tables for /tasks/stats, their triggers, and a backfill from existing tasks."""
+    from backend.app.crud.task_stats import rebuild_task_stats
+
+    TaskStatusCount.__table__.create(conn, checkfirst=True)
+    TaskDailyCount.__table__.create(conn, checkfirst=True)
+    statements = {"postgresql": POSTGRES_STATS_DDL, "sqlite": SQLITE_STATS_DDL}.get(conn.dialect.name, [])
+    for statement in statements:
+        conn.execute(text(statement))
+    rebuild_task_stats(conn)
+
+
+def _row_versions(conn: Connection) -> None:
+    """tasks.version and items.version, the counters behind ETags and If-Match."""
+    for table in ("tasks", "items"):
+        columns = {column["name"] for column in inspect(conn).get_columns(table)}
+        if "version" not in columns:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+def _task_created_at_format(conn: Connection) -> None:
+    """SQLite: one storage format for tasks.created_at, so keyset cursors compare correctly."""
+    if conn.dialect.name == "sqlite":
+        for statement in SQLITE_CREATED_AT_DDL:
+            conn.execute(text(statement))
+        conn.execute(text(SQLITE_CREATED_AT_NORMALIZE))
+
+
+# Append new steps at the end; never reorder or rename applied versions.
+MIGRATIONS = [
+    ("0001_task_list_indexes", _task_list_indexes),
+    ("0002_task_full_text_search", _task_full_text_search),
+    ("0003_user_token_version", _user_token_version),
+    ("0004_task_stats", _task_stats),
+    ("0005_row_versions", _row_versions),
+    ("0006_task_created_at_format", _task_created_at_format),
+]
+
+
+def upgrade(engine: Engine) -> None:
+    """Apply every migration that has not run on this database yet."""
+    with engine.begin() as conn:
+        migrations_metadata.create_all(conn)
+        applied = set(conn.execute(select(schema_migrations.c.version)).scalars())
+        for version, step in MIGRATIONS:
+            if version in applied:
+                continue
+            step(conn)
+            conn.execute(schema_migrations.insert().values(version=version))
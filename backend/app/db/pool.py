@@ -0,0 +1,100 @@
+﻿# backend/app/db/pool.py
+"""Connection pools that time how long a checkout takes.
+
+Checkout time is the time a request spends getting a connection: waiting for
+a free one when the pool is exhausted, plus pre-ping or connect time. It is
+the first number to look at when requests stall on the database.
+"""
+
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from backend.app.core.metrics import DB_POOL_CHECKOUT_SECONDS, DB_POOL_TIMEOUTS
+
+
+class CheckoutStats:
+    """Running checkout-time totals for one pool. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.timeouts = 0
+
+    def add(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def timed_out(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def as_dict(self) -> dict:
+        return {
+            "checkouts": self.count,
+            "avg_wait_ms": round(self.total / self.count * 1000, 3) if self.count else None,
+            "max_wait_ms": round(self.max * 1000, 3),
+            "timeouts": self.timeouts,
+        }
+
+
+class _TimedCheckout:
+    # Engine label on the metrics; set by db.session after the engine is built.
+    metrics_label = "sync"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkout_stats = CheckoutStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_label = self.metrics_label
+        return pool
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.checkout_stats.timed_out()
+            DB_POOL_TIMEOUTS.labels(self.metrics_label).inc()
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.checkout_stats.add(waited)
+            DB_POOL_CHECKOUT_SECONDS.labels(self.metrics_label).observe(waited)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    """QueuePool recording checkout time and timeouts."""
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording checkout time and timeouts."""
+
+
+def pool_status(pool) -> dict:
+    """Utilization and checkout timings for /health. Pools without a queue (NullPool) report their class only."""
+    status = {"class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        capacity = pool.size() + max(0, pool._max_overflow)
+        checked_out = pool.checkedout()
+        status.update(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=checked_out,
+            overflow=max(0, pool.overflow()),
+            idle=pool.checkedin(),
+            utilization=round(checked_out / capacity, 3) if capacity else None,
+            saturated=checked_out >= capacity,
+            timeout_s=pool.timeout(),
+        )
+    if isinstance(pool, _TimedCheckout):
+        status.update(pool.checkout_stats.as_dict())
+    return status
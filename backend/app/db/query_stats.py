@@ -0,0 +1,127 @@
+﻿# backend/app/db/query_stats.py
+"""Per-request SQL statistics and N+1 detection.
+
+Cursor events on every engine record, for the request being served, how many
+statements ran, how long they took and how often each statement shape
+(fingerprint) repeated. QueryStatsMiddleware reports the numbers in a
+Server-Timing header and one structured log line per request. A SELECT shape
+repeated SQL_N_PLUS_ONE_THRESHOLD times in one request is an N+1 suspect:
+logged, or raised as NPlusOneDetected when SQL_STRICT_N_PLUS_ONE is set.
+"""
+
+import json
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from backend.app.core.config import SQL_N_PLUS_ONE_THRESHOLD, SQL_STRICT_N_PLUS_ONE
+from backend.app.db.session import engine, async_engine, replica_engine, async_replica_engine
+
+logger = logging.getLogger(__name__)
+
+
+class NPlusOneDetected(RuntimeError):
+    """The same SELECT ran SQL_N_PLUS_ONE_THRESHOLD times in one request (strict mode)."""
+
+
+class RequestQueries:
+    """Statements seen while serving one request."""
+
+    __slots__ = ("count", "seconds", "fingerprints")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints: Counter = Counter()
+
+    def repeated(self, threshold: int = SQL_N_PLUS_ONE_THRESHOLD) -> dict:
+        return {fp: n for fp, n in self.fingerprints.items() if n >= threshold and fp.startswith("SELECT")}
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("request_queries", default=None)
+
+_IN_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)|\((?:\s*%\(\w+\)s\s*,)+\s*%\(\w+\)s\s*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+_SPACE = re.compile(r"\s+")
+
+def fingerprint(statement: str) -> str:
+    """Statement shape: whitespace collapsed, IN lists and numeric literals folded."""
+    shape = _SPACE.sub(" ", statement).strip()
+    shape = _IN_LIST.sub("(?...)", shape)
+    return _NUMBER.sub("?", shape)
+
+
+# ----------------- Cursor events -----------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_stats_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = conn.info.get("query_stats_started")
+    if stats is None or not started:
+        return
+    stats.count += 1
+    stats.seconds += time.perf_counter() - started.pop()
+    shape = fingerprint(statement)
+    stats.fingerprints[shape] += 1
+    if SQL_STRICT_N_PLUS_ONE and stats.fingerprints[shape] == SQL_N_PLUS_ONE_THRESHOLD and shape.startswith("SELECT"):
+        raise NPlusOneDetected(f"{SQL_N_PLUS_ONE_THRESHOLD} identical SELECTs in one request: {shape}")
+
+# The replica engines are the primary ones unless a replica is configured.
+for _target in dict.fromkeys((engine, async_engine.sync_engine, replica_engine, async_replica_engine.sync_engine)):
+    event.listen(_target, "before_cursor_execute", _before_cursor_execute)
+    event.listen(_target, "after_cursor_execute", _after_cursor_execute)
+
+
+# ----------------- Middleware -----------------
+class QueryStatsMiddleware:
+    """
+    ASGI middleware: Server-Timing (db, app) on every HTTP response and an
+    "sql" log line once the body has been sent. Statements issued while a
+    streaming body is produced count in the log line, not the header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestQueries()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                timing = f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries", app;dur={elapsed_ms:.1f}'
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"server-timing", timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            repeated = stats.repeated()
+            record = {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "db_queries": stats.count,
+                "db_ms": round(stats.seconds * 1000, 2),
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+            }
+            if repeated:
+                record["n_plus_one"] = [{"statement": fp, "count": n} for fp, n in repeated.items()]
+            logger.log(logging.WARNING if repeated else logging.INFO, "sql %s", json.dumps(record))
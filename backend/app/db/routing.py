@@ -0,0 +1,79 @@
+﻿# backend/app/db/routing.py
+"""Read/write routing between the primary database and the read replica.
+
+GET routes open their session through `read_session` / `async_read_session`,
+which pick the replica unless the caller committed a write in the last
+READ_YOUR_WRITES_SECONDS. Write routes tag their session with the caller's id
+(`track_writer`); a commit that actually wrote something then pins that user's
+reads to the primary for the window, so lag on the replica never hides a
+user's own change from them.
+"""
+
+from typing import Union
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from backend.app.core.cache import build_cache
+from backend.app.core.config import READ_YOUR_WRITES_BACKEND, READ_YOUR_WRITES_SECONDS, USER_CACHE_MAX_ENTRIES
+from backend.app.core.metrics import DB_READ_SESSIONS
+from backend.app.db.session import SessionLocal, AsyncSessionLocal, ReplicaSessionLocal, AsyncReplicaSessionLocal
+
+# user id -> True while that user's reads stay on the primary.
+recent_writers = build_cache(READ_YOUR_WRITES_BACKEND, "recent_writer", USER_CACHE_MAX_ENTRIES, READ_YOUR_WRITES_SECONDS)
+
+_WRITER = "writer_id"
+_WROTE = "wrote"
+
+
+def track_writer(session: Session, user_id: int) -> None:
+    """Pin `user_id` to the primary after this session next commits a write."""
+    session.info[_WRITER] = user_id
+
+
+def pin_to_primary(key: Union[int, str]) -> None:
+    """Send reads for `key` (a user id, or a name for shared data) to the primary for the window."""
+    recent_writers.set(str(key), True)
+
+
+def pinned_to_primary(key: Union[int, str, None]) -> bool:
+    return key is not None and recent_writers.get(str(key)) is not None
+
+
+def read_session(user_id: Union[int, str, None] = None) -> Session:
+    """Session for a read-only request by `user_id` (None for anonymous callers)."""
+    if pinned_to_primary(user_id):
+        DB_READ_SESSIONS.labels("primary").inc()
+        return SessionLocal()
+    DB_READ_SESSIONS.labels("replica").inc()
+    return ReplicaSessionLocal()
+
+
+def async_read_session(user_id: Union[int, str, None] = None):
+    """AsyncSession counterpart of read_session."""
+    if pinned_to_primary(user_id):
+        DB_READ_SESSIONS.labels("primary").inc()
+        return AsyncSessionLocal()
+    DB_READ_SESSIONS.labels("replica").inc()
+    return AsyncReplicaSessionLocal()
+
+
+# ----------------- Write tracking -----------------
+# ORM flushes and Core DML run through a session (bulk writes, imports) both count.
+@event.listens_for(Session, "after_flush")
+def _flushed(session, flush_context):
+    session.info[_WROTE] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_WROTE] = True
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer(session):
+    if session.info.pop(_WROTE, False) and session.info.get(_WRITER) is not None:
+        pin_to_primary(session.info[_WRITER])
+
+@event.listens_for(Session, "after_rollback")
+def _discard_writes(session):
+    session.info.pop(_WROTE, None)
@@ -1,22 +1,50 @@
 ﻿# backend/app/db/session.py
 
-from typing import Generator
-from sqlalchemy import create_engine
+from typing import AsyncGenerator, Generator
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool
 
-from backend.app.core.config import SQLALCHEMY_DATABASE_URL
+from backend.app.core.config import (
+    SQLALCHEMY_DATABASE_URL, ASYNC_SQLALCHEMY_DATABASE_URL,
+    REPLICA_DATABASE_URL, ASYNC_REPLICA_DATABASE_URL,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING,
+    DB_POOL_FAST_FAIL, DB_POOL_FAST_FAIL_TIMEOUT,
+)
 from backend.app.db.base import Base  # import the single Base instance
+from backend.app.db.pool import TimedAsyncAdaptedQueuePool, TimedQueuePool
+from backend.app.core.metrics import observe_pool
 
 # Create engine
+# SQLite connections are handed between FastAPI's threadpool workers.
+connect_args = {"check_same_thread": False} if SQLALCHEMY_DATABASE_URL.startswith("sqlite") else {}
+
+# Pool settings shared by both engines (core.config). A checkout that waits
+# longer than pool_timeout raises sqlalchemy.exc.TimeoutError, which main.py
+# answers with a 503.
+pool_args = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_FAST_FAIL_TIMEOUT if DB_POOL_FAST_FAIL else DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+)
+
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args=connect_args,
+    poolclass=TimedQueuePool,
+    **pool_args,
 )
 
-# Create session factory
+# Create session factory. Models fetch server-generated values with RETURNING
+# (eager_defaults), so objects stay loaded after commit and serializing them
+# needs no reload.
 SessionLocal = sessionmaker(
     autocommit=False,
     autoflush=False,
+    expire_on_commit=False,
     bind=engine,
 )
 
@@ -27,3 +55,72 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+# ----------------- Async stack -----------------
+# Same database through an async driver (asyncpg / aiosqlite), used by the
+# async def routers so they do not occupy a threadpool worker per request.
+# aiosqlite connections are tied to the event loop that opened them, so SQLite
+# opens one per session instead of pooling.
+async_engine = create_async_engine(
+    ASYNC_SQLALCHEMY_DATABASE_URL,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    **(
+        {"poolclass": NullPool} if ASYNC_SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+        else dict(pool_args, poolclass=TimedAsyncAdaptedQueuePool)
+    ),
+)
+async_engine.sync_engine.pool.metrics_label = "async"
+
+# expire_on_commit=False: attributes cannot lazy-load once the response is
+# being serialized outside the session's greenlet.
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# ----------------- Read replica -----------------
+# GET routes read through these (db.routing picks primary or replica per
+# request). Without REPLICA_DATABASE_URL they are the primary engines.
+if REPLICA_DATABASE_URL:
+    replica_engine = create_engine(
+        REPLICA_DATABASE_URL,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        connect_args={"check_same_thread": False} if REPLICA_DATABASE_URL.startswith("sqlite") else {},
+        poolclass=TimedQueuePool,
+        **pool_args,
+    )
+    replica_engine.pool.metrics_label = "replica"
+    async_replica_engine = create_async_engine(
+        ASYNC_REPLICA_DATABASE_URL,
+        pool_pre_ping=DB_POOL_PRE_PING,
+        **(
+            {"poolclass": NullPool} if ASYNC_REPLICA_DATABASE_URL.startswith("sqlite")
+            else dict(pool_args, poolclass=TimedAsyncAdaptedQueuePool)
+        ),
+    )
+    async_replica_engine.sync_engine.pool.metrics_label = "async_replica"
+else:
+    replica_engine = engine
+    async_replica_engine = async_engine
+
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=replica_engine)
+AsyncReplicaSessionLocal = async_sessionmaker(bind=async_replica_engine, autoflush=False, expire_on_commit=False)
+
+# Pool gauges for /metrics, refreshed on every checkout and checkin.
+def _watch_pool(label: str, target) -> None:
+    def update(*args):
+        observe_pool(label, target.pool)
+    event.listen(target, "checkout", update)
+    event.listen(target, "checkin", update)
+
+_watch_pool("sync", engine)
+_watch_pool("async", async_engine.sync_engine)
+if REPLICA_DATABASE_URL:
+    _watch_pool("replica", replica_engine)
+    _watch_pool("async_replica", async_replica_engine.sync_engine)
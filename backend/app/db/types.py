@@ -0,0 +1,30 @@
+﻿# backend/app/db/types.py
+"""Column types shared by the models."""
+
+from datetime import timezone
+
+from sqlalchemy import DateTime
+from sqlalchemy.types import TypeDecorator
+
+
+class UTCDateTime(TypeDecorator):
+    """
+    DateTime(timezone=True) that always reads back timezone-aware UTC values.
+
+    Postgres already returns aware timestamps. SQLite stores datetimes as text
+    without an offset and returns them naive, so a value would serialize with
+    an offset when it comes from Python and without one when read back.
+    Values are stored as UTC; naive values are taken to be UTC already.
+    """
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
@@ -1,11 +1,24 @@
 ﻿# backend/app/main.py
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from backend.app.api.v1 import auth, items, tasks, profile
-from backend.app.db.session import Base, engine
+from sqlalchemy import exc as sa_exc, text
+from sqlalchemy.orm.exc import StaleDataError
+from backend.app.db.session import Base, engine, async_engine, replica_engine, async_replica_engine
+from backend.app.core.config import REPLICA_DATABASE_URL, COMPRESSION_ENABLED
+from backend.app.core.compression import CompressionMiddleware
+from backend.app.db.pool import pool_status
+from backend.app.db.migrations import upgrade as run_migrations
+from backend.app.db.query_stats import QueryStatsMiddleware
+from backend.app.core import metrics
+from backend.app.crud.users import user_cache
+from backend.app.crud.item import item_responses
+from backend.app.crud.task import task_events
+from backend.app.core.password_pool import PasswordPoolBusy, password_pool
 
 # Import models so SQLAlchemy sees them and can create tables on startup.
-from backend.app.models import users as users_model, item as item_model, task as task_model
+from backend.app.models import users as users_model, item as item_model, task as task_model, task_stats as task_stats_model
 
 app = FastAPI(title="Primetrade - Backend Assignment", version="0.1")
 
@@ -28,7 +41,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Let the browser devtools show our Server-Timing breakdown cross-origin,
+    # and the frontend read ETags for If-None-Match / If-Match.
+    expose_headers=["Server-Timing", "ETag"],
 )
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+app.add_middleware(QueryStatsMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
 # --------------------------------
 
 # Mount routers under versioned API prefixes
@@ -39,9 +59,87 @@ app.include_router(profile.router, prefix="/api/v1/profile", tags=["profile"])
 
 @app.on_event("startup")
 def on_startup():
-    # Ensure tables exist (no-op if already present)
+    # Ensure tables exist (no-op if already present), then bring existing
+    # tables up to date with indexes added since they were created.
     Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+
+@app.on_event("startup")
+async def start_task_events():
+    # Started up front so this worker publishes its commits even before
+    # anyone subscribes to it (other workers may have subscribers).
+    await task_events.start()
+
+@app.on_event("shutdown")
+def on_shutdown():
+    password_pool.shutdown()
+    metrics.mark_process_dead()
+
+@app.on_event("shutdown")
+async def stop_task_events():
+    await task_events.stop()
+
+@app.exception_handler(PasswordPoolBusy)
+async def password_pool_busy(request: Request, exc: PasswordPoolBusy):
+    # Shed login/register load instead of queueing it behind bcrypt.
+    return JSONResponse(status_code=503, content={"detail": "server busy, retry shortly"}, headers={"Retry-After": "1"})
+
+@app.exception_handler(sa_exc.TimeoutError)
+async def db_pool_timeout(request: Request, exc: sa_exc.TimeoutError):
+    # No connection became free within pool_timeout (see DB_POOL_FAST_FAIL).
+    return JSONResponse(status_code=503, content={"detail": "database busy, retry shortly"}, headers={"Retry-After": "1"})
+
+@app.exception_handler(StaleDataError)
+async def concurrent_update(request: Request, exc: StaleDataError):
+    # The row's version changed between read and write (see api.v1.conditional).
+    return JSONResponse(status_code=412, content={"detail": "resource has changed"})
+
+# ----------------- Health -----------------
+def _probe(target, pools: dict) -> dict:
+    if any(pool.get("saturated") for pool in pools):
+        # A probe query would only queue behind the requests already waiting.
+        return {"ok": False, "error": "pool saturated"}
+    try:
+        with target.connect() as conn:
+            conn.execute(text("SELECT 1"))
+        return {"ok": True}
+    except sa_exc.SQLAlchemyError as exc:
+        return {"ok": False, "error": type(exc).__name__}
+
+def _readiness() -> dict:
+    pools = {"sync": pool_status(engine.pool), "async": pool_status(async_engine.sync_engine.pool)}
+    report = {"database": _probe(engine, pools.values())}
+    if REPLICA_DATABASE_URL:
+        # GET routes read from the replica, so it counts towards readiness too.
+        replica_pools = {"replica": pool_status(replica_engine.pool), "async_replica": pool_status(async_replica_engine.sync_engine.pool)}
+        report["replica"] = _probe(replica_engine, replica_pools.values())
+        pools.update(replica_pools)
+    ready = all(check["ok"] for check in report.values())
+    return dict(report, ready=ready, pools=pools)
+
+@app.get("/api/v1/health/live", tags=["health"])
+def liveness():
+    """The process is up. Checks nothing else, so it stays cheap under load."""
+    return {"status": "ok"}
+
+@app.get("/api/v1/health/ready", tags=["health"])
+def readiness():
+    """200 when the database answers and no pool is exhausted, otherwise 503."""
+    report = _readiness()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=dict(report, status="ready" if report["ready"] else "not_ready"))
 
 @app.get("/api/v1/health", tags=["health"])
 def health():
-    return {"status": "ok"}
+    report = _readiness()
+    return dict(
+        report,
+        status="ok" if report["ready"] else "degraded",
+        caches={"user": user_cache.stats(), "item_responses": item_responses.stats()},
+        password_pool=password_pool.stats(),
+        task_events=task_events.stats(),
+    )
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    body, content_type = metrics.render()
+    return Response(body, media_type=content_type)
@@ -10,3 +10,7 @@ class Item(Base):
     description = Column(Text, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"))
     owner = relationship("User")
+    # Version counter, bumped on every update: ETags and If-Match (see models.task).
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"eager_defaults": True, "version_id_col": version}
@@ -1,18 +1,106 @@
-﻿from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+﻿from sqlalchemy import Column, Integer, String, Text, ForeignKey, Index, DDL, event
+from datetime import datetime, timezone
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from backend.app.db.session import Base
+from backend.app.db.types import UTCDateTime
 
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Seek index for keyset pagination on (created_at, id) within an owner.
+        Index("ix_tasks_owner_created_id", "owner_id", "created_at", "id"),
+        # list_tasks with a status filter: equality on (owner_id, status), then
+        # rows come back already in (created_at, id) order.
+        Index("ix_tasks_owner_status_created_id", "owner_id", "status", "created_at", "id"),
+        # Trigram indexes serve ILIKE '%q%' on Postgres. SQLite has no
+        # equivalent, so they are only created there.
+        Index(
+            "ix_tasks_title_trgm", "title",
+            postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_tasks_description_trgm", "description",
+            postgresql_using="gin", postgresql_ops={"description": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False, index=True)
     description = Column(Text, nullable=True)
     status = Column(String(32), nullable=False, default="open")
     owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    # Stamped in Python so every ORM insert stores the same timestamp format;
+    # keyset cursors compare on this column. server_default covers raw SQL.
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), server_default=func.now())
+    updated_at = Column(UTCDateTime, server_default=func.now(), onupdate=func.now())
+    # Bumped by every update (the mapper's version counter; bulk updates bump it
+    # explicitly). ETags are built from it and If-Match compares against it.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     owner = relationship("User", back_populates="tasks")
+
+    # Load server-side values (updated_at) from INSERT/UPDATE ... RETURNING
+    # instead of a SELECT after commit.
+    __mapper_args__ = {"eager_defaults": True, "version_id_col": version}
+
+
+# gin_trgm_ops needs the pg_trgm extension before the indexes above are created.
+event.listen(
+    Task.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# Full-text search storage (see crud.task.search_tasks). Neither piece is mapped
+# on Task: Postgres keeps a generated tsvector column, SQLite an FTS5 table
+# that triggers keep in step with tasks. All statements are idempotent so the
+# migrations can replay them on existing databases.
+POSTGRES_SEARCH_DDL = [
+    "ALTER TABLE tasks ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', coalesce(title, '') || ' ' || coalesce(description, ''))) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_tasks_search_vector ON tasks USING gin (search_vector)",
+]
+
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5("
+    "title, description, content='tasks', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN "
+    "INSERT INTO tasks_fts(tasks_fts, rowid, title, description) VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO tasks_fts(rowid, title, description) VALUES (new.id, new.title, new.description); END",
+]
+
+# SQLAlchemy stores SQLite datetimes as "YYYY-MM-DD HH:MM:SS.ffffff" and binds
+# keyset cursors the same way, but rows from server_default (CURRENT_TIMESTAMP)
+# or raw SQL come in other shapes, e.g. "YYYY-MM-DD HH:MM:SS", that compare
+# wrongly against a cursor for the same instant. Rewrite them on insert (the
+# migrations backfill older rows with SQLITE_CREATED_AT_NORMALIZE).
+SQLITE_CREATED_AT_FORMAT = "created_at NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9] [0-9][0-9]:[0-9][0-9]:[0-9][0-9].[0-9][0-9][0-9][0-9][0-9][0-9]'"
+SQLITE_CREATED_AT_NORMALIZE = (
+    "UPDATE tasks SET created_at = strftime('%Y-%m-%d %H:%M:%f', created_at) || '000' "
+    f"WHERE created_at IS NOT NULL AND {SQLITE_CREATED_AT_FORMAT}"
+)
+SQLITE_CREATED_AT_DDL = [
+    "CREATE TRIGGER IF NOT EXISTS tasks_created_at_ai AFTER INSERT ON tasks "
+    f"WHEN new.{SQLITE_CREATED_AT_FORMAT} BEGIN "
+    "UPDATE tasks SET created_at = strftime('%Y-%m-%d %H:%M:%f', new.created_at) || '000' WHERE id = new.id; END",
+]
+
+for _statement in POSTGRES_SEARCH_DDL:
+    event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in SQLITE_SEARCH_DDL:
+    event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _statement in SQLITE_CREATED_AT_DDL:
+    # DDL() %-formats its statement; strftime's directives must survive that.
+    event.listen(Task.__table__, "after_create", DDL(_statement.replace("%", "%%")).execute_if(dialect="sqlite"))
+# The FTS table is not part of the metadata, so drop it with its content table.
+event.listen(
+    Task.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS tasks_fts").execute_if(dialect="sqlite"),
+)
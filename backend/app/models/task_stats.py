@@ -0,0 +1,84 @@
+﻿from sqlalchemy import Column, Date, ForeignKey, Integer, String, DDL, event
+from backend.app.db.session import Base
+from backend.app.models.task import Task
+
+
+class TaskStatusCount(Base):
+    """Number of tasks per owner and status, maintained by triggers on tasks."""
+    __tablename__ = "task_status_counts"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    status = Column(String(32), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+
+class TaskDailyCount(Base):
+    """Tasks per owner by UTC creation day, maintained by triggers on tasks."""
+    __tablename__ = "task_daily_counts"
+
+    owner_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    created = Column(Integer, nullable=False, default=0)
+
+
+# The summaries change in the same transaction as the task rows, whatever wrote
+# them (ORM, bulk Core statements, imports, raw SQL). Counts may drop to zero;
+# readers skip those rows. crud.task_stats.check_task_stats diffs the summaries
+# against the tasks table. Statements are idempotent so migrations can replay them.
+def _postgres_stats_function(name: str, changes: str) -> str:
+    # Statement-level: a bulk statement touches each summary row once. Rows are
+    # upserted in key order so concurrent writers lock them in the same order.
+    return (
+        f"CREATE OR REPLACE FUNCTION {name}() RETURNS trigger LANGUAGE plpgsql AS $$ BEGIN "
+        "INSERT INTO task_status_counts AS s (owner_id, status, count) "
+        f"SELECT owner_id, status, sum(delta) FROM ({changes}) AS changes "
+        "GROUP BY owner_id, status HAVING sum(delta) <> 0 ORDER BY owner_id, status "
+        "ON CONFLICT (owner_id, status) DO UPDATE SET count = s.count + EXCLUDED.count; "
+        "INSERT INTO task_daily_counts AS d (owner_id, day, created) "
+        f"SELECT owner_id, (created_at AT TIME ZONE 'UTC')::date, sum(delta) FROM ({changes}) AS changes "
+        "GROUP BY 1, 2 HAVING sum(delta) <> 0 ORDER BY 1, 2 "
+        "ON CONFLICT (owner_id, day) DO UPDATE SET created = d.created + EXCLUDED.created; "
+        "RETURN NULL; END $$"
+    )
+
+_NEW_ROWS = "SELECT owner_id, status, created_at, 1 AS delta FROM new_rows"
+_OLD_ROWS = "SELECT owner_id, status, created_at, -1 AS delta FROM old_rows"
+
+POSTGRES_STATS_DDL = [
+    _postgres_stats_function("task_stats_insert", _NEW_ROWS),
+    _postgres_stats_function("task_stats_delete", _OLD_ROWS),
+    _postgres_stats_function("task_stats_update", f"{_NEW_ROWS} UNION ALL {_OLD_ROWS}"),
+    "DROP TRIGGER IF EXISTS tasks_stats_ai ON tasks",
+    "CREATE TRIGGER tasks_stats_ai AFTER INSERT ON tasks REFERENCING NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION task_stats_insert()",
+    "DROP TRIGGER IF EXISTS tasks_stats_ad ON tasks",
+    "CREATE TRIGGER tasks_stats_ad AFTER DELETE ON tasks REFERENCING OLD TABLE AS old_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION task_stats_delete()",
+    "DROP TRIGGER IF EXISTS tasks_stats_au ON tasks",
+    "CREATE TRIGGER tasks_stats_au AFTER UPDATE ON tasks REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows "
+    "FOR EACH STATEMENT EXECUTE FUNCTION task_stats_update()",
+]
+
+_SQLITE_ADD = (
+    "INSERT INTO task_status_counts(owner_id, status, count) VALUES (new.owner_id, new.status, 1) "
+    "ON CONFLICT(owner_id, status) DO UPDATE SET count = count + 1; "
+    "INSERT INTO task_daily_counts(owner_id, day, created) VALUES (new.owner_id, date(new.created_at), 1) "
+    "ON CONFLICT(owner_id, day) DO UPDATE SET created = created + 1; "
+)
+_SQLITE_REMOVE = (
+    "UPDATE task_status_counts SET count = count - 1 WHERE owner_id = old.owner_id AND status = old.status; "
+    "UPDATE task_daily_counts SET created = created - 1 WHERE owner_id = old.owner_id AND day = date(old.created_at); "
+)
+
+SQLITE_STATS_DDL = [
+    f"CREATE TRIGGER IF NOT EXISTS tasks_stats_ai AFTER INSERT ON tasks BEGIN {_SQLITE_ADD}END",
+    f"CREATE TRIGGER IF NOT EXISTS tasks_stats_ad AFTER DELETE ON tasks BEGIN {_SQLITE_REMOVE}END",
+    "CREATE TRIGGER IF NOT EXISTS tasks_stats_au AFTER UPDATE OF owner_id, status, created_at ON tasks "
+    f"BEGIN {_SQLITE_REMOVE}{_SQLITE_ADD}END",
+]
+
+# On the tasks table: the triggers need it, and it is dropped with it.
+for _statement in POSTGRES_STATS_DDL:
+    event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect="postgresql"))
+for _statement in SQLITE_STATS_DDL:
+    event.listen(Task.__table__, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
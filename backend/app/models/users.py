@@ -12,6 +12,11 @@ class User(Base):
     full_name = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     role = Column(String, default="user")
+    # Embedded in access tokens as "ver"; bumped on password/role/active changes
+    # so tokens issued before the change stop being accepted.
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # ✅ REQUIRED for Task relationship
     tasks = relationship("Task", back_populates="owner", cascade="all, delete")
+
+    __mapper_args__ = {"eager_defaults": True}
@@ -1,6 +1,7 @@
 ﻿# backend/app/schemas/item.py
 from pydantic import BaseModel
 from typing import Optional
+from typing_extensions import NotRequired, TypedDict
 
 class ItemBase(BaseModel):
     title: str
@@ -18,3 +19,11 @@ class ItemRead(ItemBase):
 
     class Config:
         orm_mode = True
+
+# ItemRead as a plain dict, for serializing column rows directly.
+class ItemRow(TypedDict):
+    title: str
+    description: Optional[str]
+    description_truncated: NotRequired[bool]  # view=compact only
+    id: int
+    owner_id: int
@@ -1,6 +1,7 @@
-﻿from typing import Optional, List
-from pydantic import BaseModel, constr
-from datetime import datetime
+﻿from typing import Dict, Optional, List
+from typing_extensions import NotRequired, TypedDict
+from pydantic import BaseModel, Field, constr, field_validator, model_validator
+from datetime import date, datetime
 
 class TaskBase(BaseModel):
     title: constr(strip_whitespace=True, min_length=1, max_length=255)
@@ -27,3 +28,82 @@ class TaskOut(TaskBase):
 class PaginatedTasks(BaseModel):
     data: List[TaskOut]
     meta: dict
+
+# Plain-dict shapes of TaskOut / PaginatedTasks for the fast list path: rows
+# are serialized as they come from the database, without building models.
+class TaskRow(TypedDict):
+    title: str
+    description: Optional[str]
+    description_truncated: NotRequired[bool]  # view=compact only
+    status: Optional[str]
+    id: int
+    owner_id: int
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+
+class TaskPage(TypedDict):
+    data: List[TaskRow]
+    meta: dict
+
+# ----------------- Stats -----------------
+class TaskDayCount(BaseModel):
+    day: date
+    created: int
+
+class TaskStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+    created_per_day: List[TaskDayCount]
+    oldest_open: Optional[TaskOut] = None
+
+# ----------------- Bulk writes -----------------
+# Largest batch accepted by the /tasks/bulk endpoints.
+TASK_BULK_MAX_ITEMS = 10_000
+
+class TaskBulkCreate(BaseModel):
+    items: List[TaskCreate] = Field(..., min_length=1, max_length=TASK_BULK_MAX_ITEMS)
+
+class TaskBulkUpdateItem(TaskUpdate):
+    """One row of a bulk PATCH: only the fields sent are changed."""
+    id: int
+    title: Optional[constr(strip_whitespace=True, min_length=1, max_length=255)] = None
+    description: Optional[str] = None
+    status: Optional[str] = None
+
+    @field_validator("title", "status")
+    @classmethod
+    def not_null(cls, value):
+        if value is None:
+            raise ValueError("may not be null")
+        return value
+
+    @model_validator(mode="after")
+    def changes_something(self):
+        if not self.model_fields_set - {"id"}:
+            raise ValueError("send at least one field to change")
+        return self
+
+class TaskBulkUpdate(BaseModel):
+    items: List[TaskBulkUpdateItem] = Field(..., min_length=1, max_length=TASK_BULK_MAX_ITEMS)
+
+    @model_validator(mode="after")
+    def unique_ids(self):
+        if len({item.id for item in self.items}) != len(self.items):
+            raise ValueError("each task id may appear only once")
+        return self
+
+class TaskBulkDelete(BaseModel):
+    ids: List[int] = Field(..., min_length=1, max_length=TASK_BULK_MAX_ITEMS)
+
+class TaskBulkResult(BaseModel):
+    id: int
+    result: str  # "updated" | "deleted" | "not_found"
+    task: Optional[TaskOut] = None
+
+class TaskBulkCreated(BaseModel):
+    data: List[TaskOut]
+    meta: dict
+
+class TaskBulkResults(BaseModel):
+    data: List[TaskBulkResult]
+    meta: dict
@@ -0,0 +1,146 @@
+﻿"""Shared test fixtures.
+
+Every test drops and recreates the schema, so the suite never reads DATABASE_URL:
+it runs against TEST_DATABASE_URL, or a throwaway SQLite file when that is unset.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primetrade_test.db')}",
+)
+# A low bcrypt cost (and one pool worker) keeps the tests that log in fast.
+os.environ.setdefault("BCRYPT_ROUNDS", "5")
+os.environ.setdefault("PASSWORD_POOL_WORKERS", "1")
+# Fail any request that repeats a SELECT enough times to look like an N+1.
+os.environ.setdefault("SQL_STRICT_N_PLUS_ONE", "1")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from backend.app.main import app
+from backend.app.db.session import Base, engine, async_engine, SessionLocal
+from backend.app.models.users import User
+from backend.app.core.security import create_access_token, user_token_claims
+from backend.app.crud.users import user_cache, token_versions, failed_logins, remember_token_version
+from backend.app.api.v1.auth import login_email_limiter, login_ip_limiter
+from backend.app.db.routing import recent_writers
+from backend.app.crud.task import task_counts
+from backend.app.crud.item import item_responses
+
+
+@pytest.fixture(autouse=True)
+def _tables():
+    """Create a fresh schema (and empty caches) for every test."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    user_cache.clear()
+    token_versions.clear()
+    failed_logins.clear()
+    login_email_limiter.clear()
+    login_ip_limiter.clear()
+    recent_writers.clear()
+    task_counts.clear()
+    item_responses.clear()
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    """Database session bound to the test engine."""
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def client():
+    """HTTP client for the application."""
+    return TestClient(app)
+
+
+@pytest.fixture
+def user(db):
+    """A regular user, inserted directly so tests do not pay for bcrypt."""
+    db_user = User(
+        email="owner@example.com",
+        hashed_password="not-a-real-hash",
+        full_name="Task Owner",
+        role="user",
+        is_active=True,
+    )
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+
+@pytest.fixture
+def auth_headers(user):
+    """Bearer token headers for the `user` fixture, as issued by a login."""
+    token = create_access_token(user_token_claims(user))
+    remember_token_version(user.id, user.token_version)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def admin_headers(db):
+    """Bearer token headers for an admin user."""
+    admin = User(email="admin@example.com", hashed_password="x", full_name="Admin", role="admin", is_active=True)
+    db.add(admin)
+    db.commit()
+    return {"Authorization": f"Bearer {create_access_token({'sub': admin.email, 'role': 'admin'})}"}
+
+
+@pytest.fixture
+def user_queries():
+    """Count SELECTs against the users table on both the sync and async engines."""
+    seen = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM users" in statement:
+            seen.append(statement)
+
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", capture)
+    yield seen
+    for target in engines:
+        event.remove(target, "before_cursor_execute", capture)
+
+
+class QueryCounter:
+    """SQL statements run on the sync and async engines while the fixture is active."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @contextmanager
+    def expect(self, count: int):
+        """Assert that the block runs exactly `count` statements."""
+        start = len(self.statements)
+        yield
+        ran = self.statements[start:]
+        assert len(ran) == count, f"expected {count} statements, ran {len(ran)}:\n" + "\n".join(ran)
+
+
+@pytest.fixture
+def queries():
+    """Pin statement counts: `with queries.expect(2): client.get(...)`."""
+    counter = QueryCounter()
+    engines = (engine, async_engine.sync_engine)
+    for target in engines:
+        event.listen(target, "before_cursor_execute", counter)
+    yield counter
+    for target in engines:
+        event.remove(target, "before_cursor_execute", counter)
@@ -0,0 +1,131 @@
+﻿"""Response compression tests: negotiation, thresholds, streaming and precompressed cache entries."""
+
+import asyncio
+import zlib
+
+import pytest
+from sqlalchemy import insert
+
+from backend.app.core import compression, response_cache
+from backend.app.core.compression import ENCODINGS, CompressionMiddleware, negotiate
+from backend.app.crud import task as crud_task
+from backend.app.models.task import Task
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+def test_negotiate():
+    assert negotiate(None) is None
+    assert negotiate("identity") is None
+    assert negotiate("gzip;q=0") is None
+    assert negotiate("*;q=0") is None
+    assert negotiate("deflate, gzip;q=0.5") == "gzip"
+    assert negotiate("*") == ENCODINGS[0]
+    assert negotiate("br, gzip") == ENCODINGS[0]
+    assert negotiate("br;q=0.1, gzip") == "gzip"
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = client.get("/api/v1/health/live", headers=GZIP)
+    assert "content-encoding" not in response.headers
+
+
+def test_large_lists_are_compressed(client, db, user, auth_headers):
+    db.execute(insert(Task), [{"title": f"task {i}", "description": "notes " * 20, "owner_id": user.id} for i in range(100)])
+    db.commit()
+    plain = client.get("/api/v1/tasks/", params={"limit": 100}, headers={**auth_headers, "Accept-Encoding": "identity"})
+    packed = client.get("/api/v1/tasks/", params={"limit": 100}, headers={**auth_headers, **GZIP})
+    assert "content-encoding" not in plain.headers
+    assert packed.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in packed.headers["vary"]
+    assert packed.headers["etag"] == plain.headers["etag"]
+    assert packed.content == plain.content  # decoded by the client
+    assert packed.num_bytes_downloaded < plain.num_bytes_downloaded / 5
+    assert int(packed.headers["content-length"]) == packed.num_bytes_downloaded
+
+
+def test_not_modified_is_not_compressed(client, auth_headers):
+    client.post("/api/v1/tasks/bulk", json={"items": [{"title": "x" * 200} for _ in range(20)]}, headers=auth_headers)
+    etag = client.get("/api/v1/tasks/", headers=auth_headers).headers["etag"]
+    response = client.get("/api/v1/tasks/", headers={**auth_headers, **GZIP, "If-None-Match": etag})
+    assert response.status_code == 304 and "content-encoding" not in response.headers
+
+
+def test_streamed_export_is_compressed(client, db, user, auth_headers, monkeypatch):
+    db.execute(insert(Task), [{"title": f"task {i}", "owner_id": user.id} for i in range(50)])
+    db.commit()
+    original = crud_task.stream_tasks_async
+    monkeypatch.setattr(crud_task, "stream_tasks_async", lambda *a, **kw: original(*a, **kw, batch_size=10))
+    response = client.get("/api/v1/tasks/export", headers={**auth_headers, **GZIP})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert len(response.text.splitlines()) == 50
+
+
+def test_streamed_chunks_are_flushed():
+    """Each body chunk is compressed and flushed on its own, so it decodes as soon as it arrives."""
+    lines = [b'{"id": %d}\n' % i for i in range(3)]
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/x-ndjson")]})
+        for i, line in enumerate(lines):
+            await send({"type": "http.response.body", "body": line, "more_body": i < len(lines) - 1})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=1024)(scope, None, send))
+    start, *bodies = sent
+    assert (b"content-encoding", b"gzip") in start["headers"]
+    decoder = zlib.decompressobj(31)
+    assert [decoder.decompress(message["body"]) for message in bodies] == lines
+    assert [message["more_body"] for message in bodies] == [True, True, False]
+
+
+def test_event_streams_are_not_compressed():
+    """SSE chunks pass through as written, so each event reaches the client when it is sent."""
+    events = [b"retry: 3000\n\n", b"event: task.created\ndata: {}\n\n"]
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/event-stream; charset=utf-8")]})
+        for i, event in enumerate(events):
+            await send({"type": "http.response.body", "body": event, "more_body": i < len(events) - 1})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip, br")]}
+    asyncio.run(CompressionMiddleware(app, minimum_size=1)(scope, None, send))
+    start, *bodies = sent
+    assert not any(name == b"content-encoding" for name, _ in start["headers"])
+    assert [message["body"] for message in bodies] == events
+
+
+def test_item_catalogue_is_precompressed_once(client, auth_headers, monkeypatch):
+    calls = []
+    monkeypatch.setattr(response_cache, "compress", lambda data, encoding, precompress: calls.append(encoding) or compression.compress(data, encoding, precompress))
+    for i in range(20):
+        client.post("/api/v1/items/", json={"title": f"item {i}", "description": "oak " * 20}, headers=auth_headers)
+
+    first = client.get("/api/v1/items/", headers=GZIP)
+    again = client.get("/api/v1/items/", headers=GZIP)
+    assert first.headers["content-encoding"] == again.headers["content-encoding"] == "gzip"
+    assert again.content == first.content and calls == ["gzip"]
+
+    client.post("/api/v1/items/", json={"title": "new"}, headers=auth_headers)
+    assert client.get("/api/v1/items/", headers=GZIP).json()[-1]["title"] == "new"
+    assert calls == ["gzip", "gzip"]
+    assert "content-encoding" not in client.get("/api/v1/items/", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_brotli_when_installed(client, auth_headers):
+    pytest.importorskip("brotli")
+    client.post("/api/v1/tasks/bulk", json={"items": [{"title": "y" * 200} for _ in range(20)]}, headers=auth_headers)
+    response = client.get("/api/v1/tasks/", headers={**auth_headers, "Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert len(response.json()["data"]) == 20
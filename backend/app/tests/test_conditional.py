@@ -0,0 +1,102 @@
+﻿"""ETag / If-None-Match / If-Match tests for tasks and items."""
+
+import pytest
+from sqlalchemy.orm.exc import StaleDataError
+
+from backend.app.api.v1.conditional import etag_matches
+from backend.app.crud import task as crud_task
+from backend.app.db.session import SessionLocal
+from backend.app.models.task import Task
+
+
+def _put_body(title, status="open"):
+    return {"title": title, "description": None, "status": status}
+
+
+def test_etag_matching():
+    """Weak comparison over comma-separated lists, plus the wildcard."""
+    assert etag_matches('W/"task-1-v2"', 'W/"task-1-v2"')
+    assert etag_matches('"x", W/"task-1-v2"', 'W/"task-1-v2"')
+    assert etag_matches("*", 'W/"task-1-v2"')
+    assert not etag_matches('W/"task-1-v1"', 'W/"task-1-v2"')
+    assert not etag_matches(None, 'W/"task-1-v2"')
+
+
+def test_task_read_not_modified(client, auth_headers):
+    """A matching If-None-Match gets a bodiless 304 until the task changes."""
+    task = client.post("/api/v1/tasks/", json={"title": "poll me"}, headers=auth_headers).json()
+    first = client.get(f"/api/v1/tasks/{task['id']}", headers=auth_headers)
+    etag = first.headers["ETag"]
+    assert etag.startswith('W/"')
+
+    cached = client.get(f"/api/v1/tasks/{task['id']}", headers={**auth_headers, "If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b"" and cached.headers["ETag"] == etag
+
+    client.put(f"/api/v1/tasks/{task['id']}", json=_put_body("changed"), headers=auth_headers)
+    fresh = client.get(f"/api/v1/tasks/{task['id']}", headers={**auth_headers, "If-None-Match": etag})
+    assert fresh.status_code == 200 and fresh.json()["title"] == "changed"
+    assert fresh.headers["ETag"] != etag
+
+
+def test_task_list_not_modified(client, auth_headers):
+    """List ETags cover the rows, their versions and the page metadata."""
+    ids = [t["id"] for t in client.post(
+        "/api/v1/tasks/bulk", json={"items": [{"title": "a"}, {"title": "b"}]}, headers=auth_headers
+    ).json()["data"]]
+    etag = client.get("/api/v1/tasks/", headers=auth_headers).headers["ETag"]
+    conditional = {**auth_headers, "If-None-Match": etag}
+    assert client.get("/api/v1/tasks/", headers=conditional).status_code == 304
+    assert client.get("/api/v1/tasks/", params={"limit": 1}, headers=conditional).status_code == 200
+
+    # bulk updates bump the version counter too
+    client.patch("/api/v1/tasks/bulk", json={"items": [{"id": ids[0], "status": "done"}]}, headers=auth_headers)
+    assert client.get("/api/v1/tasks/", headers=conditional).status_code == 200
+
+
+def test_item_reads_not_modified(client, auth_headers):
+    item = client.post("/api/v1/items/", json={"title": "Lamp"}, headers=auth_headers).json()
+    for path in ("/api/v1/items/", f"/api/v1/items/{item['id']}"):
+        etag = client.get(path).headers["ETag"]
+        assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+    etag = client.get(f"/api/v1/items/{item['id']}").headers["ETag"]
+    client.put(f"/api/v1/items/{item['id']}", json={"title": "Lamp v2"}, headers=auth_headers)
+    assert client.get(f"/api/v1/items/{item['id']}", headers={"If-None-Match": etag}).status_code == 200
+
+
+@pytest.mark.parametrize("kind", ["tasks", "items"])
+def test_if_match_rejects_lost_updates(client, auth_headers, kind):
+    """A PUT naming an outdated version is refused; the current one goes through."""
+    created = client.post(f"/api/v1/{kind}/", json={"title": "v1"}, headers=auth_headers).json()
+    path = f"/api/v1/{kind}/{created['id']}"
+    stale = client.get(path, headers=auth_headers).headers["ETag"]
+    current = client.put(path, json=_put_body("v2"), headers=auth_headers).headers["ETag"]
+
+    rejected = client.put(path, json=_put_body("lost"), headers={**auth_headers, "If-Match": stale})
+    assert rejected.status_code == 412 and rejected.headers["ETag"] == current
+    assert client.get(path, headers=auth_headers).json()["title"] == "v2"
+
+    accepted = client.put(path, json=_put_body("v3"), headers={**auth_headers, "If-Match": current})
+    assert accepted.status_code == 200 and accepted.headers["ETag"] != current
+    assert client.put(path, json=_put_body("v4"), headers={**auth_headers, "If-Match": "*"}).status_code == 200
+
+
+def test_version_counter_catches_races(db, user, client, auth_headers, monkeypatch):
+    """A write that lands between the If-Match check and the UPDATE still fails."""
+    db.add(Task(title="shared", owner_id=user.id))
+    db.commit()
+    task = db.query(Task).one()
+    with SessionLocal() as other:
+        other.get(Task, task.id).title = "first writer"
+        other.commit()
+    task.title = "second writer"
+    with pytest.raises(StaleDataError):
+        db.commit()
+    db.rollback()
+
+    async def racing_update(*args, **kwargs):
+        raise StaleDataError("UPDATE statement on table 'tasks' expected to update 1 row(s); 0 were matched.")
+
+    monkeypatch.setattr(crud_task, "update_task_async", racing_update)
+    response = client.put(f"/api/v1/tasks/{task.id}", json=_put_body("late"), headers=auth_headers)
+    assert response.status_code == 412
@@ -0,0 +1,76 @@
+﻿"""Fast list path tests: column rows serialized to bytes match the response_model output."""
+
+import pytest
+from sqlalchemy import event
+
+from backend.app.api.v1 import items as items_api
+from backend.app.api.v1 import tasks as tasks_api
+from backend.app.crud import item as crud_item
+from backend.app.crud import task as crud_task
+from backend.app.crud.item import item_responses
+from backend.app.models.task import Task
+from backend.app.schemas.item import ItemRead, ItemRow
+from backend.app.schemas.task import TaskOut, TaskRow
+
+
+def _both_paths(client, monkeypatch, path, **kwargs):
+    """(fast response, ORM + response_model response) for the same request."""
+    bodies = []
+    for fast in (True, False):
+        monkeypatch.setattr(tasks_api, "FAST_LIST_RESPONSES", fast)
+        monkeypatch.setattr(items_api, "FAST_LIST_RESPONSES", fast)
+        item_responses.clear()
+        bodies.append(client.get(path, **kwargs))
+    return bodies
+
+
+def _required(typed_dict):
+    return [key for key in typed_dict.__annotations__ if key in typed_dict.__required_keys__]
+
+
+def test_row_shapes_match_models():
+    """The selected columns and row dicts follow the models' field order (the JSON key order)."""
+    assert _required(TaskRow) == list(TaskOut.model_fields) == list(crud_task.LIST_FIELDS)
+    assert _required(ItemRow) == list(ItemRead.model_fields) == list(crud_item.LIST_FIELDS)
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"limit": 2, "sort": "created_asc"},
+    {"mode": "cursor", "limit": 2, "include_total": True},
+    {"q": "report", "status": "open"},
+])
+def test_task_pages_are_identical(client, auth_headers, monkeypatch, params):
+    client.post("/api/v1/tasks/bulk", json={"items": [
+        {"title": "quarterly report", "description": "numbers"},
+        {"title": "report draft", "status": "done"},
+        {"title": "groceries", "description": None},
+    ]}, headers=auth_headers)
+    fast, slow = _both_paths(client, monkeypatch, "/api/v1/tasks/", params=params, headers=auth_headers)
+    assert fast.status_code == slow.status_code == 200
+    assert fast.content == slow.content
+    assert fast.headers["ETag"] == slow.headers["ETag"]
+    assert fast.headers["content-type"] == slow.headers["content-type"]
+
+
+def test_item_list_is_identical(client, auth_headers, monkeypatch):
+    for title in ("Lamp", "Desk"):
+        client.post("/api/v1/items/", json={"title": title, "description": "oak"}, headers=auth_headers)
+    fast, slow = _both_paths(client, monkeypatch, "/api/v1/items/")
+    assert fast.content == slow.content and fast.headers["ETag"] == slow.headers["ETag"]
+
+
+def test_fast_path_loads_no_orm_objects(client, auth_headers, monkeypatch):
+    client.post("/api/v1/tasks/bulk", json={"items": [{"title": f"t{i}"} for i in range(5)]}, headers=auth_headers)
+    loaded = []
+
+    def on_load(target, context):
+        loaded.append(target)
+
+    event.listen(Task, "load", on_load)
+    try:
+        fast, _ = _both_paths(client, monkeypatch, "/api/v1/tasks/", headers=auth_headers)
+    finally:
+        event.remove(Task, "load", on_load)
+    assert len(fast.json()["data"]) == 5
+    assert len(loaded) == 5  # all from the response_model request
@@ -0,0 +1,124 @@
+﻿"""Response cache tests for the public item routes."""
+
+import asyncio
+
+import pytest
+
+from backend.app.core.cache import RedisCache, TTLCache
+from backend.app.core.response_cache import ResponseCache
+from backend.app.crud.item import item_responses
+
+
+def test_hits_skip_the_database(client, auth_headers, queries):
+    """A warm list or item is served as stored bytes without touching the database."""
+    item = client.post("/api/v1/items/", json={"title": "Lamp"}, headers=auth_headers).json()
+    for path in ("/api/v1/items/", f"/api/v1/items/{item['id']}"):
+        first = client.get(path)
+        with queries.expect(0):
+            again = client.get(path)
+        assert again.content == first.content and again.headers["ETag"] == first.headers["ETag"]
+        assert again.headers["content-type"] == "application/json"
+    assert client.get("/api/v1/items/").json() == [item]
+
+
+def test_writes_invalidate(client, auth_headers, admin_headers):
+    """Create, update and delete are all visible on the next read."""
+    lamp = client.post("/api/v1/items/", json={"title": "Lamp"}, headers=auth_headers).json()
+    assert [i["title"] for i in client.get("/api/v1/items/").json()] == ["Lamp"]
+
+    client.post("/api/v1/items/", json={"title": "Desk"}, headers=auth_headers)
+    assert [i["title"] for i in client.get("/api/v1/items/").json()] == ["Lamp", "Desk"]
+
+    client.put(f"/api/v1/items/{lamp['id']}", json={"title": "Lamp v2"}, headers=auth_headers)
+    assert client.get(f"/api/v1/items/{lamp['id']}").json()["title"] == "Lamp v2"
+
+    client.delete(f"/api/v1/items/{lamp['id']}", headers=admin_headers)
+    assert client.get(f"/api/v1/items/{lamp['id']}").status_code == 404
+    assert [i["title"] for i in client.get("/api/v1/items/").json()] == ["Desk"]
+
+
+def test_missing_items_are_not_cached(client, auth_headers):
+    assert client.get("/api/v1/items/1").status_code == 404
+    client.post("/api/v1/items/", json={"title": "Lamp"}, headers=auth_headers)
+    assert client.get("/api/v1/items/1").status_code == 200
+
+
+def _counting_fill(calls, delay=0.01):
+    async def fill():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return 'W/"x"', b"[]"
+    return fill
+
+
+@pytest.mark.parametrize("backend", ["memory", "redis"])
+def test_concurrent_misses_fill_once(backend):
+    """A stampede on a cold key runs the fill once; everyone gets its result."""
+    if backend == "redis":
+        fakeredis = pytest.importorskip("fakeredis")
+        store = RedisCache(fakeredis.FakeRedis(), prefix="resp", ttl=30, raw=True)
+    else:
+        store = TTLCache(maxsize=16, ttl=30)
+    cache = ResponseCache(store, lock_seconds=1, poll_seconds=0.001)
+    calls = []
+
+    async def stampede():
+        return await asyncio.gather(*(cache.get_or_fill("list", _counting_fill(calls)) for _ in range(50)))
+
+    results = asyncio.run(stampede())
+    assert results == [('W/"x"', b"[]")] * 50
+    assert len(calls) == 1 and cache.stats()["fills"] == 1
+
+    cache.invalidate()
+    asyncio.run(stampede())
+    assert len(calls) == 2
+
+
+def test_other_process_waits_for_lock_holder():
+    """With Redis, a second process polls for the holder's entry instead of filling too."""
+    fakeredis = pytest.importorskip("fakeredis")
+    server = fakeredis.FakeServer()
+    one, two = (
+        ResponseCache(RedisCache(fakeredis.FakeRedis(server=server), prefix="resp", ttl=30, raw=True), poll_seconds=0.001)
+        for _ in range(2)
+    )
+    calls = []
+
+    async def both():
+        first = asyncio.ensure_future(one.get_or_fill("list", _counting_fill(calls, delay=0.05)))
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(first, two.get_or_fill("list", _counting_fill(calls)))
+
+    assert asyncio.run(both()) == [('W/"x"', b"[]")] * 2
+    assert len(calls) == 1
+
+
+def test_failed_fill_reaches_every_waiter():
+    cache = ResponseCache(TTLCache(maxsize=4, ttl=30))
+
+    async def broken():
+        await asyncio.sleep(0.01)
+        raise LookupError("gone")
+
+    async def stampede():
+        return await asyncio.gather(*(cache.get_or_fill("k", broken) for _ in range(3)), return_exceptions=True)
+
+    assert [type(r) for r in asyncio.run(stampede())] == [LookupError] * 3
+    assert cache.stats()["fills"] == 0
+
+
+def test_byte_budget_evicts_oldest():
+    cache = TTLCache(maxsize=100, ttl=30, maxbytes=10)
+    cache.set("a", b"1234")
+    cache.set("b", b"1234")
+    cache.set("a", b"12")  # replacing an entry releases its old size
+    assert cache.stats()["bytes"] == 6
+    cache.set("c", b"12345")
+    assert cache.get("b") is None and cache.get("a") == b"12" and cache.get("c") == b"12345"
+    assert cache.stats()["bytes"] == 7 and cache.stats()["evictions"] == 1
+
+
+def test_health_reports_item_cache(client):
+    client.get("/api/v1/items/")
+    assert client.get("/api/v1/health").json()["caches"]["item_responses"]["fills"] == 1
+    assert item_responses.stats()["size"] >= 1
@@ -0,0 +1,35 @@
+﻿"""Item route tests (async stack)."""
+
+from backend.app.core.security import create_access_token
+from backend.app.models.users import User
+
+
+def test_item_crud(client, user, auth_headers, admin_headers):
+    """Create, list, read, update and delete an item through the async routes."""
+    created = client.post("/api/v1/items/", json={"title": "Lamp", "description": "desk"}, headers=auth_headers)
+    assert created.status_code == 200
+    item = created.json()
+    assert item["owner_id"] == user.id
+
+    assert [i["id"] for i in client.get("/api/v1/items/").json()] == [item["id"]]
+    assert client.get(f"/api/v1/items/{item['id']}").json()["title"] == "Lamp"
+
+    updated = client.put(
+        f"/api/v1/items/{item['id']}", json={"title": "Lamp v2", "description": None}, headers=auth_headers
+    )
+    assert updated.json()["title"] == "Lamp v2"
+
+    assert client.delete(f"/api/v1/items/{item['id']}", headers=auth_headers).status_code == 403
+    assert client.delete(f"/api/v1/items/{item['id']}", headers=admin_headers).status_code == 200
+    assert client.get(f"/api/v1/items/{item['id']}").status_code == 404
+
+
+def test_item_update_requires_owner(client, auth_headers, db):
+    """Only the owner (or an admin) may edit an item."""
+    item = client.post("/api/v1/items/", json={"title": "Mine"}, headers=auth_headers).json()
+    other = User(email="other@example.com", hashed_password="x", full_name="Other", role="user", is_active=True)
+    db.add(other)
+    db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': other.email, 'role': 'user'})}"}
+    response = client.put(f"/api/v1/items/{item['id']}", json={"title": "Yours"}, headers=headers)
+    assert response.status_code == 403
@@ -0,0 +1,64 @@
+﻿"""view=compact tests: list routes read and return only the start of long descriptions."""
+
+from backend.app.core.config import LIST_DESCRIPTION_CHARS
+from backend.app.crud.projection import as_dicts
+
+LONG = "word " * 1000
+
+
+def test_truncation_boundary():
+    chars = 5
+    rows = [("12345",), ("123456",), (None,)]  # as selected: at most chars + 1
+    assert as_dicts(rows, ["description"], {"description": chars}) == [
+        {"description": "12345", "description_truncated": False},
+        {"description": "12345", "description_truncated": True},
+        {"description": None, "description_truncated": False},
+    ]
+
+
+def test_compact_task_list(client, auth_headers, queries):
+    long = client.post("/api/v1/tasks/", json={"title": "long", "description": LONG}, headers=auth_headers).json()
+    client.post("/api/v1/tasks/", json={"title": "short", "description": "brief"}, headers=auth_headers)
+    client.post("/api/v1/tasks/", json={"title": "none"}, headers=auth_headers)
+    queries.statements.clear()
+
+    body = client.get("/api/v1/tasks/", params={"view": "compact"}, headers=auth_headers).json()
+    by_title = {row["title"]: row for row in body["data"]}
+    assert by_title["long"]["description"] == LONG[:LIST_DESCRIPTION_CHARS]
+    assert by_title["long"]["description_truncated"] is True
+    assert (by_title["short"]["description"], by_title["short"]["description_truncated"]) == ("brief", False)
+    assert (by_title["none"]["description"], by_title["none"]["description_truncated"]) == (None, False)
+    assert body["meta"]["view"] == "compact"
+    page_sql = next(sql for sql in queries.statements if "tasks.title" in sql)
+    assert "substr(tasks.description" in page_sql
+
+    full = client.get(f"/api/v1/tasks/{long['id']}", headers=auth_headers).json()
+    assert full["description"] == LONG
+
+
+def test_compact_changes_the_etag(client, auth_headers):
+    client.post("/api/v1/tasks/", json={"title": "a", "description": LONG}, headers=auth_headers)
+    full = client.get("/api/v1/tasks/", headers=auth_headers)
+    compact = client.get("/api/v1/tasks/", params={"view": "compact"}, headers=auth_headers)
+    assert full.headers["ETag"] != compact.headers["ETag"]
+    assert "description_truncated" not in full.json()["data"][0]
+    assert len(compact.content) < len(full.content)
+
+
+def test_compact_with_fields(client, auth_headers):
+    client.post("/api/v1/tasks/", json={"title": "a", "description": LONG}, headers=auth_headers)
+    without = client.get("/api/v1/tasks/", params={"view": "compact", "fields": "id,title"}, headers=auth_headers).json()
+    assert list(without["data"][0]) == ["title", "id"]
+    with_description = client.get("/api/v1/tasks/", params={"view": "compact", "fields": "description"}, headers=auth_headers).json()
+    assert with_description["data"][0]["description_truncated"] is True
+
+
+def test_compact_item_list(client, auth_headers):
+    item = client.post("/api/v1/items/", json={"title": "Lamp", "description": LONG}, headers=auth_headers).json()
+    compact = client.get("/api/v1/items/", params={"view": "compact"})
+    full = client.get("/api/v1/items/")
+    assert compact.json()[0]["description"] == LONG[:LIST_DESCRIPTION_CHARS]
+    assert compact.json()[0]["description_truncated"] is True
+    assert full.json()[0]["description"] == LONG  # cached separately
+    assert compact.headers["ETag"] != full.headers["ETag"]
+    assert client.get(f"/api/v1/items/{item['id']}").json()["description"] == LONG
@@ -0,0 +1,102 @@
+﻿"""Login throttling and failed-login cache tests."""
+
+import pytest
+
+from backend.app.api.v1 import auth
+from backend.app.core.password_pool import password_pool
+from backend.app.core.rate_limit import RedisSlidingWindowLimiter, SlidingWindowLimiter
+from backend.app.core.security import get_password_hash
+from backend.app.models.users import User
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def account(db):
+    user = User(email="login@example.com", hashed_password=get_password_hash("right"), full_name="L", role="user", is_active=True)
+    db.add(user)
+    db.commit()
+    return user
+
+
+def login(client, email, password):
+    return client.post("/api/v1/auth/token", data={"username": email, "password": password})
+
+
+def verifications():
+    return password_pool.hash_time.count
+
+
+def test_sliding_window_limiter():
+    """Events leave the window one by one; retry_after points at the next slot."""
+    clock = FakeClock()
+    limiter = SlidingWindowLimiter(limit=2, window=10, clock=clock)
+    limiter.record("k")
+    clock.now += 4
+    limiter.record("k")
+    assert limiter.retry_after("k") == 6
+    clock.now += 6
+    assert limiter.retry_after("k") == 0
+    limiter.record("k")
+    limiter.reset("k")
+    assert limiter.retry_after("k") == 0
+
+
+def test_redis_sliding_window_limiter():
+    fakeredis = pytest.importorskip("fakeredis")
+    clock = FakeClock()
+    limiter = RedisSlidingWindowLimiter(fakeredis.FakeRedis(), "rl", limit=2, window=10, clock=clock)
+    limiter.record("k")
+    limiter.record("k")
+    assert limiter.retry_after("k") == 10
+    clock.now += 10
+    assert limiter.retry_after("k") == 0
+
+
+def test_unknown_email_is_cached(client, user_queries):
+    """A repeated unknown email is refused without a query."""
+    assert login(client, "ghost@example.com", "x").status_code == 401
+    assert len(user_queries) == 1
+    assert login(client, "ghost@example.com", "y").status_code == 401
+    assert len(user_queries) == 1
+
+
+def test_repeated_bad_password_skips_bcrypt(client, account):
+    """The same wrong password is not verified twice; a different one is."""
+    before = verifications()
+    assert login(client, account.email, "wrong").status_code == 401
+    assert login(client, account.email, "wrong").status_code == 401
+    assert verifications() == before + 1
+    assert login(client, account.email, "wrong-2").status_code == 401
+    assert verifications() == before + 2
+    assert login(client, account.email, "right").status_code == 200
+
+
+def test_email_lockout(client, account, user_queries):
+    """After too many failures even the right password gets a 429, before any query or hash."""
+    for i in range(auth.login_email_limiter.limit):
+        assert login(client, account.email, f"wrong-{i}").status_code == 401
+    queries, before = len(user_queries), verifications()
+    response = login(client, account.email, "right")
+    assert response.status_code == 429 and int(response.headers["Retry-After"]) > 0
+    assert (len(user_queries), verifications()) == (queries, before)
+
+
+def test_ip_lockout(client, monkeypatch):
+    """One client cycling through emails is throttled per IP."""
+    monkeypatch.setattr(auth.login_ip_limiter, "limit", 3)
+    statuses = [login(client, f"victim{i}@example.com", "x").status_code for i in range(4)]
+    assert statuses == [401, 401, 401, 429]
+
+
+def test_registration_clears_unknown_email(client):
+    """An email cached as unknown can log in once it registers."""
+    assert login(client, "late@example.com", "pw").status_code == 401
+    client.post("/api/v1/auth/register", json={"email": "late@example.com", "password": "pw", "full_name": "Late"})
+    assert login(client, "late@example.com", "pw").status_code == 200
@@ -0,0 +1,76 @@
+﻿"""Prometheus /metrics tests."""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+from prometheus_client.parser import text_string_to_metric_families
+
+from backend.app.core import metrics
+
+
+def _samples(client):
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(response.text)
+        for sample in family.samples
+    }
+
+
+def _value(samples, name, **labels):
+    return samples.get((name, tuple(sorted(labels.items()))), 0.0)
+
+
+def test_router_label():
+    assert metrics.router_label("/api/v1/tasks/12") == "tasks"
+    assert metrics.router_label("/api/v1/auth/token") == "auth"
+    assert metrics.router_label("/api/v1/unknown/x") == "other"
+    assert metrics.router_label("/metrics") == "other"
+
+
+def test_request_cache_and_password_metrics(client, auth_headers):
+    before = _samples(client)
+    client.get("/api/v1/tasks/", headers=auth_headers)
+    client.get("/api/v1/tasks/", headers=auth_headers)
+    client.get("/api/v1/profile/", headers=auth_headers)
+    client.get("/api/v1/profile/", headers=auth_headers)
+    client.post("/api/v1/auth/register", json={"email": "m@example.com", "password": "pw", "full_name": "M"})
+    after = _samples(client)
+
+    def delta(name, **labels):
+        return _value(after, name, **labels) - _value(before, name, **labels)
+
+    assert delta("http_request_duration_seconds_count", router="tasks", method="GET", status="200") == 2
+    assert delta("http_request_duration_seconds_count", router="auth", method="POST", status="200") == 1
+    assert delta("cache_lookups_total", cache="user", result="hit") == 1
+    assert delta("cache_lookups_total", cache="user", result="miss") == 1
+    assert delta("password_hash_seconds_count") == 1
+    assert _value(after, "http_requests_in_flight", router="tasks") == 0
+    assert ("db_pool_checked_out_connections", (("engine", "sync"),)) in after
+
+
+def test_multiprocess_aggregation(tmp_path):
+    """Samples written by separate worker processes are summed by /metrics."""
+    env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path))
+    worker = textwrap.dedent("""
+        from backend.app.core import metrics
+        metrics.REQUEST_LATENCY.labels("tasks", "GET", "200").observe(0.01)
+    """)
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], env=env, check=True)
+    render = textwrap.dedent("""
+        from backend.app.core import metrics
+        print(metrics.render()[0].decode())
+    """)
+    text = subprocess.run([sys.executable, "-c", render], env=env, check=True, capture_output=True, text=True).stdout
+    counts = [
+        sample.value
+        for family in text_string_to_metric_families(text)
+        for sample in family.samples
+        if sample.name == "http_request_duration_seconds_count" and sample.labels.get("router") == "tasks"
+    ]
+    assert counts == [2.0]
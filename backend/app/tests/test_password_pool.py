@@ -0,0 +1,65 @@
+﻿"""Password hashing pool tests."""
+
+import asyncio
+
+import pytest
+
+from backend.app.core.password_pool import PasswordPool, PasswordPoolBusy, password_pool
+from backend.app.core.security import pwd_context, verify_password
+from backend.app.crud import users as crud_users
+from backend.app.models.users import User
+
+
+def test_register_and_login(client):
+    """Register hashes off the event loop; login verifies and records timings."""
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"email": "new@example.com", "password": "s3cret", "full_name": "New"},
+    )
+    assert response.status_code == 200
+    login = client.post("/api/v1/auth/token", data={"username": "new@example.com", "password": "s3cret"})
+    assert login.status_code == 200 and login.json()["access_token"]
+    assert client.post("/api/v1/auth/token", data={"username": "new@example.com", "password": "nope"}).status_code == 401
+
+    stats = client.get("/api/v1/health").json()["password_pool"]
+    assert stats["hash_time"]["count"] >= 3 and stats["queue_wait"]["count"] >= 3
+
+
+def test_login_rehashes_outdated_cost(client, db):
+    """A hash below the configured cost is upgraded without revoking tokens."""
+    weak = pwd_context.handler("bcrypt").using(rounds=4).hash("s3cret")
+    user = User(email="old@example.com", hashed_password=weak, full_name="Old", role="user", is_active=True)
+    db.add(user)
+    db.commit()
+
+    assert client.post("/api/v1/auth/token", data={"username": user.email, "password": "s3cret"}).status_code == 200
+    db.refresh(user)
+    assert user.hashed_password != weak and not pwd_context.needs_update(user.hashed_password)
+    assert verify_password("s3cret", user.hashed_password)
+    assert user.token_version == 0 and crud_users.min_token_version(user.id) == 0
+
+
+def test_saturated_pool_returns_503(client, user, monkeypatch):
+    """Login fails fast while the pool is at its in-flight limit."""
+    monkeypatch.setattr(password_pool, "in_flight", password_pool.limit)
+    response = client.post("/api/v1/auth/token", data={"username": user.email, "password": "x"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_pool_rejects_beyond_limit():
+    """workers + queue_depth calls may be in flight; the next one is rejected."""
+    pool = PasswordPool(workers=1, queue_depth=0)
+
+    async def scenario():
+        first = asyncio.create_task(pool.hash("a"))
+        await asyncio.sleep(0)
+        with pytest.raises(PasswordPoolBusy):
+            await pool.hash("b")
+        return await first
+
+    try:
+        assert verify_password("a", asyncio.run(scenario()))
+    finally:
+        pool.shutdown()
+    assert pool.stats()["rejected"] == 1 and pool.in_flight == 0
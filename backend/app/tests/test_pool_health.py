@@ -0,0 +1,63 @@
+﻿"""Connection pool and health endpoint tests."""
+
+import pytest
+from sqlalchemy import create_engine, exc
+
+from backend.app.db import session as db_session
+from backend.app.db.pool import TimedQueuePool, pool_status
+from backend.app.main import app
+
+
+def test_pool_times_out_and_records_it(tmp_path):
+    """An exhausted pool raises after pool_timeout and counts the timeout."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    held = engine.connect()
+    try:
+        status = pool_status(engine.pool)
+        assert (status["checked_out"], status["utilization"], status["saturated"]) == (1, 1.0, True)
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    finally:
+        held.close()
+    status = pool_status(engine.pool)
+    assert status["timeouts"] == 1 and status["checkouts"] == 2 and status["max_wait_ms"] >= 50
+    assert status["saturated"] is False
+    engine.dispose()
+
+
+def test_pool_timeout_returns_503(client, auth_headers):
+    """A checkout timeout is answered with 503 instead of a 500."""
+    def exhausted():
+        raise exc.TimeoutError("QueuePool limit reached")
+        yield  # pragma: no cover
+
+    app.dependency_overrides[db_session.get_db] = exhausted
+    try:
+        response = client.get("/api/v1/profile/", headers=auth_headers)
+    finally:
+        app.dependency_overrides.clear()
+    assert response.status_code == 503 and response.headers["Retry-After"] == "1"
+
+
+def test_liveness(client):
+    assert client.get("/api/v1/health/live").json() == {"status": "ok"}
+
+
+def test_readiness_and_health(client):
+    ready = client.get("/api/v1/health/ready")
+    assert ready.status_code == 200
+    body = ready.json()
+    assert body["status"] == "ready" and body["database"] == {"ok": True}
+    assert body["pools"]["sync"]["class"] == "TimedQueuePool"
+    assert {"size", "checked_out", "utilization", "avg_wait_ms", "timeouts"} <= set(body["pools"]["sync"])
+
+    health = client.get("/api/v1/health").json()
+    assert health["status"] == "ok" and "caches" in health and "password_pool" in health
+
+
+def test_readiness_fails_when_pool_saturated(client, monkeypatch):
+    monkeypatch.setattr("backend.app.main.pool_status", lambda pool: {"class": "TimedQueuePool", "saturated": True})
+    response = client.get("/api/v1/health/ready")
+    assert response.status_code == 503
+    assert response.json()["database"] == {"ok": False, "error": "pool saturated"}
+    assert client.get("/api/v1/health").json()["status"] == "degraded"
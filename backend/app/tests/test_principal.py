@@ -0,0 +1,93 @@
+﻿"""Stateless access-token (Principal) tests."""
+
+import pytest
+
+from backend.app.core.security import create_access_token, user_token_claims
+from backend.app.crud import users as crud_users
+
+
+def test_task_requests_do_not_load_user(client, auth_headers, user_queries):
+    """Task routes authenticate from the token claims alone."""
+    assert client.post("/api/v1/tasks/", json={"title": "t"}, headers=auth_headers).status_code == 201
+    assert client.get("/api/v1/tasks/", headers=auth_headers).status_code == 200
+    assert user_queries == []
+
+
+def test_token_version_is_read_once_on_a_miss(client, auth_headers, user_queries):
+    crud_users.token_versions.clear()
+    for _ in range(2):
+        assert client.get("/api/v1/tasks/", headers=auth_headers).status_code == 200
+    assert len(user_queries) == 1 and "users.token_version" in user_queries[0]
+
+
+def test_login_issues_claim_token(client, db, user):
+    """The login endpoint issues a token carrying uid/role/active/ver."""
+    from jose import jwt
+    from backend.app.core.config import SECRET_KEY, ALGORITHM
+    from backend.app.core.security import get_password_hash
+
+    user.hashed_password = get_password_hash("secret")
+    db.commit()
+    response = client.post("/api/v1/auth/token", data={"username": user.email, "password": "secret"})
+    claims = jwt.decode(response.json()["access_token"], SECRET_KEY, algorithms=[ALGORITHM])
+    assert (claims["uid"], claims["role"], claims["active"], claims["ver"]) == (user.id, "user", True, 1)
+
+
+@pytest.mark.parametrize("field,value", [("role", "admin"), ("hashed_password", "changed"), ("is_active", False)])
+def test_sensitive_change_revokes_tokens(client, db, user, auth_headers, field, value):
+    """Changing the password, role or active flag revokes earlier tokens."""
+    assert client.get("/api/v1/tasks/", headers=auth_headers).status_code == 200
+    setattr(user, field, value)
+    db.commit()
+    assert user.token_version == 1
+    assert client.get("/api/v1/tasks/", headers=auth_headers).status_code == 401
+    assert client.get("/api/v1/auth/me", headers=auth_headers).status_code == 401
+
+    if user.is_active:
+        fresh = {"Authorization": f"Bearer {create_access_token(user_token_claims(user))}"}
+        assert client.get("/api/v1/tasks/", headers=fresh).status_code == 200
+
+
+def test_revocation_survives_a_cache_miss(client, db, user, auth_headers):
+    """Eviction, a restart or another worker's cache: the floor is read from the row again."""
+    assert client.get("/api/v1/tasks/", headers=auth_headers).status_code == 200
+    user.role = "admin"
+    db.commit()
+    crud_users.token_versions.clear()
+    assert client.get("/api/v1/tasks/", headers=auth_headers).status_code == 401
+
+
+def test_deleted_user_tokens_rejected(client, db, user, auth_headers):
+    db.delete(user)
+    db.commit()
+    crud_users.token_versions.clear()
+    assert client.get("/api/v1/tasks/", headers=auth_headers).status_code == 401
+
+
+def test_stale_read_does_not_overwrite_a_published_version():
+    crud_users.token_versions.set("7", 3)
+    crud_users.remember_token_version(7, 2)
+    assert crud_users.min_token_version(7) == 3
+
+
+def test_profile_edit_keeps_tokens(client, db, user, auth_headers):
+    """Edits outside the token fields do not revoke anything."""
+    user.full_name = "Renamed"
+    db.commit()
+    assert user.token_version == 0
+    assert client.get("/api/v1/tasks/", headers=auth_headers).status_code == 200
+
+
+def test_inactive_claim_rejected(client, user):
+    """A token minted for an inactive user is refused."""
+    claims = dict(user_token_claims(user), active=False)
+    headers = {"Authorization": f"Bearer {create_access_token(claims)}"}
+    assert client.get("/api/v1/tasks/", headers=headers).status_code == 401
+
+
+def test_legacy_token_falls_back_to_lookup(client, user, user_queries):
+    """Tokens without a uid claim still work through the user lookup."""
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.email, 'role': user.role})}"}
+    created = client.post("/api/v1/tasks/", json={"title": "t"}, headers=headers)
+    assert created.status_code == 201 and created.json()["owner_id"] == user.id
+    assert len(user_queries) == 1
@@ -0,0 +1,77 @@
+﻿"""Column projection tests: fields= on the list routes and projected crud loads."""
+
+import pytest
+
+from backend.app.crud import users as crud_users
+from backend.app.crud.projection import parse_fields
+from backend.app.crud.task import LIST_FIELDS
+
+
+def _select_sql(queries):
+    return [sql for sql in queries.statements if sql.lstrip().upper().startswith("SELECT")]
+
+
+def test_parse_fields():
+    assert parse_fields(None, LIST_FIELDS) is None
+    assert parse_fields(" ", LIST_FIELDS) is None
+    assert parse_fields("status, id,status", LIST_FIELDS) == ("status", "id")
+    with pytest.raises(ValueError, match="unknown fields: owner, secret"):
+        parse_fields("id,secret,owner", LIST_FIELDS)
+
+
+def test_task_list_loads_only_requested_columns(client, auth_headers, queries):
+    client.post("/api/v1/tasks/", json={"title": "big", "description": "x" * 10_000}, headers=auth_headers)
+    queries.statements.clear()
+    response = client.get("/api/v1/tasks/", params={"fields": "id,title,status,created_at"}, headers=auth_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert list(body["data"][0]) == ["title", "status", "id", "created_at"]
+    assert body["meta"]["fields"] == ["title", "status", "id", "created_at"]
+    page_sql = [sql for sql in _select_sql(queries) if "tasks.title" in sql]
+    assert page_sql and all("description" not in sql for sql in page_sql)
+
+
+def test_projection_changes_the_etag(client, auth_headers):
+    client.post("/api/v1/tasks/", json={"title": "a"}, headers=auth_headers)
+    full = client.get("/api/v1/tasks/", headers=auth_headers).headers["ETag"]
+    slim = client.get("/api/v1/tasks/", params={"fields": "title,id"}, headers=auth_headers).headers["ETag"]
+    same = client.get("/api/v1/tasks/", params={"fields": "id,title"}, headers=auth_headers).headers["ETag"]
+    assert full != slim == same
+    conditional = {**auth_headers, "If-None-Match": slim}
+    assert client.get("/api/v1/tasks/", headers=conditional).status_code == 200
+    assert client.get("/api/v1/tasks/", params={"fields": "id,title"}, headers=conditional).status_code == 304
+
+
+def test_cursor_pages_with_a_projection(client, auth_headers):
+    """Cursors still work when created_at is not among the returned fields."""
+    client.post("/api/v1/tasks/bulk", json={"items": [{"title": f"t{i}"} for i in range(3)]}, headers=auth_headers)
+    params = {"mode": "cursor", "limit": 2, "fields": "title"}
+    first = client.get("/api/v1/tasks/", params=params, headers=auth_headers).json()
+    second = client.get("/api/v1/tasks/", params={**params, "cursor": first["meta"]["next_cursor"]}, headers=auth_headers).json()
+    assert [row for row in first["data"] + second["data"]] == [{"title": "t2"}, {"title": "t1"}, {"title": "t0"}]
+
+
+def test_unknown_fields_are_rejected(client, auth_headers):
+    response = client.get("/api/v1/tasks/", params={"fields": "id,version"}, headers=auth_headers)
+    assert response.status_code == 400 and "version" in response.json()["detail"]
+    assert client.get("/api/v1/items/", params={"fields": "owner"}).status_code == 400
+
+
+def test_item_list_projection(client, auth_headers):
+    client.post("/api/v1/items/", json={"title": "Lamp", "description": "oak"}, headers=auth_headers)
+    full = client.get("/api/v1/items/")
+    slim = client.get("/api/v1/items/", params={"fields": "id,title"})
+    assert slim.json() == [{"title": "Lamp", "id": full.json()[0]["id"]}]
+    assert full.json()[0]["description"] == "oak"  # cached separately
+    assert slim.headers["ETag"] != full.headers["ETag"]
+
+
+def test_user_lookup_projection(db, user, queries):
+    """Projected user loads skip unneeded columns and return immutable rows."""
+    row = crud_users.get_user_by_email(db, user.email, fields=crud_users.CACHED_USER_FIELDS)
+    assert "hashed_password" not in _select_sql(queries)[-1]
+    assert crud_users.CachedUser.from_user(row).email == user.email
+    assert not hasattr(row, "__dict__")
+    with pytest.raises(AttributeError):
+        row.email = "changed@example.com"
+    assert crud_users.get_user_by_email(db, "nobody@example.com", fields=("id",)) is None
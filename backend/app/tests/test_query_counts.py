@@ -0,0 +1,58 @@
+﻿"""Statements per endpoint. A change here is a change in database round trips."""
+
+import pytest
+
+
+@pytest.fixture
+def task(client, auth_headers):
+    return client.post("/api/v1/tasks/", json={"title": "pinned"}, headers=auth_headers).json()
+
+
+@pytest.fixture
+def item(client, auth_headers):
+    return client.post("/api/v1/items/", json={"title": "pinned"}, headers=auth_headers).json()
+
+
+def test_task_writes(client, auth_headers, queries):
+    with queries.expect(1):  # INSERT ... RETURNING
+        created = client.post("/api/v1/tasks/", json={"title": "t"}, headers=auth_headers).json()
+    assert created["created_at"] and created["updated_at"]
+    with queries.expect(2):  # SELECT, UPDATE ... RETURNING
+        updated = client.put(
+            f"/api/v1/tasks/{created['id']}", json={"title": "t2", "description": None, "status": "done"}, headers=auth_headers,
+        ).json()
+    assert updated["title"] == "t2" and updated["updated_at"]
+    with queries.expect(2):  # SELECT, DELETE
+        client.delete(f"/api/v1/tasks/{created['id']}", headers=auth_headers)
+
+
+def test_task_reads(client, auth_headers, task, queries):
+    with queries.expect(1):
+        client.get(f"/api/v1/tasks/{task['id']}", headers=auth_headers)
+    with queries.expect(2):  # count, page
+        client.get("/api/v1/tasks/", headers=auth_headers)
+    with queries.expect(1):
+        client.get("/api/v1/tasks/", params={"mode": "cursor"}, headers=auth_headers)
+
+
+def test_item_writes(client, auth_headers, item, queries):
+    with queries.expect(1):
+        client.post("/api/v1/items/", json={"title": "i"}, headers=auth_headers)
+    with queries.expect(2):
+        client.put(f"/api/v1/items/{item['id']}", json={"title": "i2", "description": None}, headers=auth_headers)
+    with queries.expect(1):
+        client.get("/api/v1/items/")
+
+
+def test_register(client, queries):
+    with queries.expect(2):  # email check, INSERT ... RETURNING
+        client.post("/api/v1/auth/register", json={"email": "q@example.com", "password": "pw", "full_name": "Q"})
+
+
+def test_profile_update(client, auth_headers, queries):
+    client.get("/api/v1/profile/", headers=auth_headers)  # warm the user cache
+    with queries.expect(2):  # load the row, UPDATE
+        response = client.put(
+            "/api/v1/profile/", json={"full_name": "N", "email": "owner@example.com", "avatar_url": None}, headers=auth_headers,
+        )
+    assert response.json()["full_name"] == "N"
@@ -0,0 +1,63 @@
+﻿"""Per-request SQL statistics tests."""
+
+import json
+import logging
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from backend.app.db import query_stats
+from backend.app.db.session import get_db
+from backend.app.models.task import Task
+
+
+@pytest.fixture
+def loop_app():
+    """A scratch app whose route issues one SELECT per id, the N+1 shape."""
+    app = FastAPI()
+    app.add_middleware(query_stats.QueryStatsMiddleware)
+
+    @app.get("/loop/{n}")
+    def loop(n: int, db: Session = Depends(get_db)):
+        for task_id in range(n):
+            db.execute(select(Task).filter(Task.id == task_id)).first()
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_fingerprint_folds_literals_and_in_lists():
+    a = query_stats.fingerprint("SELECT * FROM tasks\n WHERE id IN (?, ?, ?) LIMIT 20")
+    b = query_stats.fingerprint("SELECT * FROM tasks WHERE id IN (?, ?) LIMIT 50")
+    assert a == b == "SELECT * FROM tasks WHERE id IN (?...) LIMIT ?"
+
+
+def test_server_timing_header(client, auth_headers):
+    response = client.get("/api/v1/tasks/", headers=auth_headers)
+    timing = response.headers["server-timing"]
+    assert timing.startswith("db;dur=") and 'desc="2 queries"' in timing and "app;dur=" in timing
+
+
+def test_log_line(client, auth_headers, caplog):
+    with caplog.at_level(logging.INFO, logger=query_stats.logger.name):
+        client.get("/api/v1/tasks/", headers=auth_headers)
+    record = json.loads(caplog.records[-1].getMessage().split(" ", 1)[1])
+    assert record["path"] == "/api/v1/tasks/" and record["status"] == 200 and record["db_queries"] == 2
+
+
+def test_strict_mode_raises_on_n_plus_one(loop_app):
+    assert loop_app.get(f"/loop/{query_stats.SQL_N_PLUS_ONE_THRESHOLD - 1}").status_code == 200
+    with pytest.raises(query_stats.NPlusOneDetected):
+        loop_app.get(f"/loop/{query_stats.SQL_N_PLUS_ONE_THRESHOLD}")
+
+
+def test_n_plus_one_is_logged_when_not_strict(loop_app, monkeypatch, caplog):
+    monkeypatch.setattr(query_stats, "SQL_STRICT_N_PLUS_ONE", False)
+    with caplog.at_level(logging.INFO, logger=query_stats.logger.name):
+        assert loop_app.get(f"/loop/{query_stats.SQL_N_PLUS_ONE_THRESHOLD}").status_code == 200
+    record = caplog.records[-1]
+    assert record.levelno == logging.WARNING
+    assert json.loads(record.getMessage().split(" ", 1)[1])["n_plus_one"][0]["count"] == query_stats.SQL_N_PLUS_ONE_THRESHOLD
@@ -0,0 +1,83 @@
+﻿"""Read-replica routing tests: a second SQLite file stands in for the replica."""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from backend.app.crud.item import item_responses
+from backend.app.db import routing
+from backend.app.db.session import Base
+from backend.app.models.item import Item
+from backend.app.models.task import Task
+
+
+@pytest.fixture
+def replica(tmp_path, monkeypatch, user):
+    """A separate database wired in as the replica, seeded with rows the primary does not have."""
+    path = tmp_path / "replica.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=sync_engine)
+    factory = sessionmaker(bind=sync_engine, expire_on_commit=False)
+    with factory() as session:
+        session.add(Task(title="from replica", owner_id=user.id))
+        session.add(Item(title="replica item", owner_id=user.id))
+        session.commit()
+    routing.recent_writers.clear()  # seeding the replica is not a write through the app
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    monkeypatch.setattr(routing, "ReplicaSessionLocal", factory)
+    monkeypatch.setattr(routing, "AsyncReplicaSessionLocal", async_sessionmaker(bind=async_engine, expire_on_commit=False))
+    yield factory
+    sync_engine.dispose()
+
+
+def _titles(response):
+    body = response.json()
+    return [row["title"] for row in (body["data"] if isinstance(body, dict) else body)]
+
+
+def test_reads_use_replica_until_own_write(client, auth_headers, replica):
+    """GETs read the replica; after a write the author reads the primary for the window."""
+    assert _titles(client.get("/api/v1/tasks/", headers=auth_headers)) == ["from replica"]
+
+    created = client.post("/api/v1/tasks/", json={"title": "fresh"}, headers=auth_headers)
+    assert created.status_code == 201
+    assert _titles(client.get("/api/v1/tasks/", headers=auth_headers)) == ["fresh"]
+    assert client.get(f"/api/v1/tasks/{created.json()['id']}", headers=auth_headers).status_code == 200
+
+    routing.recent_writers.clear()  # the stickiness window has passed
+    assert _titles(client.get("/api/v1/tasks/", headers=auth_headers)) == ["from replica"]
+
+
+def test_item_catalogue_pins_after_writes(client, auth_headers, replica):
+    """The shared catalogue is read from the primary by everyone right after an item write."""
+    assert _titles(client.get("/api/v1/items/")) == ["replica item"]
+    client.post("/api/v1/items/", json={"title": "primary item"}, headers=auth_headers)
+    assert _titles(client.get("/api/v1/items/")) == ["primary item"]
+
+    routing.recent_writers.clear()
+    item_responses.clear()
+    assert _titles(client.get("/api/v1/items/")) == ["replica item"]
+
+
+def test_commit_without_writes_does_not_pin(db, user):
+    """Only commits that wrote something start the read-your-writes window."""
+    routing.track_writer(db, user.id)
+    db.commit()
+    assert not routing.pinned_to_primary(user.id)
+
+    user.full_name = "Changed"
+    db.commit()
+    assert routing.pinned_to_primary(user.id)
+
+
+def test_profile_opens_no_read_session(client, auth_headers, monkeypatch):
+    """GET /profile is served from the authenticated user, not a replica query."""
+    from backend.app.api.v1 import deps
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("read session opened")
+
+    monkeypatch.setattr(deps, "read_session", unexpected)
+    assert client.get("/api/v1/profile/", headers=auth_headers).json()["email"] == "owner@example.com"
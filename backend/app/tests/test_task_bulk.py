@@ -0,0 +1,95 @@
+﻿"""Bulk task endpoint tests."""
+
+from sqlalchemy import event
+
+from backend.app.core.security import create_access_token
+from backend.app.db.session import async_engine
+from backend.app.models.users import User
+
+
+def _bulk_create(client, headers, titles):
+    response = client.post("/api/v1/tasks/bulk", json={"items": [{"title": t} for t in titles]}, headers=headers)
+    assert response.status_code == 201
+    return response.json()["data"]
+
+
+def test_bulk_create_single_insert(client, user, auth_headers):
+    """A batch is written with one INSERT and comes back in input order."""
+    inserts = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("INSERT INTO TASKS"):
+            inserts.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        created = _bulk_create(client, auth_headers, [f"t{i}" for i in range(50)])
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+    assert [t["title"] for t in created] == [f"t{i}" for i in range(50)]
+    assert all(t["owner_id"] == user.id and t["id"] for t in created)
+    assert len(inserts) == 1
+    assert client.get("/api/v1/tasks/", headers=auth_headers).json()["meta"]["total"] == 50
+
+
+def test_bulk_create_validates_every_row(client, auth_headers):
+    """One invalid row rejects the whole batch."""
+    response = client.post("/api/v1/tasks/bulk", json={"items": [{"title": "ok"}, {"title": "  "}]}, headers=auth_headers)
+    assert response.status_code == 422
+    assert client.get("/api/v1/tasks/", headers=auth_headers).json()["meta"]["total"] == 0
+
+
+def test_bulk_update_partial_and_per_row_results(client, db, auth_headers):
+    """Only sent fields change; other owners' and unknown ids are not_found."""
+    a, b = _bulk_create(client, auth_headers, ["a", "b"])
+    other = User(email="other@example.com", hashed_password="x", full_name="O", role="user", is_active=True)
+    db.add(other)
+    db.commit()
+    other_headers = {"Authorization": f"Bearer {create_access_token({'sub': other.email, 'role': 'user'})}"}
+    (foreign,) = _bulk_create(client, other_headers, ["theirs"])
+
+    response = client.patch(
+        "/api/v1/tasks/bulk",
+        json={"items": [
+            {"id": a["id"], "status": "done"},
+            {"id": b["id"], "title": "b2", "description": "d"},
+            {"id": foreign["id"], "title": "stolen"},
+            {"id": 999999, "status": "done"},
+        ]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    rows = response.json()["data"]
+    assert [r["result"] for r in rows] == ["updated", "updated", "not_found", "not_found"]
+    assert (rows[0]["task"]["title"], rows[0]["task"]["status"]) == ("a", "done")
+    assert (rows[1]["task"]["title"], rows[1]["task"]["description"], rows[1]["task"]["status"]) == ("b2", "d", "open")
+    assert client.get(f"/api/v1/tasks/{foreign['id']}", headers=other_headers).json()["title"] == "theirs"
+
+
+def test_bulk_update_rejects_duplicates_and_nulls(client, auth_headers):
+    (a,) = _bulk_create(client, auth_headers, ["a"])
+    dup = {"items": [{"id": a["id"], "status": "done"}, {"id": a["id"], "status": "open"}]}
+    assert client.patch("/api/v1/tasks/bulk", json=dup, headers=auth_headers).status_code == 422
+    null = {"items": [{"id": a["id"], "title": None}]}
+    assert client.patch("/api/v1/tasks/bulk", json=null, headers=auth_headers).status_code == 422
+    id_only = {"items": [{"id": a["id"], "status": "done"}, {"id": a["id"] + 1}]}
+    response = client.patch("/api/v1/tasks/bulk", json=id_only, headers=auth_headers)
+    assert response.status_code == 422 and response.json()["detail"][0]["loc"][:3] == ["body", "items", 1]
+
+
+def test_bulk_delete(client, auth_headers):
+    """Deletes the owner's tasks and reports the rest as not_found."""
+    a, b, c = _bulk_create(client, auth_headers, ["a", "b", "c"])
+    response = client.request("DELETE", "/api/v1/tasks/bulk", json={"ids": [a["id"], c["id"], 424242]}, headers=auth_headers)
+    assert response.status_code == 200
+    assert [r["result"] for r in response.json()["data"]] == ["deleted", "deleted", "not_found"]
+    assert response.json()["meta"] == {"deleted": 2, "not_found": 1}
+    remaining = client.get("/api/v1/tasks/", headers=auth_headers).json()["data"]
+    assert [t["id"] for t in remaining] == [b["id"]]
+
+
+def test_bulk_created_tasks_are_searchable(client, auth_headers):
+    """The full-text index is kept in step for bulk inserts."""
+    _bulk_create(client, auth_headers, ["quarterly invoice", "grocery list"])
+    found = client.get("/api/v1/tasks/", params={"q": "invoice"}, headers=auth_headers).json()["data"]
+    assert [t["title"] for t in found] == ["quarterly invoice"]
@@ -0,0 +1,73 @@
+﻿"""meta.total count strategies for GET /tasks."""
+
+from sqlalchemy.dialects import postgresql
+
+from backend.app.crud import task as crud_task
+from backend.app.crud.task import _Explain, _filtered_stmt, _plan_rows
+
+
+def _meta(client, headers, **params):
+    response = client.get("/api/v1/tasks/", params=params, headers=headers)
+    assert response.status_code == 200
+    meta = response.json()["meta"]
+    return meta["total"], meta["total_strategy"]
+
+
+def _create(client, headers, title, status="open"):
+    return client.post("/api/v1/tasks/", json={"title": title, "status": status}, headers=headers).json()
+
+
+def test_cached_total_is_reused_until_tasks_change(client, auth_headers, queries):
+    """The second page request reuses the count; a new task drops it."""
+    _create(client, auth_headers, "one")
+    assert _meta(client, auth_headers, count="cached") == (1, "exact")
+    with queries.expect(1):  # only the page itself
+        assert _meta(client, auth_headers, count="cached") == (1, "cached")
+
+    _create(client, auth_headers, "two")
+    assert _meta(client, auth_headers, count="cached") == (2, "exact")
+    assert _meta(client, auth_headers, count="cached") == (2, "cached")
+
+
+def test_cached_total_is_per_filter_and_tracks_status_changes(client, auth_headers):
+    """Each filter has its own entry; a status change invalidates them all."""
+    task = _create(client, auth_headers, "report")
+    _create(client, auth_headers, "groceries", status="done")
+    assert _meta(client, auth_headers, count="cached", status="done") == (1, "exact")
+    assert _meta(client, auth_headers, count="cached", q="report") == (1, "exact")
+    assert _meta(client, auth_headers, count="cached", status="done") == (1, "cached")
+
+    update = {"title": "report", "description": None, "status": "done"}
+    assert client.put(f"/api/v1/tasks/{task['id']}", json=update, headers=auth_headers).status_code == 200
+    assert _meta(client, auth_headers, count="cached", status="done") == (2, "exact")
+
+
+def test_bulk_writes_and_imports_invalidate(client, auth_headers):
+    """Core-statement write paths drop cached totals too."""
+    created = client.post("/api/v1/tasks/bulk", json={"items": [{"title": "a"}, {"title": "b"}]}, headers=auth_headers)
+    ids = [task["id"] for task in created.json()["data"]]
+    assert _meta(client, auth_headers, count="cached") == (2, "exact")
+
+    client.request("DELETE", "/api/v1/tasks/bulk", json={"ids": ids[:1]}, headers=auth_headers)
+    assert _meta(client, auth_headers, count="cached") == (1, "exact")
+
+    client.post("/api/v1/tasks/import", content=b'{"title": "imported"}\n', headers=auth_headers)
+    assert _meta(client, auth_headers, count="cached") == (2, "exact")
+
+
+def test_estimated_falls_back_to_exact_off_postgres(client, auth_headers):
+    """Without planner estimates the estimated strategy counts exactly and says so."""
+    _create(client, auth_headers, "one")
+    assert _meta(client, auth_headers, count="estimated") == (1, "exact")
+    assert client.get("/api/v1/tasks/", params={"count": "guess"}, headers=auth_headers).status_code == 422
+
+
+def test_postgres_estimate_statement(db):
+    """The estimate is EXPLAIN (FORMAT JSON) over the filtered select, with its parameters bound."""
+    stmt = _filtered_stmt(db, 7, None, "open")
+    sql = str(_Explain(stmt).compile(dialect=postgresql.dialect()))
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT") and "%(owner_id_1)s" in sql
+    plan = [{"Plan": {"Node Type": "Index Scan", "Plan Rows": 4200}}]
+    assert _plan_rows(plan) == 4200
+    assert _plan_rows('[{"Plan": {"Plan Rows": 12}}]') == 12
+    assert crud_task.COUNT_STRATEGIES == ("exact", "cached", "estimated")
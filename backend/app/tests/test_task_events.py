@@ -0,0 +1,192 @@
+﻿"""Task change feed tests: commit hooks, backpressure, SSE framing, the WebSocket route and postgres reconnects."""
+
+import asyncio
+
+import pytest
+from starlette.websockets import WebSocketDisconnect
+
+from backend.app.api.v1.tasks import _sse_events
+from backend.app.core import broadcast
+from backend.app.core.broadcast import RESYNC, Broadcaster, PostgresFanout, Subscription
+from backend.app.core.config import TASK_EVENTS_MAX_BATCH
+from backend.app.crud import task as crud_task
+from backend.app.models.task import Task
+
+
+def test_slow_subscriber_gets_one_resync():
+    subscription = Subscription(maxsize=2)
+    for i in range(5):
+        subscription.put({"type": "task.created", "id": i})
+    assert subscription.overflows == 2
+    assert asyncio.run(subscription.get(timeout=0)) == RESYNC
+    assert asyncio.run(subscription.get(timeout=0)) is None
+
+
+def test_commits_publish_and_rollbacks_do_not(db, user):
+    async def run():
+        async with crud_task.task_events.subscribe(user.id) as subscription:
+            task = Task(title="a", owner_id=user.id)
+            db.add(task)
+            db.commit()
+            task.title = "b"
+            db.commit()
+            db.add(Task(title="never", owner_id=user.id))
+            db.flush()
+            db.rollback()
+            db.delete(task)
+            db.commit()
+            await asyncio.sleep(0)  # publish hands over with call_soon_threadsafe
+            return [await subscription.get(timeout=0) for _ in range(4)], task.id
+
+    events, task_id = asyncio.run(run())
+    assert events == [
+        {"type": "task.created", "id": task_id, "version": 1},
+        {"type": "task.updated", "id": task_id, "version": 2},
+        {"type": "task.deleted", "id": task_id, "version": 2},
+        None,
+    ]
+
+
+def test_sse_framing(db, user):
+    async def run():
+        stream = _sse_events(user.id)
+        first = await stream.__anext__()
+        db.add(Task(title="a", owner_id=user.id))
+        db.commit()
+        event = await stream.__anext__()
+        await stream.aclose()
+        return first, event
+
+    first, event = asyncio.run(run())
+    assert first == "retry: 3000\n\n"
+    assert event.startswith("event: task.created\ndata: {") and event.endswith("}\n\n")
+    assert crud_task.task_events.stats()["subscribers"] == 0
+
+
+def test_stream_requires_a_token(client):
+    assert client.get("/api/v1/tasks/stream").status_code == 401
+    assert client.get("/api/v1/tasks/stream", params={"access_token": "nope"}).status_code == 401
+    with pytest.raises(WebSocketDisconnect):
+        with client.websocket_connect("/api/v1/tasks/stream") as ws:
+            ws.receive_json()
+
+
+def test_websocket_feed(client, user, auth_headers):
+    token = auth_headers["Authorization"].split()[1]
+    with client.websocket_connect(f"/api/v1/tasks/stream?access_token={token}") as ws:
+        task = client.post("/api/v1/tasks/", json={"title": "a"}, headers=auth_headers).json()
+        assert ws.receive_json() == {"type": "task.created", "id": task["id"], "version": 1}
+        client.patch("/api/v1/tasks/bulk", json={"items": [{"id": task["id"], "status": "done"}]}, headers=auth_headers)
+        assert ws.receive_json() == {"type": "task.updated", "id": task["id"], "version": 2}
+        client.request("DELETE", "/api/v1/tasks/bulk", json={"ids": [task["id"]]}, headers=auth_headers)
+        assert ws.receive_json() == {"type": "task.deleted", "id": task["id"], "version": 2}
+        client.post("/api/v1/tasks/bulk", json={"items": [{"title": "x"}] * (TASK_EVENTS_MAX_BATCH + 1)}, headers=auth_headers)
+        assert ws.receive_json() == RESYNC
+
+
+class FakeChannel:
+    """Stands in for the Postgres server: connections, NOTIFY delivery and dropped links."""
+
+    def __init__(self):
+        self.connections = []
+        self.refuse = 0     # connection attempts to fail before accepting again
+
+    async def connect(self, dsn):
+        if self.refuse:
+            self.refuse -= 1
+            raise OSError("connection refused")
+        connection = FakeConnection(self, pid=len(self.connections) + 1)
+        self.connections.append(connection)
+        return connection
+
+    def notify(self, pid, channel, payload):
+        for connection in self.connections:
+            if not connection.closed:
+                for callback in connection.listeners.get(channel, ()):
+                    callback(connection, pid, channel, payload)
+
+
+class FakeConnection:
+    def __init__(self, server, pid):
+        self.server, self.pid = server, pid
+        self.closed = self.broken = False
+        self.listeners, self.on_termination = {}, []
+
+    def add_termination_listener(self, callback):
+        self.on_termination.append(callback)
+
+    async def add_listener(self, channel, callback):
+        self.listeners.setdefault(channel, []).append(callback)
+
+    def get_server_pid(self):
+        return self.pid
+
+    async def execute(self, query, channel, payload):
+        if self.broken:
+            raise ConnectionError("connection reset")
+        self.server.notify(self.pid, channel, payload)
+
+    def drop(self):
+        self.closed = True
+        for callback in self.on_termination:
+            callback(self)
+
+    async def close(self, timeout=None):
+        self.drop()
+
+    def terminate(self):
+        self.drop()
+
+
+async def _settle():
+    for _ in range(10):
+        await asyncio.sleep(0)
+
+
+def test_postgres_fanout_resyncs_after_the_listener_drops(monkeypatch):
+    monkeypatch.setattr(broadcast, "RECONNECT_MIN_SECONDS", 0)
+    server = FakeChannel()
+    fanout = PostgresFanout("postgresql://test", "task_events", connect=server.connect)
+    events = Broadcaster(fanout)
+
+    async def run():
+        async with events.subscribe(1) as subscription:
+            events.publish(1, [{"type": "task.created", "id": 1}])
+            await _settle()
+            assert await subscription.get(timeout=0) == {"type": "task.created", "id": 1}
+            server.refuse = 2
+            fanout._listener.drop()
+            events.publish(1, [{"type": "task.updated", "id": 1}])  # may be lost while reconnecting
+            await _settle()
+            received = [await subscription.get(timeout=0) for _ in range(2)]
+            events.publish(1, [{"type": "task.deleted", "id": 1}])
+            await _settle()
+            received.append(await subscription.get(timeout=0))
+        await events.stop()
+        return received
+
+    received = asyncio.run(run())
+    assert received == [RESYNC, None, {"type": "task.deleted", "id": 1}]
+    assert fanout.reconnects == 1
+
+
+def test_postgres_fanout_tells_other_workers_about_a_failed_notify(monkeypatch):
+    monkeypatch.setattr(broadcast, "RECONNECT_MIN_SECONDS", 0)
+    server = FakeChannel()
+    sending = PostgresFanout("postgresql://test", "task_events", connect=server.connect)
+    receiving = PostgresFanout("postgresql://test", "task_events", connect=server.connect)
+    here, there = Broadcaster(sending), Broadcaster(receiving)
+
+    async def run():
+        async with here.subscribe(1) as mine, there.subscribe(1) as theirs:
+            sending._sender.broken = True
+            here.publish(1, [{"type": "task.created", "id": 1}])
+            await _settle()
+            received = ([await mine.get(timeout=0) for _ in range(2)], [await theirs.get(timeout=0) for _ in range(2)])
+        await here.stop()
+        await there.stop()
+        return received
+
+    mine, theirs = asyncio.run(run())
+    assert mine == [RESYNC, None]
+    assert theirs == [RESYNC, None]
@@ -0,0 +1,60 @@
+﻿"""Task export tests."""
+
+import csv
+import io
+import json
+
+from sqlalchemy import insert
+
+from backend.app.crud import task as crud_task
+from backend.app.models.task import Task
+from backend.app.models.users import User
+
+
+def _seed(db, owner_id, count):
+    rows = [{"title": f"task {i}", "status": "done" if i % 3 == 0 else "open", "owner_id": owner_id} for i in range(count)]
+    db.execute(insert(Task), rows)
+    db.commit()
+
+
+def test_export_ndjson(client, db, user, auth_headers, monkeypatch):
+    """Every task is streamed, one JSON object per line, across several batches."""
+    _seed(db, user.id, 25)
+    other = User(email="other@example.com", hashed_password="x", full_name="O", role="user", is_active=True)
+    db.add(other)
+    db.commit()
+    _seed(db, other.id, 5)
+
+    original = crud_task.stream_tasks_async
+    monkeypatch.setattr(crud_task, "stream_tasks_async", lambda *a, **kw: original(*a, **kw, batch_size=10))
+    response = client.get("/api/v1/tasks/export", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == 25
+    assert set(rows[0]) == set(crud_task.EXPORT_COLUMNS)
+    assert len({row["id"] for row in rows}) == 25
+
+
+def test_export_csv_with_filters(client, db, user, auth_headers):
+    """CSV has a header row and honours status/q/sort like the list endpoint."""
+    _seed(db, user.id, 9)
+    response = client.get("/api/v1/tasks/export", params={"format": "csv", "status": "done", "sort": "created_asc"}, headers=auth_headers)
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="tasks.csv"' in response.headers["content-disposition"]
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == list(crud_task.EXPORT_COLUMNS)
+    assert [r[1] for r in rows[1:]] == ["task 0", "task 3", "task 6"]
+
+    searched = client.get("/api/v1/tasks/export", params={"q": "4"}, headers=auth_headers).text.splitlines()
+    assert [json.loads(line)["title"] for line in searched] == ["task 4"]
+
+
+def test_export_empty(client, auth_headers):
+    assert client.get("/api/v1/tasks/export", headers=auth_headers).text == ""
+    csv_text = client.get("/api/v1/tasks/export", params={"format": "csv"}, headers=auth_headers).text
+    assert csv_text.strip() == ",".join(crud_task.EXPORT_COLUMNS)
+
+
+def test_export_requires_auth(client):
+    assert client.get("/api/v1/tasks/export").status_code == 401
@@ -0,0 +1,96 @@
+﻿"""Streaming task import tests."""
+
+import asyncio
+import json
+
+from backend.app.crud import task_import
+
+
+async def _collect(agen):
+    return [item async for item in agen]
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+def test_iter_lines_across_chunks():
+    """Lines split across chunk boundaries (even mid-character) are reassembled."""
+    data = "first\r\nsécond\nthird".encode()
+    cut = data.index(b"\xc3") + 1
+    lines = asyncio.run(_collect(task_import.iter_lines(_chunks(data[:3], data[3:cut], data[cut:]))))
+    assert lines == ["first", "sécond", "third"]
+
+
+def test_iter_lines_caps_line_length():
+    lines = asyncio.run(_collect(task_import.iter_lines(_chunks(b"ok\n" + b"x" * 50, b"x" * 50 + b"\nnext\n"), max_line=20)))
+    assert lines == ["ok", None, "next"]
+
+
+def test_import_ndjson(client, auth_headers):
+    """Valid rows are imported in batches; bad lines are reported by number."""
+    body = "\n".join([
+        json.dumps({"title": "one"}),
+        json.dumps({"title": "two", "description": "d", "status": "done"}),
+        "not json",
+        "",
+        json.dumps({"title": ""}),
+        json.dumps(["a list"]),
+        json.dumps({"title": "three", "owner_id": 999}),
+    ])
+    response = client.post("/api/v1/tasks/import", params={"batch_size": 2}, content=body, headers=auth_headers)
+    assert response.status_code == 200
+    summary = response.json()
+    assert (summary["inserted"], summary["failed"], summary["errors_truncated"]) == (3, 3, False)
+    assert [e["line"] for e in summary["errors"]] == [3, 5, 6]
+
+    tasks = client.get("/api/v1/tasks/", params={"sort": "created_asc"}, headers=auth_headers).json()["data"]
+    assert [(t["title"], t["status"]) for t in tasks] == [("one", "open"), ("two", "done"), ("three", "open")]
+
+
+def test_import_null_status_gets_the_default(client, auth_headers):
+    body = json.dumps({"title": "a", "status": None}) + "\n" + json.dumps({"title": "b", "status": "done"})
+    summary = client.post("/api/v1/tasks/import", content=body, headers=auth_headers).json()
+    assert (summary["inserted"], summary["failed"]) == (2, 0)
+    tasks = client.get("/api/v1/tasks/", params={"sort": "created_asc"}, headers=auth_headers).json()["data"]
+    assert [t["status"] for t in tasks] == ["open", "done"]
+
+
+def test_import_reports_a_rejected_batch(client, auth_headers, monkeypatch):
+    """A batch the database refuses is rolled back and reported; the others are kept."""
+    monkeypatch.setattr(task_import, "_NULL_DEFAULTS", {})  # let a NULL status reach the NOT NULL column
+    rows = [{"title": "one"}, {"title": "two"}, {"title": "bad", "status": None}, {"title": "three"}, {"title": "four"}]
+    body = "\n".join(json.dumps(row) for row in rows)
+    response = client.post("/api/v1/tasks/import", params={"batch_size": 2}, content=body, headers=auth_headers)
+    assert response.status_code == 200
+    summary = response.json()
+    assert (summary["inserted"], summary["failed"]) == (3, 2)
+    assert [e["line"] for e in summary["errors"]] == [3, 4]
+    tasks = client.get("/api/v1/tasks/", params={"sort": "created_asc"}, headers=auth_headers).json()["data"]
+    assert [t["title"] for t in tasks] == ["one", "two", "four"]
+
+
+def test_import_csv(client, auth_headers):
+    """CSV with a header, quoted multi-line fields and empty cells."""
+    body = 'title,status,description\nalpha,,\n"beta, quoted",done,"line one\nline two"\n,open,missing title\ngamma,open,\n'
+    response = client.post("/api/v1/tasks/import", params={"format": "csv"}, content=body, headers=auth_headers)
+    summary = response.json()
+    assert (summary["inserted"], summary["failed"]) == (3, 1)
+    assert summary["errors"][0]["line"] == 5
+
+    tasks = client.get("/api/v1/tasks/", params={"sort": "created_asc"}, headers=auth_headers).json()["data"]
+    assert [t["title"] for t in tasks] == ["alpha", "beta, quoted", "gamma"]
+    assert tasks[1]["description"] == "line one\nline two"
+
+
+def test_import_csv_requires_title_column(client, auth_headers):
+    response = client.post("/api/v1/tasks/import", params={"format": "csv"}, content="name\nx\n", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_import_error_report_is_capped(client, auth_headers, monkeypatch):
+    monkeypatch.setattr(task_import, "MAX_REPORTED_ERRORS", 2)
+    body = "\n".join("{bad" for _ in range(5))
+    summary = client.post("/api/v1/tasks/import", content=body, headers=auth_headers).json()
+    assert (summary["failed"], len(summary["errors"]), summary["errors_truncated"]) == (5, 2, True)
@@ -0,0 +1,118 @@
+﻿"""Query-plan tests for the task list path.
+
+The statements are captured from the real crud calls and fed back to the
+database's EXPLAIN, so these fail if list_tasks stops matching its indexes.
+"""
+
+import pytest
+from sqlalchemy import event, insert, text
+
+from backend.app.crud import task as crud_task
+from backend.app.db.session import engine
+from backend.app.models.task import Task
+
+dialect = engine.dialect.name
+
+
+@pytest.fixture
+def seeded(db, user):
+    """A few hundred tasks so the planner has something to choose between."""
+    db.execute(
+        insert(Task),
+        [
+            {"title": f"task {i}", "description": f"note {i}", "status": ("open", "done")[i % 2], "owner_id": user.id}
+            for i in range(300)
+        ],
+    )
+    db.commit()
+    return user
+
+
+def _captured_selects(fn):
+    """Run fn and return the (statement, parameters) of every non-count task SELECT it issued."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and "FROM tasks" in statement and "count(" not in statement:
+            captured.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    assert captured, "no list query was captured"
+    return captured
+
+
+def _plan(db, statement, parameters):
+    if dialect == "sqlite":
+        rows = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+        return "\n".join(row[-1] for row in rows)
+    if dialect == "postgresql":
+        conn = db.connection()
+        # Tiny test tables make a seq scan cheapest; force index paths so the
+        # test is about which index is usable, not about table size.
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        rows = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).all()
+        return "\n".join(row[0] for row in rows)
+    pytest.skip(f"no EXPLAIN assertions for {dialect}")
+
+
+def _assert_list_plan(db, fn, index_name):
+    for statement, parameters in _captured_selects(fn):
+        plan = _plan(db, statement, parameters)
+        assert index_name in plan, plan
+        # the index must also deliver the ORDER BY, without a separate sort step
+        assert "TEMP B-TREE" not in plan and "Sort" not in plan, plan
+
+
+@pytest.mark.parametrize("sort", [None, "created_asc"])
+def test_list_uses_owner_index(db, seeded, sort):
+    """Unfiltered list pages seek and sort via (owner_id, created_at, id)."""
+    _assert_list_plan(
+        db,
+        lambda: crud_task.list_tasks(db, seeded.id, None, page=3, limit=20, sort=sort),
+        "ix_tasks_owner_created_id",
+    )
+
+
+@pytest.mark.parametrize("sort", [None, "created_asc"])
+def test_status_filter_uses_status_index(db, seeded, sort):
+    """A status filter uses (owner_id, status, created_at, id)."""
+    _assert_list_plan(
+        db,
+        lambda: crud_task.list_tasks(db, seeded.id, None, page=2, limit=20, status="open", sort=sort),
+        "ix_tasks_owner_status_created_id",
+    )
+
+
+def test_keyset_page_uses_status_index(db, seeded):
+    """Cursor pages seek on the same composite index."""
+    _, cursor, _ = crud_task.list_tasks_keyset(db, seeded.id, None, limit=20, status="done")
+    _assert_list_plan(
+        db,
+        lambda: crud_task.list_tasks_keyset(db, seeded.id, None, limit=20, status="done", cursor=cursor),
+        "ix_tasks_owner_status_created_id",
+    )
+
+
+@pytest.mark.skipif(dialect != "postgresql", reason="tsvector search is Postgres-only")
+def test_search_uses_search_vector_index(db, seeded):
+    """Full-text search is answered from the GIN index on search_vector."""
+    for statement, parameters in _captured_selects(
+        lambda: crud_task.list_tasks(db, seeded.id, "note", page=1, limit=20)
+    ):
+        plan = _plan(db, statement, parameters)
+        assert "ix_tasks_search_vector" in plan, plan
+
+
+def test_trigram_indexes_skipped_outside_postgres(db):
+    """Other dialects get the composite indexes but no trigram indexes."""
+    if dialect == "postgresql":
+        pytest.skip("checks the non-Postgres fallback")
+    # sqlite_master rather than PRAGMA index_list: the PRAGMA can answer from a
+    # pooled connection's schema cache that predates this test's create_all.
+    names = set(db.execute(text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'tasks'")).scalars())
+    assert {"ix_tasks_owner_created_id", "ix_tasks_owner_status_created_id"} <= names
+    assert not any(name.endswith("_trgm") for name in names)
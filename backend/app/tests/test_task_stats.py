@@ -0,0 +1,81 @@
+﻿"""Task statistics endpoint and summary-table consistency tests."""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, text, update
+
+from backend.app.crud.task_stats import check_task_stats, rebuild_task_stats
+from backend.app.db.check_task_stats import main as check_main
+from backend.app.db.session import engine
+from backend.app.models.task import Task
+
+
+def _stats(client, headers, **params):
+    response = client.get("/api/v1/tasks/stats", params=params, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_stats_follow_every_write_path(client, auth_headers):
+    """Single, bulk and imported writes all land in the summaries."""
+    first = client.post("/api/v1/tasks/", json={"title": "first"}, headers=auth_headers).json()
+    client.post("/api/v1/tasks/bulk", json={"items": [{"title": "a", "status": "done"}, {"title": "b"}]}, headers=auth_headers)
+    client.post("/api/v1/tasks/import", content=b'{"title": "imported", "status": "doing"}\n', headers=auth_headers)
+    stats = _stats(client, auth_headers, days=7)
+    assert stats["by_status"] == {"doing": 1, "done": 1, "open": 2}
+    assert stats["total"] == 4
+    assert stats["oldest_open"]["id"] == first["id"]
+    assert len(stats["created_per_day"]) == 7 and stats["created_per_day"][-1]["created"] == 4
+
+    update_body = {"title": "first", "description": None, "status": "done"}
+    client.put(f"/api/v1/tasks/{first['id']}", json=update_body, headers=auth_headers)
+    client.request("DELETE", "/api/v1/tasks/bulk", json={"ids": [first["id"]]}, headers=auth_headers)
+    stats = _stats(client, auth_headers, days=1)
+    assert stats["by_status"] == {"doing": 1, "done": 1, "open": 1}
+    assert stats["oldest_open"]["title"] == "b"
+    assert stats["created_per_day"][0]["created"] == 3
+
+
+def test_stats_cost_does_not_grow_with_tasks(client, db, user, auth_headers, queries):
+    """The same three statements serve one task or a thousand."""
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    db.execute(insert(Task), [
+        {"title": f"t{i}", "owner_id": user.id, "status": "open" if i % 4 else "done", "created_at": base + timedelta(hours=i)}
+        for i in range(1000)
+    ])
+    db.commit()
+    with queries.expect(3):
+        stats = _stats(client, auth_headers, days=3)
+    assert stats["by_status"] == {"done": 250, "open": 750}
+    assert stats["oldest_open"]["title"] == "t1"
+    assert check_task_stats(db.connection()) == []
+
+
+def test_checker_reports_and_repairs_drift(db, user, capsys):
+    """A summary edited behind the triggers' back is reported, then rebuilt."""
+    db.execute(insert(Task), [{"title": "x", "owner_id": user.id}, {"title": "y", "owner_id": user.id, "status": "done"}])
+    db.commit()
+    with engine.begin() as conn:
+        conn.execute(text("UPDATE task_status_counts SET count = 7 WHERE status = 'open'"))
+        conn.execute(text("DELETE FROM task_daily_counts"))
+
+    with engine.connect() as conn:
+        diffs = check_task_stats(conn, owner_id=user.id)
+    assert {(d["summary"], d["stored"], d["expected"]) for d in diffs} == {("status", 7, 1), ("daily", 0, 2)}
+
+    assert check_main(["--owner", str(user.id)]) == 1
+    assert check_main(["--repair"]) == 0
+    assert check_main([]) == 0
+    assert "consistent" in capsys.readouterr().out
+
+
+def test_rebuild_matches_triggers(db, user):
+    """Rebuilding from scratch gives what the triggers maintained, including moved and deleted rows."""
+    db.execute(insert(Task), [{"title": f"t{i}", "owner_id": user.id} for i in range(5)])
+    db.execute(update(Task).where(Task.id <= 2).values(status="done"))
+    db.execute(text("DELETE FROM tasks WHERE id = 5"))
+    db.commit()
+    assert check_task_stats(db.connection()) == []
+    rebuild_task_stats(db.connection())
+    db.commit()
+    assert check_task_stats(db.connection()) == []
@@ -0,0 +1,202 @@
+﻿"""Task endpoint tests."""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, text
+
+from backend.app.db.migrations import _task_created_at_format
+from backend.app.models.task import Task
+
+
+def _seed_tasks(db, owner_id, count, same_second=False):
+    """Insert `count` tasks with increasing created_at (or all in one second)."""
+    base = datetime(2024, 1, 1, 12, 0, 0)
+    rows = [
+        {
+            "title": f"task {i}",
+            "status": "open" if i % 2 else "done",
+            "owner_id": owner_id,
+            "created_at": base if same_second else base + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+    db.execute(insert(Task), rows)
+    db.commit()
+
+
+def _walk(client, headers, **params):
+    """Follow next_cursor until exhausted and return every task id seen."""
+    seen, cursor = [], None
+    for _ in range(100):
+        query = {"mode": "cursor", "limit": 4, **params}
+        if cursor:
+            query["cursor"] = cursor
+        response = client.get("/api/v1/tasks/", params=query, headers=headers)
+        assert response.status_code == 200
+        body = response.json()
+        seen.extend(t["id"] for t in body["data"])
+        cursor = body["meta"]["next_cursor"]
+        if cursor is None:
+            return seen
+    raise AssertionError("cursor pagination did not terminate")
+
+
+def test_cursor_pagination_desc(client, db, user, auth_headers):
+    """Cursor pages cover every task exactly once, newest first."""
+    _seed_tasks(db, user.id, 10)
+    seen = _walk(client, auth_headers)
+    assert seen == list(range(10, 0, -1))
+
+
+def test_cursor_pagination_asc_with_ties(client, db, user, auth_headers):
+    """Rows sharing a created_at are ordered and split by id."""
+    _seed_tasks(db, user.id, 9, same_second=True)
+    seen = _walk(client, auth_headers, sort="created_asc")
+    assert seen == list(range(1, 10))
+
+
+def test_cursor_pagination_with_status_filter(client, db, user, auth_headers):
+    """Filters apply to cursor pages the same way as offset pages."""
+    _seed_tasks(db, user.id, 10)
+    seen = _walk(client, auth_headers, status="done")
+    assert seen == [9, 7, 5, 3, 1]
+
+
+def test_cursor_mode_skips_total(client, db, user, auth_headers):
+    """Cursor mode does not count unless asked to."""
+    _seed_tasks(db, user.id, 3)
+    response = client.get("/api/v1/tasks/", params={"mode": "cursor"}, headers=auth_headers)
+    assert "total" not in response.json()["meta"]
+
+    response = client.get(
+        "/api/v1/tasks/", params={"mode": "cursor", "include_total": True}, headers=auth_headers
+    )
+    assert response.json()["meta"]["total"] == 3
+
+
+def test_invalid_cursor(client, user, auth_headers):
+    """A malformed cursor is a client error."""
+    response = client.get("/api/v1/tasks/", params={"cursor": "garbage"}, headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_offset_pagination_unchanged(client, db, user, auth_headers):
+    """The default offset mode still reports page and total."""
+    _seed_tasks(db, user.id, 5)
+    response = client.get("/api/v1/tasks/", params={"page": 2, "limit": 2}, headers=auth_headers)
+    body = response.json()
+    assert [t["id"] for t in body["data"]] == [3, 2]
+    assert body["meta"] == {"page": 2, "limit": 2, "total": 5, "total_strategy": "exact"}
+
+
+def test_offset_pagination_without_total(client, db, user, auth_headers):
+    """include_total=false drops the count from offset pages too."""
+    _seed_tasks(db, user.id, 5)
+    response = client.get(
+        "/api/v1/tasks/", params={"page": 1, "limit": 2, "include_total": False}, headers=auth_headers
+    )
+    assert response.json()["meta"] == {"page": 1, "limit": 2}
+
+
+def test_offset_pagination_breaks_ties_by_id(client, db, user, auth_headers):
+    """Offset pages use the same (created_at, id) order as cursor pages."""
+    _seed_tasks(db, user.id, 6, same_second=True)
+    seen = []
+    for page in (1, 2, 3):
+        response = client.get("/api/v1/tasks/", params={"page": page, "limit": 2}, headers=auth_headers)
+        seen.extend(t["id"] for t in response.json()["data"])
+    assert seen == list(range(6, 0, -1))
+
+
+def test_cursor_pagination_over_created_tasks(client, user, auth_headers):
+    """Tasks created through the API page cleanly even when created in one burst."""
+    for i in range(7):
+        client.post("/api/v1/tasks/", json={"title": f"t{i}"}, headers=auth_headers)
+    assert _walk(client, auth_headers) == list(range(7, 0, -1))
+    assert _walk(client, auth_headers, sort="created_asc") == list(range(1, 8))
+
+
+def test_timestamps_serialize_the_same_on_every_route(client, auth_headers):
+    """POST, GET, the list and the export agree on created_at/updated_at, as UTC."""
+    created = client.post("/api/v1/tasks/", json={"title": "t"}, headers=auth_headers).json()
+    fetched = client.get(f"/api/v1/tasks/{created['id']}", headers=auth_headers).json()
+    listed = client.get("/api/v1/tasks/", headers=auth_headers).json()["data"][0]
+    exported = json.loads(client.get("/api/v1/tasks/export", headers=auth_headers).text)
+    for field in ("created_at", "updated_at"):
+        assert created[field] == fetched[field] == listed[field]
+        assert datetime.fromisoformat(exported[field]) == datetime.fromisoformat(created[field])
+        assert datetime.fromisoformat(created[field]).utcoffset() == timedelta(0)
+
+
+def _seed_raw(db, owner_id, count):
+    """Insert tasks through raw SQL, so created_at comes from the server default."""
+    for i in range(count):
+        db.execute(text("INSERT INTO tasks (title, status, owner_id, version) VALUES (:title, 'open', :owner_id, 1)"), {"title": f"raw {i}", "owner_id": owner_id})
+    db.commit()
+
+
+def test_cursor_pagination_over_raw_sql_rows(client, db, user, auth_headers):
+    """Server-default timestamps page cleanly alongside ORM-written ones."""
+    _seed_raw(db, user.id, 5)
+    client.post("/api/v1/tasks/", json={"title": "orm"}, headers=auth_headers)
+    assert _walk(client, auth_headers, limit=2) == list(range(6, 0, -1))
+    assert _walk(client, auth_headers, limit=2, sort="created_asc") == list(range(1, 7))
+
+
+def test_created_at_migration_backfills_sqlite_rows(client, db, user, auth_headers):
+    if db.get_bind().dialect.name != "sqlite":
+        pytest.skip("only SQLite stores timestamps as text")
+    db.execute(text("DROP TRIGGER tasks_created_at_ai"))  # as before the migration
+    _seed_raw(db, user.id, 5)
+    assert db.execute(text("SELECT length(created_at) FROM tasks")).scalars().all() == [19] * 5
+    with db.get_bind().begin() as conn:
+        _task_created_at_format(conn)
+    assert _walk(client, auth_headers, limit=2) == list(range(5, 0, -1))
+
+
+def _search(client, headers, q, **params):
+    response = client.get("/api/v1/tasks/", params={"q": q, **params}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_search_ranks_and_stems(client, user, auth_headers):
+    """Search matches word stems and puts the strongest match first."""
+    for title, description in [
+        ("Buy milk", "groceries"),
+        ("Weekly planning", "book rooms, order lunch, maybe go running after the review"),
+        ("Running drills", "run the drills twice, then runs at the track"),
+    ]:
+        client.post("/api/v1/tasks/", json={"title": title, "description": description}, headers=auth_headers)
+
+    body = _search(client, auth_headers, "run")
+    assert body["meta"]["total"] == 2
+    assert [t["title"] for t in body["data"]] == ["Running drills", "Weekly planning"]
+    assert _search(client, auth_headers, "milk groceries")["meta"]["total"] == 1
+    assert _search(client, auth_headers, '" OR *')["meta"]["total"] == 0
+
+
+def test_search_follows_updates_and_deletes(client, user, auth_headers):
+    """The search index tracks task edits and deletions."""
+    created = client.post("/api/v1/tasks/", json={"title": "Write report"}, headers=auth_headers).json()
+    assert _search(client, auth_headers, "report")["meta"]["total"] == 1
+
+    client.put(
+        f"/api/v1/tasks/{created['id']}",
+        json={"title": "Write summary", "description": None, "status": "open"},
+        headers=auth_headers,
+    )
+    assert _search(client, auth_headers, "report")["meta"]["total"] == 0
+    assert _search(client, auth_headers, "summary")["meta"]["total"] == 1
+
+    client.delete(f"/api/v1/tasks/{created['id']}", headers=auth_headers)
+    assert _search(client, auth_headers, "summary")["meta"]["total"] == 0
+
+
+def test_search_in_cursor_mode(client, user, auth_headers):
+    """Cursor pages filter by the search but keep chronological order."""
+    for i in range(5):
+        client.post("/api/v1/tasks/", json={"title": f"alpha {i}" if i % 2 else f"beta {i}"}, headers=auth_headers)
+    assert _walk(client, auth_headers, q="alpha") == [4, 2]
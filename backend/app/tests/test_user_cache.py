@@ -0,0 +1,87 @@
+﻿"""Authenticated-user cache tests."""
+
+import pytest
+
+from backend.app.core.cache import RedisCache, TTLCache
+from backend.app.core.security import create_access_token
+from backend.app.crud import users as crud_users
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expiry_and_lru():
+    """Entries expire after the TTL and the least recently used entry is evicted first."""
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+    clock.now = 11
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (3, 2, 1)
+
+
+def test_redis_cache_roundtrip():
+    """The Redis backend stores JSON under a prefix and honours delete."""
+    fakeredis = pytest.importorskip("fakeredis")
+    cache = RedisCache(fakeredis.FakeRedis(), prefix="user", ttl=30)
+    cache.set("owner@example.com", {"id": 1})
+    assert cache.get("owner@example.com") == {"id": 1}
+    cache.delete("owner@example.com")
+    assert cache.get("owner@example.com") is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    cache.clear()
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 0
+
+
+def test_authenticated_requests_hit_cache(client, auth_headers, user_queries):
+    """Only the first authenticated request loads the user row."""
+    for _ in range(3):
+        assert client.get("/api/v1/profile/", headers=auth_headers).status_code == 200
+    assert len(user_queries) == 1
+    assert crud_users.user_cache.stats()["hits"] == 2
+
+
+def test_profile_update_invalidates_cache(client, auth_headers):
+    """Editing the profile is visible on the next request."""
+    client.get("/api/v1/auth/me", headers=auth_headers)
+    response = client.put("/api/v1/auth/me", json={"full_name": "Renamed"}, headers=auth_headers)
+    assert response.json()["full_name"] == "Renamed"
+    assert client.get("/api/v1/auth/me", headers=auth_headers).json()["full_name"] == "Renamed"
+
+    client.put(
+        "/api/v1/profile/",
+        json={"full_name": "Again", "email": "owner@example.com", "avatar_url": None},
+        headers=auth_headers,
+    )
+    assert client.get("/api/v1/profile/", headers=auth_headers).json()["full_name"] == "Again"
+
+
+def test_role_change_invalidates_cache(client, db, user):
+    """A role change committed anywhere drops the cached principal."""
+    # Tokens without a "ver" claim are not revoked, so the cached row is what matters.
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user.email, 'role': user.role})}"}
+    client.get("/api/v1/auth/me", headers=headers)
+    user.role = "admin"
+    db.commit()
+    assert client.get("/api/v1/auth/me", headers=headers).json()["role"] == "admin"
+
+
+def test_rolled_back_change_keeps_cache(client, db, user, auth_headers):
+    """Rolled-back edits do not invalidate anything."""
+    client.get("/api/v1/auth/me", headers=auth_headers)
+    user.full_name = "Not saved"
+    db.flush()
+    db.rollback()
+    assert crud_users.get_cached_user(user.email) is not None
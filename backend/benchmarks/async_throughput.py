@@ -0,0 +1,109 @@
+﻿"""Sync vs async endpoint throughput under many concurrent connections.
+
+Mounts two otherwise identical list endpoints on a scratch app: one `def`
+route on the blocking Session (served from Starlette's threadpool, ~40
+workers) and one `async def` route on AsyncSession. Each is driven with N
+concurrent clients through httpx's ASGI transport.
+
+Run from the project root:
+    python -m backend.benchmarks.async_throughput [--concurrency 500] [--requests 5000]
+
+Uses BENCH_DATABASE_URL (e.g. a local Postgres), or a fresh SQLite file in
+the temp directory. SQLite has no network round trip to overlap, so the gap
+is much larger on Postgres.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primetrade_bench.db')}",
+)
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from backend.app.db.session import Base, engine, async_engine, SessionLocal, get_db, get_async_db
+from backend.app.models.task import Task
+from backend.app.models.users import User
+from backend.app.crud import task as crud_task
+
+bench_app = FastAPI()
+OWNER_ID = 1
+
+
+@bench_app.get("/sync/tasks")
+def sync_tasks(db: Session = Depends(get_db)):
+    items, total = crud_task.list_tasks(db, OWNER_ID, None, limit=20)
+    return {"count": len(items), "total": total}
+
+
+@bench_app.get("/async/tasks")
+async def async_tasks(db: AsyncSession = Depends(get_async_db)):
+    items, total = await crud_task.list_tasks_async(db, OWNER_ID, None, limit=20)
+    return {"count": len(items), "total": total}
+
+
+def seed(tasks: int) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add(User(id=OWNER_ID, email="bench@example.com", hashed_password="x", full_name="Bench", role="user"))
+        db.commit()
+        db.execute(insert(Task), [{"title": f"task {i}", "owner_id": OWNER_ID} for i in range(tasks)])
+        db.commit()
+
+
+async def drive(path: str, concurrency: int, requests: int):
+    latencies = []
+    remaining = iter(range(requests))
+    transport = httpx.ASGITransport(app=bench_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return requests / elapsed, statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.99) - 1] * 1000
+
+
+async def main_async(args):
+    for path in ("/sync/tasks", "/async/tasks"):
+        await drive(path, min(args.concurrency, 50), 200)  # warm pools
+        rps, p50, p99 = await drive(path, args.concurrency, args.requests)
+        print(f"  {path:13s} {rps:9.1f} req/s   p50 {p50:8.1f} ms   p99 {p99:8.1f} ms")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--tasks", type=int, default=1000)
+    args = parser.parse_args()
+
+    seed(args.tasks)
+    print(f"{engine.dialect.name}: {args.concurrency} concurrent clients, {args.requests} requests")
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
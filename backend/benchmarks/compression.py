@@ -0,0 +1,121 @@
+﻿"""CPU cost vs bytes saved for response compression.
+
+Seeds one owner with tasks, fetches real response bodies through the app
+uncompressed (a 100-row GET /tasks page and the NDJSON export), then times
+each codec and level on them. The export is also compressed the way the
+middleware streams it: one flushed chunk per export batch.
+
+Run from the project root:
+    python -m backend.benchmarks.compression [--tasks 5000] [--repeat 20]
+
+Uses BENCH_DATABASE_URL, or a fresh SQLite file in the temp directory.
+brotli rows appear only when the optional `brotli` package is installed.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import zlib
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primetrade_bench.db')}",
+)
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from backend.app.main import app
+from backend.app.core import compression
+from backend.app.core.security import create_access_token, user_token_claims
+from backend.app.db.session import Base, engine, SessionLocal
+from backend.app.models.task import Task
+from backend.app.models.users import User
+
+LEVELS = [("gzip", 1), ("gzip", 6), ("gzip", 9)]
+if compression.brotli is not None:
+    LEVELS += [("br", 1), ("br", 4), ("br", 9), ("br", 11)]
+EXPORT_BATCH_LINES = 1000
+
+
+def seed(tasks: int) -> User:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        owner = User(email="bench@example.com", hashed_password="x", full_name="Bench", role="user", is_active=True)
+        db.add(owner)
+        db.commit()
+        db.execute(insert(Task), [
+            {
+                "title": f"task {i}: follow up with client {i % 97}",
+                "description": f"call back about invoice {i * 7919 % 100000}, see notes from week {i % 52}",
+                "status": ("open", "doing", "done")[i % 3],
+                "owner_id": owner.id,
+            }
+            for i in range(tasks)
+        ])
+        db.commit()
+        db.refresh(owner)
+        db.expunge(owner)
+        return owner
+
+
+def streamed(body: bytes, encoding: str, level: int) -> int:
+    """Compressed size when sent as flushed chunks of EXPORT_BATCH_LINES lines."""
+    lines = body.splitlines(keepends=True)
+    chunks = [b"".join(lines[start:start + EXPORT_BATCH_LINES]) for start in range(0, len(lines), EXPORT_BATCH_LINES)]
+    if encoding == "br":
+        compressor = compression.brotli.Compressor(quality=level)
+        return sum(len(compressor.process(chunk)) + len(compressor.flush()) for chunk in chunks) + len(compressor.finish())
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return sum(len(compressor.compress(chunk)) + len(compressor.flush(zlib.Z_SYNC_FLUSH)) for chunk in chunks) + len(compressor.flush())
+
+
+def one_shot(body: bytes, encoding: str, level: int) -> bytes:
+    if encoding == "br":
+        return compression.brotli.compress(body, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(body) + compressor.flush()
+
+
+def timed(fn, repeat: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    owner = seed(args.tasks)
+    headers = {"Authorization": f"Bearer {create_access_token(user_token_claims(owner))}", "Accept-Encoding": "identity"}
+    try:
+        client = TestClient(app)
+        bodies = {
+            "GET /tasks?limit=100": client.get("/api/v1/tasks/", params={"limit": 100}, headers=headers).content,
+            f"export ({args.tasks} rows)": client.get("/api/v1/tasks/export", headers=headers).content,
+        }
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+    print(f"{engine.dialect.name}: mean of {args.repeat}; ratio = compressed / original")
+    for name, body in bodies.items():
+        print(f"\n  {name}: {len(body) / 1024:.1f} KB")
+        print(f"    {'codec':<8} {'size':>9} {'ratio':>6} {'cpu':>9} {'MB/s':>7}   {'streamed':>9}")
+        for encoding, level in LEVELS:
+            size = len(one_shot(body, encoding, level))
+            ms = timed(lambda: one_shot(body, encoding, level), args.repeat)
+            line = f"    {encoding + ' ' + str(level):<8} {size / 1024:7.1f}KB {size / len(body):6.3f} {ms:7.2f}ms {len(body) / 1e6 / (ms / 1000):7.1f}"
+            if name.startswith("export"):
+                line += f"   {streamed(body, encoding, level) / 1024:7.1f}KB"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
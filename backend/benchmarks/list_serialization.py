@@ -0,0 +1,125 @@
+﻿"""ORM + response_model vs the fast list path for GET /tasks.
+
+Seeds one owner, then times a full page (limit=100, no count) through the real
+route with FAST_LIST_RESPONSES off and on, driven over httpx's ASGI
+transport. A second table times the serialization step alone, on rows
+already fetched: Task objects validated into PaginatedTasks, dumped to
+Python and json.dumps-ed (what FastAPI does for a response_model), against
+column rows dumped to bytes by the TaskPage TypeAdapter.
+
+Run from the project root:
+    python -m backend.benchmarks.list_serialization [--tasks 1000] [--limit 100] [--requests 300]
+
+Uses BENCH_DATABASE_URL, or a fresh SQLite file in the temp directory.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primetrade_bench.db')}",
+)
+
+import httpx
+from sqlalchemy import insert
+
+from backend.app.main import app
+from backend.app.api.v1 import tasks as tasks_api
+from backend.app.core.security import create_access_token, user_token_claims
+from backend.app.db.session import Base, engine, SessionLocal
+from backend.app.models.task import Task
+from backend.app.models.users import User
+from backend.app.crud import task as crud_task
+from backend.app.crud.projection import as_dicts
+from backend.app.schemas.task import PaginatedTasks
+
+
+def seed(tasks: int) -> User:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        owner = User(email="bench@example.com", hashed_password="x", full_name="Bench", role="user", is_active=True)
+        db.add(owner)
+        db.commit()
+        db.execute(insert(Task), [
+            {"title": f"task {i}", "description": "benchmark row " * 4, "status": "open", "owner_id": owner.id}
+            for i in range(tasks)
+        ])
+        db.commit()
+        db.refresh(owner)
+        db.expunge(owner)
+        return owner
+
+
+async def drive(headers: dict, params: dict, requests: int) -> float:
+    """Mean milliseconds per sequential request."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+        for _ in range(10):  # warm caches and pools
+            (await client.get("/api/v1/tasks/", params=params)).raise_for_status()
+        started = time.perf_counter()
+        for _ in range(requests):
+            (await client.get("/api/v1/tasks/", params=params)).raise_for_status()
+        return (time.perf_counter() - started) / requests * 1000
+
+
+def timed(fn, repeat: int) -> float:
+    """Mean milliseconds per call."""
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    owner = seed(args.tasks)
+    headers = {"Authorization": f"Bearer {create_access_token(user_token_claims(owner))}"}
+    params = {"limit": args.limit, "include_total": "false"}
+    meta = {"page": 1, "limit": args.limit}
+    try:
+        route = {}
+        for fast in (False, True):
+            tasks_api.FAST_LIST_RESPONSES = fast
+            route[fast] = asyncio.run(drive(headers, params, args.requests))
+
+        with SessionLocal() as db:
+            objects, _ = crud_task.list_tasks(db, owner.id, None, limit=args.limit, with_total=False)
+            rows, _ = crud_task.list_tasks(db, owner.id, None, limit=args.limit, with_total=False, fields=crud_task.LIST_FIELDS)
+            models_ms = timed(lambda: json.dumps(
+                PaginatedTasks.model_validate({"data": objects, "meta": meta}, from_attributes=True).model_dump(mode="json"),
+                separators=(",", ":"),
+            ).encode(), args.requests)
+            rows_ms = timed(lambda: tasks_api._task_page.dump_json(
+                {"data": as_dicts(rows, crud_task.LIST_FIELDS), "meta": meta}
+            ), args.requests)
+            query_orm_ms = timed(lambda: crud_task.list_tasks(db, owner.id, None, limit=args.limit, with_total=False), args.requests)
+            query_rows_ms = timed(lambda: crud_task.list_tasks(db, owner.id, None, limit=args.limit, with_total=False, fields=crud_task.LIST_FIELDS), args.requests)
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+    print(f"{engine.dialect.name}: {args.tasks} tasks, limit {args.limit} (mean of {args.requests})")
+    print("  GET /tasks/ end to end")
+    print(f"    ORM + response_model  {route[False]:8.2f} ms")
+    print(f"    fast path             {route[True]:8.2f} ms   ({route[False] / route[True]:.1f}x)")
+    print("  query only")
+    print(f"    Task objects          {query_orm_ms:8.2f} ms")
+    print(f"    column rows           {query_rows_ms:8.2f} ms   ({query_orm_ms / query_rows_ms:.1f}x)")
+    print("  serialization only")
+    print(f"    models + json.dumps   {models_ms:8.2f} ms")
+    print(f"    rows + dump_json      {rows_ms:8.2f} ms   ({models_ms / rows_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
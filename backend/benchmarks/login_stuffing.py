@@ -0,0 +1,153 @@
+﻿"""Credential-stuffing load test for /auth/token.
+
+Replays a stuffing attack (leaked email/password pairs, a mix of unknown
+emails and real accounts, spread over a handful of client IPs) against the
+login endpoint in rounds, and reports per round the CPU used by the server
+process plus the password pool workers, the number of bcrypt verifications
+and the status codes. It runs once with throttling and the failed-login
+cache disabled and once with the configured defaults.
+
+Run from the project root:
+    python -m backend.benchmarks.login_stuffing [--rounds 8] [--attempts 400]
+
+Uses BENCH_DATABASE_URL, or a fresh SQLite file in the temp directory. CPU of
+the pool workers is read from /proc, so the worker column is Linux only.
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import random
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primetrade_bench.db')}",
+)
+
+import httpx
+
+from backend.app.main import app
+from backend.app.api.v1 import auth
+from backend.app.core.password_pool import password_pool
+from backend.app.core.security import get_password_hash
+from backend.app.crud.users import failed_logins
+from backend.app.db.session import Base, engine, async_engine, SessionLocal
+from backend.app.models.users import User
+
+REAL_ACCOUNTS = 10
+ATTACKER_IPS = 20
+
+
+def seed() -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    hashed = get_password_hash("correct horse")
+    with SessionLocal() as db:
+        for i in range(REAL_ACCOUNTS):
+            db.add(User(email=f"user{i}@example.com", hashed_password=hashed, full_name="U", role="user"))
+        db.commit()
+
+
+def attack(attempts: int, rnd: random.Random):
+    """(ip, email, password) triples; about a third target real accounts."""
+    for _ in range(attempts):
+        if rnd.random() < 0.3:
+            email = f"user{rnd.randrange(REAL_ACCOUNTS)}@example.com"
+        else:
+            email = f"leaked{rnd.randrange(5000)}@example.com"
+        yield f"10.0.0.{rnd.randrange(ATTACKER_IPS)}", email, f"hunter{rnd.randrange(50)}"
+
+
+def cpu_seconds() -> float:
+    """CPU time of this process plus the live password pool workers."""
+    total = time.process_time()
+    executor = password_pool._executor
+    tick = os.sysconf("SC_CLK_TCK")
+    for pid in list(executor._processes) if executor else []:
+        try:
+            with open(f"/proc/{pid}/stat") as stat:
+                fields = stat.read().rsplit(")", 1)[1].split()
+            total += (int(fields[11]) + int(fields[12])) / tick
+        except OSError:
+            pass
+    return total
+
+
+async def run_round(clients, triples):
+    statuses = collections.Counter()
+
+    async def one(ip, email, password):
+        response = await clients[ip].post("/api/v1/auth/token", data={"username": email, "password": password})
+        statuses[response.status_code] += 1
+
+    # 16 attempts in flight at a time, as a modest botnet would do
+    queue = list(triples)
+    for start in range(0, len(queue), 16):
+        await asyncio.gather(*(one(*t) for t in queue[start:start + 16]))
+    return statuses
+
+
+async def run(label: str, rounds: int, attempts: int):
+    rnd = random.Random(7)
+    clients = {
+        f"10.0.0.{i}": httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app, client=(f"10.0.0.{i}", 40000)), base_url="http://bench",
+        )
+        for i in range(ATTACKER_IPS)
+    }
+    print(f"\n{label}")
+    print("  round   cpu s   bcrypt   401   429   503")
+    try:
+        for r in range(rounds):
+            cpu, hashes = cpu_seconds(), password_pool.hash_time.count
+            statuses = await run_round(clients, attack(attempts, rnd))
+            print(
+                f"  {r + 1:5d} {cpu_seconds() - cpu:7.2f} {password_pool.hash_time.count - hashes:8d}"
+                f" {statuses[401]:5d} {statuses[429]:5d} {statuses[503]:5d}"
+            )
+    finally:
+        for client in clients.values():
+            await client.aclose()
+
+
+def reset_state():
+    failed_logins.clear()
+    auth.login_email_limiter.clear()
+    auth.login_ip_limiter.clear()
+
+
+async def main_async(args):
+    limits = (auth.login_email_limiter.limit, auth.login_ip_limiter.limit)
+    known_failed, remember_failed = auth.known_failed_login, auth.remember_failed_login
+    auth.login_email_limiter.limit = auth.login_ip_limiter.limit = 10**9
+    auth.known_failed_login, auth.remember_failed_login = (lambda *a: False), (lambda *a: None)
+    await run("unguarded (no throttling, no failed-login cache)", args.rounds, args.attempts)
+
+    auth.login_email_limiter.limit, auth.login_ip_limiter.limit = limits
+    auth.known_failed_login, auth.remember_failed_login = known_failed, remember_failed
+    reset_state()
+    await run("guarded (defaults)", args.rounds, args.attempts)
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=8)
+    parser.add_argument("--attempts", type=int, default=400)
+    args = parser.parse_args()
+
+    seed()
+    print(f"{engine.dialect.name}: {args.rounds} rounds x {args.attempts} attempts from {ATTACKER_IPS} IPs, "
+          f"{password_pool.workers} password workers")
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        password_pool.shutdown()
+        Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
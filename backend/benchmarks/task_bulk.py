@@ -0,0 +1,89 @@
+﻿"""Bulk task write benchmark.
+
+Times creating N tasks one request-equivalent at a time (crud.task.create_task_async:
+one commit and refresh per task) against crud.task.create_tasks_bulk_async, then
+a bulk partial update and a bulk delete of the same N tasks.
+
+Run from the project root:
+    python -m backend.benchmarks.task_bulk [--tasks 10000] [--single 1000]
+
+Uses BENCH_DATABASE_URL (e.g. a local Postgres), or a fresh SQLite file in the
+temp directory. The one-by-one path is timed on --single tasks and scaled up.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primetrade_bench.db')}",
+)
+
+from backend.app.db.session import Base, engine, async_engine, AsyncSessionLocal, SessionLocal
+from backend.app.models.users import User
+from backend.app.schemas.task import TaskCreate, TaskBulkUpdateItem
+from backend.app.crud import task as crud_task
+
+OWNER_ID = 1
+
+
+def seed() -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add(User(id=OWNER_ID, email="bench@example.com", hashed_password="x", full_name="Bench", role="user"))
+        db.commit()
+
+
+async def timed(label: str, coro, scale: float = 1.0):
+    started = time.perf_counter()
+    result = await coro
+    elapsed = (time.perf_counter() - started) * scale
+    print(f"  {label:42s} {elapsed * 1000:10.1f} ms")
+    return result
+
+
+async def one_by_one(tasks):
+    async with AsyncSessionLocal() as db:
+        for task_in in tasks:
+            await crud_task.create_task_async(db, OWNER_ID, task_in)
+
+
+async def main_async(args):
+    tasks = [TaskCreate(title=f"task {i}", description=f"imported row {i}") for i in range(args.tasks)]
+    print(f"{engine.dialect.name}: {args.tasks} tasks")
+
+    await timed(
+        f"one by one (measured on {args.single}, scaled)",
+        one_by_one(tasks[:args.single]), scale=args.tasks / args.single,
+    )
+    async with AsyncSessionLocal() as db:
+        created = await timed("bulk create", crud_task.create_tasks_bulk_async(db, OWNER_ID, tasks))
+        updates = [
+            TaskBulkUpdateItem(id=task.id, status="done") if i % 2
+            else TaskBulkUpdateItem(id=task.id, title=f"renamed {i}")
+            for i, task in enumerate(created)
+        ]
+        await timed("bulk update (two field groups)", crud_task.update_tasks_bulk_async(db, OWNER_ID, updates))
+        await timed("bulk delete", crud_task.delete_tasks_bulk_async(db, OWNER_ID, [task.id for task in created]))
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=10_000)
+    parser.add_argument("--single", type=int, default=1000)
+    args = parser.parse_args()
+
+    seed()
+    try:
+        asyncio.run(main_async(args))
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
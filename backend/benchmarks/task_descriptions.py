@@ -0,0 +1,97 @@
+﻿"""Payload size and latency of GET /tasks with large descriptions.
+
+Seeds one owner with tasks carrying 100 KB descriptions, then fetches a
+page (no count) through the real route as the full view, view=compact
+(a bounded SQL prefix of each description) and a fields= projection that
+leaves description out. Driven over httpx's ASGI transport.
+
+Run from the project root:
+    python -m backend.benchmarks.task_descriptions [--tasks 200] [--kb 100] [--limit 100]
+
+Uses BENCH_DATABASE_URL, or a fresh SQLite file in the temp directory.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primetrade_bench.db')}",
+)
+
+import httpx
+from sqlalchemy import insert
+
+from backend.app.main import app
+from backend.app.core.security import create_access_token, user_token_claims
+from backend.app.db.session import Base, engine, SessionLocal
+from backend.app.models.task import Task
+from backend.app.models.users import User
+
+VIEWS = {
+    "full": {},
+    "compact": {"view": "compact"},
+    "fields (no description)": {"fields": "id,title,status,created_at"},
+}
+
+
+def seed(tasks: int, kb: int) -> User:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        owner = User(email="bench@example.com", hashed_password="x", full_name="Bench", role="user", is_active=True)
+        db.add(owner)
+        db.commit()
+        note = ("pasted meeting notes " * (kb * 1024 // 21 + 1))[: kb * 1024]
+        for start in range(0, tasks, 50):
+            db.execute(insert(Task), [
+                {"title": f"task {i}", "description": note, "status": "open", "owner_id": owner.id}
+                for i in range(start, min(start + 50, tasks))
+            ])
+            db.commit()
+        db.refresh(owner)
+        db.expunge(owner)
+        return owner
+
+
+async def drive(headers: dict, params: dict, requests: int):
+    """(mean milliseconds per sequential request, body bytes)."""
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers, timeout=120) as client:
+        response = await client.get("/api/v1/tasks/", params=params)
+        response.raise_for_status()
+        started = time.perf_counter()
+        for _ in range(requests):
+            (await client.get("/api/v1/tasks/", params=params)).raise_for_status()
+        return (time.perf_counter() - started) / requests * 1000, len(response.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--kb", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=20)
+    args = parser.parse_args()
+
+    owner = seed(args.tasks, args.kb)
+    headers = {"Authorization": f"Bearer {create_access_token(user_token_claims(owner))}"}
+    try:
+        results = {
+            name: asyncio.run(drive(headers, {"limit": args.limit, "include_total": "false", **params}, args.requests))
+            for name, params in VIEWS.items()
+        }
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+    print(f"{engine.dialect.name}: {args.tasks} tasks with {args.kb} KB descriptions, limit {args.limit} (mean of {args.requests})")
+    print(f"  {'view':<24} {'payload':>12} {'latency':>11}")
+    for name, (ms, size) in results.items():
+        print(f"  {name:<24} {size / 1024:9.1f} KB {ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
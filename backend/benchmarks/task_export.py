@@ -0,0 +1,112 @@
+﻿"""Task export memory benchmark.
+
+Seeds one owner with increasing numbers of tasks and streams
+GET /api/v1/tasks/export straight through the ASGI app, reporting time,
+bytes sent and the peak Python heap (tracemalloc) while streaming. The peak
+should stay flat as the row count grows.
+
+Run from the project root:
+    python -m backend.benchmarks.task_export [--sizes 10000 100000 300000]
+
+Uses BENCH_DATABASE_URL, or a fresh SQLite file in the temp directory.
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primetrade_bench.db')}",
+)
+
+from sqlalchemy import insert
+
+from backend.app.main import app
+from backend.app.core.security import create_access_token
+from backend.app.db.session import Base, engine, async_engine, SessionLocal
+from backend.app.models.task import Task
+from backend.app.models.users import User
+
+OWNER_ID = 1
+
+
+def seed(tasks: int) -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add(User(id=OWNER_ID, email="bench@example.com", hashed_password="x", full_name="Bench", role="user"))
+        db.commit()
+        for start in range(0, tasks, 20_000):
+            rows = [
+                {"title": f"task {i}", "description": f"exported row {i} " * 4, "owner_id": OWNER_ID}
+                for i in range(start, min(tasks, start + 20_000))
+            ]
+            db.execute(insert(Task), rows)
+            db.commit()
+
+
+async def export(fmt: str):
+    """Drive the ASGI app directly and discard each chunk as it is sent (httpx's
+    ASGITransport would buffer the whole body and hide what the server holds)."""
+    token = create_access_token({"sub": "bench@example.com", "uid": OWNER_ID, "role": "user", "active": True, "ver": 0})
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": "/api/v1/tasks/export", "raw_path": b"/api/v1/tasks/export", "root_path": "",
+        "query_string": f"format={fmt}".encode(), "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 40000), "server": ("bench", 80),
+    }
+    received = 0
+    requested = False
+    disconnected = asyncio.get_running_loop().create_future()
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return await disconnected
+
+    async def send(message):
+        nonlocal received
+        if message["type"] == "http.response.body":
+            received += len(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return received
+
+
+async def measure(fmt: str):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    received = await export(fmt)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, received, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 300_000])
+    args = parser.parse_args()
+
+    print(f"{engine.dialect.name}")
+    print("      rows  format    seconds       MB sent   peak heap MB")
+    try:
+        for size in args.sizes:
+            seed(size)
+            for fmt in ("ndjson", "csv"):
+                elapsed, received, peak = asyncio.run(measure(fmt))
+                print(f"  {size:8d}  {fmt:6s} {elapsed:10.2f} {received / 1e6:13.1f} {peak / 1e6:14.2f}")
+            asyncio.run(async_engine.dispose())
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+﻿"""Streaming task import benchmark.
+
+Generates an NDJSON or CSV upload on the fly and feeds it in 64 KiB chunks to
+POST /api/v1/tasks/import straight through the ASGI app (the upload is never
+held in memory in full), reporting rows/sec and the peak Python heap.
+
+Run from the project root:
+    python -m backend.benchmarks.task_import [--rows 100000 500000] [--batch-size 1000]
+
+Uses BENCH_DATABASE_URL, or a fresh SQLite file in the temp directory.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primetrade_bench.db')}",
+)
+
+from backend.app.main import app
+from backend.app.core.security import create_access_token
+from backend.app.db.session import Base, engine, async_engine, SessionLocal
+from backend.app.models.users import User
+
+OWNER_ID = 1
+CHUNK = 64 * 1024
+
+
+def seed() -> None:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.add(User(id=OWNER_ID, email="bench@example.com", hashed_password="x", full_name="Bench", role="user"))
+        db.commit()
+
+
+def body_chunks(fmt: str, rows: int):
+    buffer = ["title,description,status\n"] if fmt == "csv" else []
+    size = sum(map(len, buffer))
+    for i in range(rows):
+        if fmt == "csv":
+            line = f"task {i},imported row {i},open\n"
+        else:
+            line = json.dumps({"title": f"task {i}", "description": f"imported row {i}", "status": "open"}) + "\n"
+        buffer.append(line)
+        size += len(line)
+        if size >= CHUNK:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+async def upload(fmt: str, rows: int, batch_size: int) -> dict:
+    token = create_access_token({"sub": "bench@example.com", "uid": OWNER_ID, "role": "user", "active": True, "ver": 0})
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST", "scheme": "http",
+        "path": "/api/v1/tasks/import", "raw_path": b"/api/v1/tasks/import", "root_path": "",
+        "query_string": f"format={fmt}&batch_size={batch_size}".encode(),
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 40000), "server": ("bench", 80),
+    }
+    chunks = body_chunks(fmt, rows)
+    response = []
+
+    async def receive():
+        chunk = next(chunks, None)
+        return {"type": "http.request", "body": chunk or b"", "more_body": chunk is not None}
+
+    async def send(message):
+        if message["type"] == "http.response.body":
+            response.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return json.loads(b"".join(response))
+
+
+async def measure(fmt: str, rows: int, batch_size: int):
+    tracemalloc.start()
+    started = time.perf_counter()
+    summary = await upload(fmt, rows, batch_size)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    await async_engine.dispose()
+    assert summary["inserted"] == rows, summary
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--no-tracemalloc", action="store_true", help="time without heap tracing overhead")
+    args = parser.parse_args()
+
+    print(f"{engine.dialect.name}: batch size {args.batch_size}")
+    print("      rows  format    seconds      rows/s   peak heap MB")
+    try:
+        for rows in args.rows:
+            for fmt in ("ndjson", "csv"):
+                seed()
+                if args.no_tracemalloc:
+                    started = time.perf_counter()
+                    asyncio.run(upload(fmt, rows, args.batch_size))
+                    elapsed, peak = time.perf_counter() - started, float("nan")
+                    asyncio.run(async_engine.dispose())
+                else:
+                    elapsed, peak = asyncio.run(measure(fmt, rows, args.batch_size))
+                print(f"  {rows:8d}  {fmt:6s} {elapsed:10.2f} {rows / elapsed:11.0f} {peak / 1e6:14.2f}")
+    finally:
+        Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()
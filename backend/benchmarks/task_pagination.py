@@ -0,0 +1,104 @@
+﻿"""Offset vs keyset pagination benchmark for the task list.
+
+Seeds one owner with many tasks and times fetching a deep page through
+crud.task.list_tasks (OFFSET + count) and crud.task.list_tasks_keyset.
+
+Run from the project root:
+    python -m backend.benchmarks.task_pagination [--tasks 100000] [--page 1000] [--limit 20]
+
+Uses BENCH_DATABASE_URL, or a fresh SQLite file in the temp directory.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primetrade_bench.db')}",
+)
+
+from sqlalchemy import insert
+
+from backend.app.db.session import Base, engine, SessionLocal
+from backend.app.models.task import Task
+from backend.app.models.users import User
+from backend.app.crud import task as crud_task
+
+
+def seed(db, tasks: int) -> int:
+    owner = User(email="bench@example.com", hashed_password="x", full_name="Bench", role="user")
+    db.add(owner)
+    db.commit()
+    base = datetime(2024, 1, 1)
+    batch = 10_000
+    for start in range(0, tasks, batch):
+        rows = [
+            {
+                "title": f"task {i}",
+                "description": "benchmark row",
+                "status": "open",
+                "owner_id": owner.id,
+                # a few rows per second so the (created_at, id) tiebreak is exercised
+                "created_at": base + timedelta(seconds=i // 3),
+            }
+            for i in range(start, min(start + batch, tasks))
+        ]
+        db.execute(insert(Task), rows)
+    db.commit()
+    return owner.id
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100_000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        owner_id = seed(db, args.tasks)
+
+        # Walk the cursors up to the page before the target so the timed call
+        # is a single seek, exactly as a client following next_cursor would make it.
+        cursor = None
+        for _ in range(args.page - 1):
+            _, cursor, _ = crud_task.list_tasks_keyset(db, owner_id, None, limit=args.limit, cursor=cursor)
+
+        offset_ms = timed(
+            lambda: crud_task.list_tasks(db, owner_id, None, page=args.page, limit=args.limit), args.repeat
+        )
+        offset_nocount_ms = timed(
+            lambda: crud_task.list_tasks(db, owner_id, None, page=args.page, limit=args.limit, with_total=False),
+            args.repeat,
+        )
+        keyset_ms = timed(
+            lambda: crud_task.list_tasks_keyset(db, owner_id, None, limit=args.limit, cursor=cursor), args.repeat
+        )
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+    print(f"{engine.dialect.name}: {args.tasks} tasks, page {args.page}, limit {args.limit} (best of {args.repeat})")
+    print(f"  offset + count   {offset_ms:8.2f} ms")
+    print(f"  offset, no count {offset_nocount_ms:8.2f} ms")
+    print(f"  keyset cursor    {keyset_ms:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+﻿"""Full-text task search benchmark.
+
+Seeds one tenant with synthetic tasks and times crud.task.search_tasks (ranked
+first page plus total) for rare, medium and common terms, next to the old
+newest-first ILIKE '%q%' page.
+
+Run from the project root:
+    python -m backend.benchmarks.task_search [--tasks 1000000]
+
+Uses BENCH_DATABASE_URL, or a fresh SQLite file in the temp directory.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+os.environ["DATABASE_URL"] = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'primetrade_bench.db')}",
+)
+
+from sqlalchemy import insert, select
+
+from backend.app.db.session import Base, engine, SessionLocal
+from backend.app.models.task import Task
+from backend.app.models.users import User
+from backend.app.crud import task as crud_task
+
+COMMON = ["review", "update", "fix", "call", "email", "plan", "check", "draft", "send", "prepare"]
+NOUNS = [f"topic{i}" for i in range(2000)]
+
+
+def seed(db, tasks: int) -> int:
+    rnd = random.Random(42)
+    owner = User(email="bench@example.com", hashed_password="x", full_name="Bench", role="user")
+    db.add(owner)
+    db.commit()
+    batch = 20_000
+    for start in range(0, tasks, batch):
+        rows = []
+        for i in range(start, min(start + batch, tasks)):
+            words = rnd.sample(COMMON, 2) + rnd.sample(NOUNS, 3)
+            rows.append({
+                "title": " ".join(words[:3]),
+                "description": " ".join(words[2:] + rnd.sample(NOUNS, 6)),
+                "status": "open",
+                "owner_id": owner.id,
+            })
+        # only one task mentions this term
+        if start == 0:
+            rows[0]["description"] += " zanzibar"
+        db.execute(insert(Task), rows)
+        db.commit()
+    return owner.id
+
+
+def timed(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        owner_id = seed(db, args.tasks)
+        print(f"{engine.dialect.name}: seeded {args.tasks} tasks in {time.perf_counter() - started:.1f} s")
+
+        for label, term in [("rare", "zanzibar"), ("medium", "topic7"), ("common", "review")]:
+            hits = crud_task.search_tasks(db, owner_id, term, limit=args.limit)[1]
+            page_ms = timed(
+                lambda: crud_task.search_tasks(db, owner_id, term, limit=args.limit, with_total=False), args.repeat
+            )
+            total_ms = timed(lambda: crud_task.search_tasks(db, owner_id, term, limit=args.limit), args.repeat)
+            like_ms = timed(
+                lambda: db.execute(
+                    crud_task.LikeTaskSearch().match(select(Task).filter(Task.owner_id == owner_id), term)
+                    .order_by(Task.created_at.desc(), Task.id.desc()).limit(args.limit)
+                ).scalars().all(),
+                1,
+            )
+            print(
+                f"  {label:7s} {term!r:12s} {hits:8d} hits  ranked page {page_ms:8.2f} ms"
+                f"  page+total {total_ms:8.2f} ms  ILIKE page {like_ms:8.2f} ms"
+            )
+    finally:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+
+
+if __name__ == "__main__":
+    main()